@@ -0,0 +1,76 @@
+"""
+Benchmark de actualizaciones de edad sobre el ABB (ChildrenBST)
+
+Cada actualización que cambia la edad reubica el nodo en el árbol. El script
+mide el costo por operación en los distintos modos y verifica las invariantes
+al final de la carga.
+
+Uso:
+    python benchmarks/bench_abb_updates.py --size 20000 --updates 100000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.model.schemas import Child, ChildUpdate
+
+
+MODES = {
+    "plain": {},
+    "self_rebuilding": {"self_rebuilding": True},
+    "adaptive": {"adaptive": True},
+}
+
+
+def run(mode: str, size: int, updates: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    bst = ChildrenBST(**MODES[mode])
+    
+    start = time.perf_counter()
+    for i in range(1, size + 1):
+        bst.insert(Child(id=i, age=rng.randint(0, 18), name=f"Niño {i}", gender="M"))
+    insert_seconds = time.perf_counter() - start
+    
+    payloads = [(rng.randint(1, size), ChildUpdate(age=rng.randint(0, 18))) for _ in range(updates)]
+    start = time.perf_counter()
+    for child_id, child_update in payloads:
+        bst.update(child_id, child_update)
+    update_seconds = time.perf_counter() - start
+    
+    return {
+        "mode": mode,
+        "size": size,
+        "updates": updates,
+        "insert_us_per_op": insert_seconds / size * 1e6,
+        "update_us_per_op": update_seconds / updates * 1e6,
+        "height": bst.height(),
+        "rebuilds": bst.rebuild_count,
+        "valid": bst.is_valid(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de actualizaciones de edad en ChildrenBST")
+    parser.add_argument("--size", type=int, default=20000)
+    parser.add_argument("--updates", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mode", choices=list(MODES), action="append")
+    args = parser.parse_args()
+    
+    for mode in args.mode or list(MODES):
+        result = run(mode, args.size, args.updates, args.seed)
+        print(
+            f"{result['mode']:16s} insert {result['insert_us_per_op']:7.2f} us/op | "
+            f"update {result['update_us_per_op']:7.2f} us/op | "
+            f"altura {result['height']:5d} | reconstrucciones {result['rebuilds']:4d} | "
+            f"{'válido' if result['valid'] else 'INVÁLIDO'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark de consultas analíticas: recorrido de objetos vs vista columnar
+
+Calcula la misma consulta (filtro por edad y género, percentiles de edad y
+conteo por banda de edad × género) de tres formas sobre un ChildrenAVL:
+recorriendo los objetos Child en Python en cada consulta, con NumPy
+reconstruyendo la vista en cada consulta (árbol que cambia entre consultas)
+y con la vista en caché (misma versión del árbol, el caso de `/analytics`
+repetido).
+
+Uso:
+    python benchmarks/bench_analytics.py --size 1000000 --queries 20
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from umanizales_edu.model.schemas import Child
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.service.columnar import GENDERS, ColumnarSnapshot, analyze
+
+QUERY = dict(min_age=4, max_age=15, genders=["F", "Otro"], percentiles=[25, 50, 75], band=5)
+
+
+def python_query(tree: ChildrenAVL) -> dict:
+    """La misma consulta recorriendo objetos (referencia sin NumPy)"""
+    ages = []
+    bands = {}
+    for child in tree.iter_inorder():
+        if 4 <= child.age <= 15 and child.gender in ("F", "Otro"):
+            ages.append(child.age)
+            key = (child.age // 5, child.gender)
+            bands[key] = bands.get(key, 0) + 1
+    quartiles = statistics.quantiles(ages, n=4, method="inclusive") if len(ages) > 1 else []
+    return {"count": len(ages), "quartiles": quartiles, "bands": bands}
+
+
+def timed(function, queries: int) -> float:
+    """ms por consulta"""
+    start = time.perf_counter()
+    for _ in range(queries):
+        function()
+    return (time.perf_counter() - start) / queries * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas analíticas: objetos vs NumPy")
+    parser.add_argument("--size", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    tree = ChildrenAVL()
+    tree.load_sorted([
+        Child.model_construct(id=i, age=rng.randint(0, 18), name=f"Niño {i}", gender=rng.choice(GENDERS))
+        for i in range(1, args.size + 1)
+    ])
+    expected = python_query(tree)
+    assert analyze(tree.columnar_snapshot(), **QUERY)["count"] == expected["count"]
+
+    cases = [
+        ("objetos Python", lambda: python_query(tree)),
+        ("NumPy sin caché", lambda: analyze(ColumnarSnapshot.from_children(tree.iter_inorder(), tree.version), **QUERY)),
+        ("NumPy en caché", lambda: analyze(tree.columnar_snapshot(), **QUERY)),
+    ]
+    print(f"{args.size} niños, {args.queries} consultas")
+    print(f"{'método':18s} {'ms/consulta':>12s} {'vs objetos':>11s}")
+    base = None
+    for name, function in cases:
+        ms = timed(function, args.queries)
+        base = base or ms
+        print(f"{name:18s} {ms:12.2f} {base / ms:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark de despacho síncrono vs asíncrono en FastAPI
+
+Monta sobre el mismo motor dos versiones de cada endpoint: `def` (FastAPI las
+despacha al pool de hilos de AnyIO) y `async def` (se ejecutan directamente
+en el event loop). Las invoca en proceso por ASGI con la misma concurrencia y
+reporta el throughput de cada una.
+
+Uso:
+    python benchmarks/bench_dispatch.py --requests 20000 --concurrency 64
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI, HTTPException
+
+from load_asgi import asgi_request
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.model.schemas import Child, ChildResponse
+
+
+def build_app(engine) -> FastAPI:
+    """App mínima con los mismos endpoints en variante sync y async"""
+    app = FastAPI()
+
+    @app.get("/sync/{id}", response_model=ChildResponse)
+    def get_sync(id: int):
+        child = engine.search(id)
+        if child is None:
+            raise HTTPException(status_code=404, detail="not found")
+        return child
+
+    @app.get("/async/{id}", response_model=ChildResponse)
+    async def get_async(id: int):
+        child = engine.search(id)
+        if child is None:
+            raise HTTPException(status_code=404, detail="not found")
+        return child
+
+    @app.post("/sync/", response_model=ChildResponse, status_code=201)
+    def create_sync(child: Child):
+        engine.insert(child)
+        return child
+
+    @app.post("/async/", response_model=ChildResponse, status_code=201)
+    async def create_async(child: Child):
+        engine.insert(child)
+        return child
+
+    return app
+
+
+async def drive(app, mode: str, operation: str, total: int, concurrency: int, size: int, first_id: int) -> float:
+    """Lanzar `total` peticiones con `concurrency` clientes y devolver req/s"""
+    rng = random.Random(7)
+    remaining = total
+    next_id = first_id
+
+    async def worker():
+        nonlocal remaining, next_id
+        while remaining > 0:
+            remaining -= 1
+            if operation == "get":
+                await asgi_request(app, "GET", f"/{mode}/{rng.randint(1, size)}")
+            else:
+                child_id = next_id
+                next_id += 1
+                body = f'{{"id": {child_id}, "age": {child_id % 19}, "name": "Niño", "gender": "M"}}'.encode()
+                await asgi_request(app, "POST", f"/{mode}/", body=body)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput de endpoints sync vs async")
+    parser.add_argument("--engine", choices=["bst", "avl"], default="avl")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--size", type=int, default=10000)
+    args = parser.parse_args()
+
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+    engine = ChildrenBST(self_rebuilding=True) if args.engine == "bst" else ChildrenAVL()
+    for i in range(1, args.size + 1):
+        engine.insert(Child(id=i, age=i % 19, name=f"Niño {i}", gender="M"))
+    app = build_app(engine)
+
+    next_id = args.size + 1
+    print(f"{'operación':10s} {'concurrencia':>12s} {'sync req/s':>12s} {'async req/s':>12s} {'mejora':>8s}")
+    for operation in ("get", "create"):
+        for concurrency in args.concurrency:
+            sync_rps = asyncio.run(drive(app, "sync", operation, args.requests, concurrency, args.size, next_id))
+            next_id += args.requests
+            async_rps = asyncio.run(drive(app, "async", operation, args.requests, concurrency, args.size, next_id))
+            next_id += args.requests
+            print(f"{operation:10s} {concurrency:12d} {sync_rps:12.0f} {async_rps:12.0f} {async_rps / sync_rps:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""
+Suite de benchmarks de los motores de árbol (ChildrenBST y ChildrenAVL)
+
+Ejecuta directamente las operaciones de cada motor (sin servidor HTTP):
+insert, search, update, delete, recorridos (in/pre/post) y estadísticas,
+para varios tamaños y distribuciones de datos. Los resultados se escriben en
+JSON y pueden compararse contra una línea base guardada para detectar
+regresiones.
+
+Uso:
+    python benchmarks/bench_engines.py --sizes 1000 10000 --output results.json
+    python benchmarks/bench_engines.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_engines.py --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.model.schemas import Child, ChildUpdate
+
+
+ENGINES: Dict[str, Callable[[], object]] = {
+    "bst": ChildrenBST,
+    "bst_scapegoat": lambda: ChildrenBST(self_rebuilding=True),
+    "bst_adaptive": lambda: ChildrenBST(adaptive=True),
+    "avl": ChildrenAVL,
+}
+
+# Distribuciones en las que el ABB simple degenera (profundidad O(n))
+DEGENERATE_FOR_PLAIN_BST = {"sequential", "age_skewed", "adversarial"}
+
+GENDERS = ("M", "F", "Otro")
+
+
+# ==================== DISTRIBUCIONES ====================
+
+def sequential(n: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """Ids consecutivos con edades crecientes (entrada ya ordenada)"""
+    return [(i, (i - 1) * 19 // n) for i in range(1, n + 1)]
+
+
+def uniform_random(n: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """Ids en orden aleatorio con edades uniformes"""
+    ids = rng.sample(range(1, n * 10 + 1), n)
+    return [(i, rng.randint(0, 18)) for i in ids]
+
+
+def age_skewed(n: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """Ids aleatorios con el 80% de las edades concentradas en 6-8 años"""
+    ids = rng.sample(range(1, n * 10 + 1), n)
+    return [(i, rng.randint(6, 8) if rng.random() < 0.8 else rng.randint(0, 18)) for i in ids]
+
+
+def adversarial(n: int, rng: random.Random) -> List[Tuple[int, int]]:
+    """Ids en zigzag desde los extremos (máximas rotaciones) y edades decrecientes"""
+    ids = []
+    lo, hi = 1, n
+    while lo <= hi:
+        ids.append(lo)
+        if lo != hi:
+            ids.append(hi)
+        lo += 1
+        hi -= 1
+    return [(child_id, 18 - position * 19 // n) for position, child_id in enumerate(ids)]
+
+
+DISTRIBUTIONS = {
+    "sequential": sequential,
+    "random": uniform_random,
+    "age_skewed": age_skewed,
+    "adversarial": adversarial,
+}
+
+
+# ==================== MEDICIÓN ====================
+
+def timed(operation: Callable[[], None]) -> float:
+    """Ejecutar una operación con el GC deshabilitado y devolver los segundos"""
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        operation()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def bench_case(engine_name: str, distribution: str, size: int, ops: int, seed: int) -> List[dict]:
+    """Medir todas las operaciones de un motor sobre un conjunto de datos"""
+    rng = random.Random(seed)
+    rows = DISTRIBUTIONS[distribution](size, rng)
+    children = [
+        Child(id=child_id, age=age, name=f"Niño {child_id}", gender=GENDERS[child_id % 3])
+        for child_id, age in rows
+    ]
+    ids = [child.id for child in children]
+    ops = min(ops, size)
+
+    # Consultas: mitad existentes, mitad inexistentes
+    search_ids = [rng.choice(ids) if k % 2 == 0 else -k for k in range(ops)]
+    updates = [(rng.choice(ids), ChildUpdate(age=rng.randint(0, 18))) for _ in range(ops)]
+    delete_ids = rng.sample(ids, ops)
+
+    engine = ENGINES[engine_name]()
+
+    def run_insert():
+        for child in children:
+            engine.insert(child)
+
+    def run_search():
+        for child_id in search_ids:
+            engine.search(child_id)
+
+    def run_update():
+        for child_id, child_update in updates:
+            engine.update(child_id, child_update)
+
+    def run_delete():
+        for child_id in delete_ids:
+            engine.delete(child_id)
+
+    def run_stats():
+        engine.height()
+        engine.count_nodes()
+
+    # El orden importa: las operaciones posteriores usan el árbol ya construido
+    measurements = [
+        ("insert", size, timed(run_insert)),
+        ("search", ops, timed(run_search)),
+        ("inorder", 1, timed(engine.inorder_traversal)),
+        ("preorder", 1, timed(engine.preorder_traversal)),
+        ("postorder", 1, timed(engine.postorder_traversal)),
+        ("stats", 1, timed(run_stats)),
+        ("update", ops, timed(run_update)),
+        ("delete", ops, timed(run_delete)),
+    ]
+
+    return [
+        {
+            "engine": engine_name,
+            "distribution": distribution,
+            "size": size,
+            "operation": operation,
+            "ops": count,
+            "seconds": seconds,
+            "us_per_op": seconds / count * 1e6,
+        }
+        for operation, count, seconds in measurements
+    ]
+
+
+def run_suite(engines: List[str], distributions: List[str], sizes: List[int], ops: int,
+              seed: int, repeat: int, plain_bst_max: int) -> dict:
+    """Ejecutar la matriz completa; cada caso conserva la mejor de `repeat` corridas"""
+    results: List[dict] = []
+    skipped: List[dict] = []
+    for size in sizes:
+        for distribution in distributions:
+            for engine_name in engines:
+                if (engine_name == "bst" and distribution in DEGENERATE_FOR_PLAIN_BST
+                        and size > plain_bst_max):
+                    skipped.append({
+                        "engine": engine_name,
+                        "distribution": distribution,
+                        "size": size,
+                        "reason": f"ABB simple degenerado; tamaño mayor que --plain-bst-max={plain_bst_max}",
+                    })
+                    continue
+
+                best: Dict[str, dict] = {}
+                for _ in range(repeat):
+                    for row in bench_case(engine_name, distribution, size, ops, seed):
+                        current = best.get(row["operation"])
+                        if current is None or row["seconds"] < current["seconds"]:
+                            best[row["operation"]] = row
+                results.extend(best.values())
+                print(
+                    f"  {engine_name:14s} {distribution:12s} n={size:<8d} "
+                    f"insert {best['insert']['us_per_op']:8.2f} us/op | "
+                    f"search {best['search']['us_per_op']:8.2f} us/op",
+                    file=sys.stderr
+                )
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "ops": ops,
+            "repeat": repeat,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+
+# ==================== COMPARACIÓN CON LÍNEA BASE ====================
+
+def result_key(row: dict) -> Tuple[str, str, int, str]:
+    return row["engine"], row["distribution"], row["size"], row["operation"]
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[dict]:
+    """Casos cuyo costo por operación empeoró más que la tolerancia"""
+    reference = {result_key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        base = reference.get(result_key(row))
+        if base is None or base["us_per_op"] == 0:
+            continue
+        ratio = row["us_per_op"] / base["us_per_op"]
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "engine": row["engine"],
+                "distribution": row["distribution"],
+                "size": row["size"],
+                "operation": row["operation"],
+                "baseline_us_per_op": base["us_per_op"],
+                "current_us_per_op": row["us_per_op"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de ChildrenBST y ChildrenAVL")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=list(ENGINES))
+    parser.add_argument("--distributions", nargs="+", choices=list(DISTRIBUTIONS), default=list(DISTRIBUTIONS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000],
+                        help="Tamaños de árbol (p. ej. 1000 10000 100000 1000000)")
+    parser.add_argument("--ops", type=int, default=10000, help="Operaciones de search/update/delete por caso")
+    parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por caso (se conserva la mejor)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--plain-bst-max", type=int, default=10000,
+                        help="Tamaño máximo del ABB simple en distribuciones que lo degeneran")
+    parser.add_argument("--output", type=Path, help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--save-baseline", type=Path, help="Guardar los resultados como línea base")
+    parser.add_argument("--baseline", type=Path, help="Línea base contra la cual comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Empeoramiento relativo permitido antes de reportar una regresión")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), args.plain_bst_max * 2 + 1000))
+    # La promoción del ABB adaptativo se registra en cada caso; no interesa aquí
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+
+    report = run_suite(args.engines, args.distributions, args.sizes, args.ops,
+                       args.seed, args.repeat, args.plain_bst_max)
+
+    exit_code = 0
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        report["regressions"] = compare(report, baseline, args.tolerance)
+        for regression in report["regressions"]:
+            print(
+                f"REGRESIÓN {regression['engine']}/{regression['distribution']}/n={regression['size']} "
+                f"{regression['operation']}: {regression['baseline_us_per_op']:.2f} -> "
+                f"{regression['current_us_per_op']:.2f} us/op (x{regression['ratio']:.2f})",
+                file=sys.stderr
+            )
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.save_baseline is not None:
+        args.save_baseline.write_text(output, encoding="utf-8")
+    if args.output is not None:
+        args.output.write_text(output, encoding="utf-8")
+    elif args.save_baseline is None:
+        print(output)
+
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark de exportación: listado JSON vs GET /export en cada formato
+
+Carga N niños en el árbol AVL global y descarga el almacén completo por la
+app ASGI (sin red), descartando los bloques de la respuesta a medida que
+llegan, como haría un cliente que escribe a disco. Reporta tiempo de CPU del
+proceso, bytes enviados y el pico de memoria asignada durante la petición
+(tracemalloc, en una descarga aparte): el listado JSON arma la lista y el
+cuerpo completos, la exportación en streaming retiene una referencia por
+niño y un bloque codificado.
+
+Uso:
+    python benchmarks/bench_export.py --size 200000
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from umanizales_edu.controller.export import pyarrow
+from umanizales_edu.main_avl import app
+from umanizales_edu.model.schemas import Child
+from umanizales_edu.service.avl_service import children_avl
+
+GENDERS = ("M", "F", "Otro")
+
+
+async def stream_request(path: str, query: str) -> Tuple[int, int]:
+    """GET contra la app descartando el cuerpo; devuelve (status, bytes recibidos)"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"testserver")], "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    done = asyncio.Event()
+    status = received = 0
+
+    async def receive():
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, received
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, received
+
+
+def measure(path: str, query: str) -> Tuple[float, int, int]:
+    """(segundos de CPU, bytes, pico de memoria en bytes) de una descarga completa
+
+    El pico se mide en una segunda descarga: tracemalloc encarece mucho las
+    asignaciones en Python y distorsionaría el tiempo de CPU.
+    """
+    start = time.process_time()
+    status, received = asyncio.run(stream_request(path, query))
+    elapsed = time.process_time() - start
+    assert status == 200, (path, query, status)
+    tracemalloc.start()
+    asyncio.run(stream_request(path, query))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, received, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU y memoria: listado JSON vs exportación en streaming")
+    parser.add_argument("--size", type=int, default=100000, help="Niños en el árbol")
+    args = parser.parse_args()
+
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+    children_avl.load_sorted([
+        Child.model_construct(id=i, age=i % 19, name=f"Niño {i}", gender=GENDERS[i % 3])
+        for i in range(1, args.size + 1)
+    ])
+
+    cases = [("list json", "/children/avl/", "")] + [
+        (f"export {fmt}", "/children/avl/export", f"format={fmt}")
+        for fmt in ("csv", "ndjson", "columnar") + (("arrow",) if pyarrow is not None else ())
+    ]
+    print(f"{args.size} niños")
+    print(f"{'caso':16s} {'CPU s':>8s} {'vs json':>8s} {'MB enviados':>12s} {'pico MB':>9s}")
+    base = None
+    for name, path, query in cases:
+        cpu, received, peak = measure(path, query)
+        base = base or cpu
+        print(f"{name:16s} {cpu:8.2f} {cpu / base:7.2f}x {received / 1e6:12.1f} {peak / 1e6:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark del canal de ingesta: POST por niño vs lotes por WebSocket
+
+Levanta la app elegida con uvicorn en un puerto libre e inserta N niños de
+dos formas: un POST /children/<motor>/ por niño sobre una conexión HTTP
+persistente, y lotes de `--batch` inserciones por /children/<motor>/ingest
+con hasta `--window` lotes sin confirmar. Reporta niños por segundo de cada
+una; el cliente WebSocket respeta la ventana anunciada por el servidor.
+
+Uso:
+    python benchmarks/bench_ingest.py --app avl --count 50000 --batch 500 --window 8
+"""
+import argparse
+import http.client
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from websockets.sync.client import connect
+
+ROOT = Path(__file__).resolve().parent.parent
+GENDERS = ("M", "F", "Otro")
+PREFIXES = {"avl": "/children/avl", "abb": "/children/bst"}
+
+
+def child(id: int) -> dict:
+    return {"id": id, "age": id % 19, "name": f"Niño {id}", "gender": GENDERS[id % 3]}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    sys.exit("El servidor no arrancó")
+
+
+def http_inserts(port: int, prefix: str, ids: range) -> float:
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    start = time.perf_counter()
+    for id in ids:
+        connection.request("POST", prefix + "/", json.dumps(child(id)), {"Content-Type": "application/json"})
+        connection.getresponse().read()
+    elapsed = time.perf_counter() - start
+    connection.close()
+    return len(ids) / elapsed
+
+
+def ws_inserts(port: int, prefix: str, ids: range, batch: int, window: int) -> float:
+    with connect(f"ws://127.0.0.1:{port}{prefix}/ingest", max_size=None) as ws:
+        ready = json.loads(ws.recv())
+        window = min(window, ready["window"])
+        batch = min(batch, ready["max_batch"])
+        frames = [
+            json.dumps({"seq": seq, "ops": [{"op": "insert", "child": child(id)} for id in ids[i:i + batch]]})
+            for seq, i in enumerate(range(0, len(ids), batch))
+        ]
+        start = time.perf_counter()
+        in_flight = 0
+        applied = 0
+        for frame in frames:
+            if in_flight == window:
+                applied += json.loads(ws.recv())["applied"]
+                in_flight -= 1
+            ws.send(frame)
+            in_flight += 1
+        for _ in range(in_flight):
+            applied += json.loads(ws.recv())["applied"]
+        elapsed = time.perf_counter() - start
+    if applied != len(ids):
+        sys.exit(f"Se aplicaron {applied} de {len(ids)} inserciones")
+    return len(ids) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inserciones por POST vs lotes por WebSocket")
+    parser.add_argument("--app", choices=list(PREFIXES), default="avl")
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--window", type=int, default=8)
+    args = parser.parse_args()
+
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"umanizales_edu.main_{args.app}:app",
+         "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT
+    )
+    try:
+        wait_ready(port)
+        prefix = PREFIXES[args.app]
+        # Ids disjuntos: los dos métodos insertan en el mismo árbol
+        posted = http_inserts(port, prefix, range(1, args.count + 1))
+        streamed = ws_inserts(port, prefix, range(args.count + 1, 2 * args.count + 1), args.batch, args.window)
+        print(f"{args.count} inserciones en {args.app} (lotes de {args.batch}, ventana {args.window})")
+        print(f"{'POST por niño':22s} {posted:10.0f} niños/s")
+        print(f"{'WebSocket por lotes':22s} {streamed:10.0f} niños/s  (x{streamed / posted:.1f})")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
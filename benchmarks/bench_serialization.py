@@ -0,0 +1,107 @@
+"""
+Benchmark de la ruta rápida de validación y serialización
+
+Compara, sobre el mismo motor, endpoints al estilo clásico de FastAPI
+(parámetro `Child` en el cuerpo + `response_model`, que revalida la salida)
+con la ruta rápida de los controladores (`json_body` valida los bytes crudos
+con `model_validate_json` y la respuesta se devuelve ya codificada). Reporta
+tiempo de CPU del proceso por petición, no tiempo de reloj.
+
+Uso:
+    python benchmarks/bench_serialization.py --requests 5000 --list-size 1000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import Depends, FastAPI
+
+from load_asgi import asgi_request
+from umanizales_edu.controller.serialization import child_json, children_json, json_body
+from umanizales_edu.model.schemas import Child, ChildResponse
+from umanizales_edu.service.avl_service import ChildrenAVL
+
+
+def build_app(engine: ChildrenAVL) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/classic/", response_model=ChildResponse, status_code=201)
+    async def create_classic(child: Child):
+        engine.insert(child)
+        return child
+
+    @app.post("/fast/", response_model=ChildResponse, status_code=201)
+    async def create_fast(child: Child = Depends(json_body(Child))):
+        engine.insert(child)
+        return child_json(child, 201)
+
+    @app.get("/classic/{id}", response_model=ChildResponse)
+    async def get_classic(id: int):
+        return engine.search(id)
+
+    @app.get("/fast/{id}", response_model=ChildResponse)
+    async def get_fast(id: int):
+        return child_json(engine.search(id))
+
+    @app.get("/classic/", response_model=List[ChildResponse])
+    async def list_classic():
+        return engine.inorder_traversal()
+
+    @app.get("/fast/", response_model=List[ChildResponse])
+    async def list_fast():
+        return children_json(engine.inorder_traversal())
+
+    return app
+
+
+async def measure(app, requests: List[tuple]) -> float:
+    """Ejecutar las peticiones en secuencia y devolver µs de CPU por petición"""
+    start = time.process_time()
+    for method, path, body in requests:
+        status, _ = await asgi_request(app, method, path, body=body)
+        assert status < 400, (method, path, status)
+    return (time.process_time() - start) / len(requests) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU por petición: FastAPI clásico vs ruta rápida")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--list-size", type=int, default=1000, help="Niños en el árbol para el listado")
+    args = parser.parse_args()
+
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+    engine = ChildrenAVL()
+    for i in range(1, args.list_size + 1):
+        engine.insert(Child(id=i, age=i % 19, name=f"Niño {i}", gender="M"))
+    app = build_app(engine)
+
+    def create_requests(mode: str, first_id: int):
+        return [
+            ("POST", f"/{mode}/", json.dumps({"id": i, "age": i % 19, "name": f"Niño {i}", "gender": "F"}).encode())
+            for i in range(first_id, first_id + args.requests)
+        ]
+
+    cases = [
+        ("create", create_requests("classic", 10**6), create_requests("fast", 2 * 10**6)),
+        ("get", [("GET", f"/classic/{1 + i % args.list_size}", None) for i in range(args.requests)],
+         [("GET", f"/fast/{1 + i % args.list_size}", None) for i in range(args.requests)]),
+        (f"list x{args.list_size}", [("GET", "/classic/", None)] * max(1, args.requests // 50),
+         [("GET", "/fast/", None)] * max(1, args.requests // 50)),
+    ]
+
+    print(f"{'operación':14s} {'clásico µs':>12s} {'rápido µs':>12s} {'ahorro':>8s}")
+    for name, classic, fast in cases:
+        classic_us = asyncio.run(measure(app, classic))
+        fast_us = asyncio.run(measure(app, fast))
+        print(f"{name:14s} {classic_us:12.1f} {fast_us:12.1f} {1 - fast_us / classic_us:7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark de escrituras durante listados sobre el almacén AVL particionado
+
+Lanza un proceso por cantidad de fragmentos (`CHILDREN_AVL_SHARDS=N`, que se
+lee al importar la app) y en cada uno invoca la app AVL en proceso (ASGI, sin
+red) con clientes que listan todo el árbol sin parar mientras llegan
+actualizaciones de ids al azar a ritmo fijo. Mide la latencia de esas
+escrituras y los listados por segundo.
+
+Qué cambia con N fragmentos: una escritura puntual toma solo el candado de
+su fragmento, y el listado suelta cada fragmento al terminar de recorrerlo,
+así que la escritura espera solo la parte del recorrido que falta para su
+fragmento y no el listado completo; baja sobre todo la mediana. La cola
+(p99) la marcan la codificación del listado y el orden por id del inorden,
+que ocupan el event loop sin ceder. Lo que no cambia: en un solo proceso las
+escrituras puntuales no ceden el event loop ni compiten entre sí, así que el
+throughput máximo de escrituras no crece con N.
+
+Uso:
+    python benchmarks/bench_shards.py --preload 100000 --listers 2 --write-rate 500 --shards 1 2 4 8 16
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.load_asgi import asgi_request, percentile
+
+
+async def drive(app, preload: int, listers: int, write_rate: float, seconds: float, seed: int) -> dict:
+    """Listar sin parar y actualizar a `write_rate` escrituras/s durante `seconds` segundos"""
+    rng = random.Random(seed)
+    write_latencies = []
+    listings = 0
+    errors = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+
+    async def lister():
+        nonlocal listings, errors
+        while time.perf_counter() < deadline:
+            status, _ = await asgi_request(app, "GET", "/children/avl/", "order=in")
+            listings += 1
+            errors += status != 200
+
+    async def write():
+        nonlocal errors
+        child_id = rng.randint(1, preload)
+        body = json.dumps({"age": rng.randint(0, 18)}).encode()
+        sent = time.perf_counter()
+        status, _ = await asgi_request(app, "PUT", f"/children/avl/{child_id}", "", body)
+        write_latencies.append(time.perf_counter() - sent)
+        errors += status != 200
+
+    async def writers():
+        # Carga abierta: las escrituras llegan a ritmo fijo, no cuando termina la anterior
+        pending = []
+        for n in range(int(write_rate * seconds)):
+            await asyncio.sleep(max(0.0, start + n / write_rate - time.perf_counter()))
+            pending.append(asyncio.ensure_future(write()))
+        await asyncio.gather(*pending)
+
+    await asyncio.gather(*(lister() for _ in range(listers)), writers())
+    elapsed = time.perf_counter() - start
+    write_latencies.sort()
+    return {
+        "writes_per_s": len(write_latencies) / elapsed,
+        "write_p50_ms": percentile(write_latencies, 0.50) * 1e3,
+        "write_p99_ms": percentile(write_latencies, 0.99) * 1e3,
+        "write_max_ms": write_latencies[-1] * 1e3 if write_latencies else 0.0,
+        "listings_per_s": listings / elapsed,
+        "errors": errors,
+    }
+
+
+def worker(args) -> None:
+    """Proceso hijo: la cantidad de fragmentos ya viene en CHILDREN_AVL_SHARDS"""
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+    from umanizales_edu.main_avl import app
+    from umanizales_edu.metrics import registry
+    from umanizales_edu.model.schemas import Child
+    from umanizales_edu.service.avl_service import children_avl
+
+    registry.enabled = not args.no_metrics
+    children_avl.load_sorted([
+        Child.model_construct(id=i, age=i % 19, name=f"Niño {i}", gender="M") for i in range(1, args.preload + 1)
+    ])
+    result = asyncio.run(drive(app, args.preload, args.listers, args.write_rate, args.seconds, args.seed))
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escrituras durante listados vs cantidad de fragmentos")
+    parser.add_argument("--preload", type=int, default=100000, help="Niños cargados antes de medir")
+    parser.add_argument("--listers", type=int, default=2, help="Clientes que listan sin parar")
+    parser.add_argument("--write-rate", type=float, default=500, help="Actualizaciones por segundo (carga abierta)")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-metrics", action="store_true", help="Desactivar contadores de métricas")
+    parser.add_argument("--output", type=Path, help="Guardar el reporte en JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    print(f"{args.preload} niños, {args.listers} listando, {args.write_rate:.0f} actualizaciones/s, "
+          f"{args.seconds:.0f}s por corrida")
+    print(f"{'fragmentos':>10s} {'escr/s':>8s} {'p50 ms':>8s} {'p99 ms':>8s} {'max ms':>8s} {'p99 vs 1':>9s} {'listados/s':>11s}")
+    report = []
+    base = None
+    for shards in args.shards:
+        command = [sys.executable, __file__, "--worker", "--preload", str(args.preload),
+                   "--listers", str(args.listers), "--write-rate", str(args.write_rate),
+                   "--seconds", str(args.seconds), "--seed", str(args.seed)]
+        if args.no_metrics:
+            command.append("--no-metrics")
+        env = dict(os.environ, CHILDREN_AVL_SHARDS=str(shards))
+        output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+        result = dict(json.loads(output.splitlines()[-1]), shards=shards)
+        report.append(result)
+        base = base or result["write_p99_ms"]
+        print(f"{shards:10d} {result['writes_per_s']:8.0f} {result['write_p50_ms']:8.2f} {result['write_p99_ms']:8.2f} "
+              f"{result['write_max_ms']:8.2f} {result['write_p99_ms'] / base:8.2f}x {result['listings_per_s']:11.1f}")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
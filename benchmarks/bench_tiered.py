@@ -0,0 +1,82 @@
+"""
+Benchmark del almacén con niveles: memoria y latencia de búsqueda
+
+Carga N niños en un ChildrenAVL y en un TieredChildrenAVL con un nivel
+caliente de `--hot` niños, y compara la memoria asignada (tracemalloc) y la
+latencia de búsqueda en tres casos: ids del conjunto de trabajo (aciertos en
+memoria tras calentarlo), ids fríos (cada búsqueda lee un bloque del disco y
+sube el niño) e ids ausentes dentro del rango (los descarta el filtro de
+Bloom sin leer el disco, salvo los falsos positivos). Las búsquedas no
+desalojan (en la API el desalojo corre aparte): se desaloja después de cada
+caso, fuera de la medición.
+
+Uso:
+    python benchmarks/bench_tiered.py --size 500000 --hot 50000
+"""
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from umanizales_edu.model.schemas import Child
+from umanizales_edu.service.avl_service import ChildrenAVL, TieredChildrenAVL
+
+GENDERS = ("M", "F", "Otro")
+
+
+def timed(store, ids) -> float:
+    """µs por búsqueda (el desalojo que dejan pendiente se hace después, fuera de la medición)"""
+    start = time.perf_counter()
+    for id in ids:
+        store.search(id)
+    elapsed = time.perf_counter() - start
+    if isinstance(store, TieredChildrenAVL):
+        asyncio.run(store.evict())
+    return elapsed / len(ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memoria y latencia: AVL en memoria vs almacén con niveles")
+    parser.add_argument("--size", type=int, default=200000, help="Niños cargados (ids pares)")
+    parser.add_argument("--hot", type=int, default=20000, help="Capacidad del nivel caliente")
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+    rng = random.Random(args.seed)
+    children = [
+        Child.model_construct(id=2 * i, age=i % 19, name=f"Niño {i}", gender=GENDERS[i % 3])
+        for i in range(1, args.size + 1)
+    ]
+    working_set = [2 * rng.randint(1, args.hot // 2) for _ in range(args.lookups)]
+    cold = [2 * rng.randint(args.hot, args.size) for _ in range(args.lookups)]
+    missing = [2 * rng.randint(1, args.size) + 1 for _ in range(args.lookups)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        stores = [("AVL en memoria", ChildrenAVL()), ("con niveles", TieredChildrenAVL(args.hot, directory))]
+        print(f"{args.size} niños, nivel caliente de {args.hot}, {args.lookups} búsquedas por caso")
+        print(f"{'almacén':16s} {'MB':>7s} {'trabajo µs':>11s} {'frío µs':>9s} {'ausente µs':>11s}")
+        for name, store in stores:
+            tracemalloc.start()
+            # Copias de los niños: las de la lista original no cuentan para ningún almacén
+            store.load_sorted([child.model_copy() for child in children])
+            timed(store, working_set)
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            hot, faults, absent = (timed(store, ids) for ids in (working_set, cold, missing))
+            print(f"{name:16s} {memory / 1e6:7.1f} {hot:11.2f} {faults:9.2f} {absent:11.2f}")
+            if isinstance(store, TieredChildrenAVL):
+                store.wait_for_compaction()
+                print(store.tier_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Generador de carga en proceso para las APIs ABB y AVL (sin uvicorn)
+
+Invoca directamente la aplicación ASGI (`umanizales_edu.main_abb.app` o
+`umanizales_edu.main_avl.app`) con mensajes ASGI construidos a mano, de modo
+que se mide el costo completo de FastAPI (validación, `response_model`,
+serialización y despacho) sin red ni cliente HTTP de por
+medio. Con `--engine-baseline` se mide además la misma mezcla de operaciones
+llamando al motor directamente, para separar el costo del framework del costo
+del árbol.
+
+Uso:
+    python benchmarks/load_asgi.py --app abb --requests 20000 --concurrency 32
+    python benchmarks/load_asgi.py --app avl --mix get=6,create=2,update=1,delete=1,list=0 --engine-baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from umanizales_edu.model.schemas import Child, ChildUpdate
+
+
+APPS = {
+    "abb": ("umanizales_edu.main_abb", "umanizales_edu.service.abb_service", "children_bst", "/children/bst"),
+    "avl": ("umanizales_edu.main_avl", "umanizales_edu.service.avl_service", "children_avl", "/children/avl"),
+}
+
+DEFAULT_MIX = "get=5,create=2,update=1,delete=1,list=1"
+
+GENDERS = ("M", "F", "Otro")
+
+
+# ==================== LLAMADAS ASGI ====================
+
+async def asgi_request(app, method: str, path: str, query: str = "", body: Optional[bytes] = None) -> Tuple[int, bytes]:
+    """Ejecutar una petición HTTP contra la app ASGI y devolver (status, cuerpo)"""
+    headers = [(b"host", b"testserver")]
+    if body is not None:
+        headers.append((b"content-type", b"application/json"))
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    disconnect = asyncio.Event()
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body or b"", "more_body": False}
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                disconnect.set()
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+# ==================== GENERACIÓN DE OPERACIONES ====================
+
+class Workload:
+    """Genera operaciones según la mezcla configurada sobre un conjunto de ids vivos"""
+
+    def __init__(self, mix: Dict[str, int], preload: int, seed: int):
+        self.rng = random.Random(seed)
+        self.operations = [name for name, weight in mix.items() for _ in range(weight)]
+        self.live_ids: List[int] = list(range(1, preload + 1))
+        self.next_id = preload + 1
+
+    def new_child(self, child_id: int) -> dict:
+        return {
+            "id": child_id,
+            "age": self.rng.randint(0, 18),
+            "name": f"Niño {child_id}",
+            "gender": GENDERS[child_id % 3],
+        }
+
+    def next_operation(self) -> Tuple[str, Optional[int], Optional[dict]]:
+        operation = self.rng.choice(self.operations)
+        if operation != "create" and operation != "list" and not self.live_ids:
+            operation = "create"
+
+        if operation == "create":
+            child_id = self.next_id
+            self.next_id += 1
+            self.live_ids.append(child_id)
+            return operation, child_id, self.new_child(child_id)
+        if operation == "list":
+            return operation, None, None
+        if operation == "delete":
+            position = self.rng.randrange(len(self.live_ids))
+            self.live_ids[position], self.live_ids[-1] = self.live_ids[-1], self.live_ids[position]
+            return operation, self.live_ids.pop(), None
+        child_id = self.rng.choice(self.live_ids)
+        if operation == "update":
+            return operation, child_id, {"age": self.rng.randint(0, 18)}
+        return operation, child_id, None
+
+
+def endpoint_call(prefix: str, operation: str, child_id: Optional[int], payload: Optional[dict],
+                  list_order: str) -> Tuple[str, str, str, str, Optional[bytes]]:
+    """Traducir una operación a (etiqueta, método, ruta, query, cuerpo)"""
+    body = json.dumps(payload).encode() if payload is not None else None
+    if operation == "create":
+        return f"POST {prefix}/", "POST", f"{prefix}/", "", body
+    if operation == "list":
+        return f"GET {prefix}/?order={list_order}", "GET", f"{prefix}/", f"order={list_order}", None
+    if operation == "get":
+        return f"GET {prefix}/{{id}}", "GET", f"{prefix}/{child_id}", "", None
+    if operation == "update":
+        return f"PUT {prefix}/{{id}}", "PUT", f"{prefix}/{child_id}", "", body
+    return f"DELETE {prefix}/{{id}}", "DELETE", f"{prefix}/{child_id}", "", None
+
+
+# ==================== MÉTRICAS ====================
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: Dict[str, List[float]], errors: Dict[str, int]) -> Dict[str, dict]:
+    summary = {}
+    for label, values in sorted(latencies.items()):
+        values.sort()
+        summary[label] = {
+            "count": len(values),
+            "errors": errors.get(label, 0),
+            "mean_ms": sum(values) / len(values) * 1e3,
+            "p50_ms": percentile(values, 0.50) * 1e3,
+            "p95_ms": percentile(values, 0.95) * 1e3,
+            "p99_ms": percentile(values, 0.99) * 1e3,
+            "max_ms": values[-1] * 1e3,
+        }
+    return summary
+
+
+# ==================== EJECUCIÓN ====================
+
+def preload_engine(engine, workload: Workload) -> None:
+    """Cargar el árbol directamente (sin HTTP) con los ids iniciales"""
+    for child_id in workload.live_ids:
+        engine.insert(Child(**workload.new_child(child_id)))
+
+
+async def run_http(app, prefix: str, workload: Workload, total: int, concurrency: int,
+                   list_order: str) -> dict:
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            label, method, path, query, body = endpoint_call(prefix, *workload.next_operation(), list_order)
+            start = time.perf_counter()
+            status, _ = await asgi_request(app, method, path, query, body)
+            latencies[label].append(time.perf_counter() - start)
+            if status >= 400:
+                errors[label] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": elapsed,
+        "throughput_rps": total / elapsed,
+        "endpoints": summarize(latencies, errors),
+    }
+
+
+def run_engine(engine, prefix: str, workload: Workload, total: int, list_order: str) -> dict:
+    """Misma mezcla de operaciones llamando al motor directamente"""
+    traversal = {
+        "in": engine.inorder_traversal,
+        "pre": engine.preorder_traversal,
+        "post": engine.postorder_traversal,
+    }[list_order]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(total):
+        operation, child_id, payload = workload.next_operation()
+        label = endpoint_call(prefix, operation, child_id, payload, list_order)[0]
+        start = time.perf_counter()
+        if operation == "create":
+            engine.insert(Child(**payload))
+        elif operation == "list":
+            traversal()
+        elif operation == "get":
+            engine.search(child_id)
+        elif operation == "update":
+            engine.update(child_id, ChildUpdate(**payload))
+        else:
+            engine.delete(child_id)
+        latencies[label].append(time.perf_counter() - start)
+    return {"endpoints": summarize(latencies, {})}
+
+
+def parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("get", "create", "update", "delete", "list"):
+            raise argparse.ArgumentTypeError(f"Operación desconocida en la mezcla: {name}")
+        mix[name] = int(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("La mezcla debe tener al menos una operación con peso > 0")
+    return mix
+
+
+def print_table(title: str, endpoints: Dict[str, dict]) -> None:
+    print(f"\n{title}")
+    print(f"  {'endpoint':34s} {'n':>7s} {'err':>5s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    for label, row in endpoints.items():
+        print(
+            f"  {label:34s} {row['count']:7d} {row['errors']:5d} {row['p50_ms']:9.3f} "
+            f"{row['p95_ms']:9.3f} {row['p99_ms']:9.3f} {row['max_ms']:9.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga en proceso (ASGI) para las APIs de árboles")
+    parser.add_argument("--app", choices=list(APPS), default="abb")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Pesos por operación (por defecto {DEFAULT_MIX})")
+    parser.add_argument("--preload", type=int, default=1000, help="Niños cargados antes de la medición")
+    parser.add_argument("--list-order", choices=["in", "pre", "post"], default="in")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--engine-baseline", action="store_true",
+                        help="Medir también la misma mezcla llamando al motor directamente")
+    parser.add_argument("--output", type=Path, help="Guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("umanizales_edu").setLevel(logging.ERROR)
+    app_module, service_module, engine_name, prefix = APPS[args.app]
+    app = __import__(app_module, fromlist=["app"]).app
+    service = __import__(service_module, fromlist=[engine_name])
+    engine = getattr(service, engine_name)
+
+    workload = Workload(args.mix, args.preload, args.seed)
+    preload_engine(engine, workload)
+    report = {"app": args.app, "mix": args.mix, "preload": args.preload}
+    report["http"] = asyncio.run(run_http(app, prefix, workload, args.requests, args.concurrency, args.list_order))
+
+    print(f"{args.app.upper()}: {report['http']['requests']} peticiones, concurrencia {args.concurrency}, "
+          f"{report['http']['throughput_rps']:.0f} req/s")
+    print_table("HTTP en proceso (FastAPI completo)", report["http"]["endpoints"])
+
+    if args.engine_baseline:
+        engine_type = type(engine)
+        direct_engine = engine_type()
+        direct_workload = Workload(args.mix, args.preload, args.seed)
+        preload_engine(direct_engine, direct_workload)
+        report["engine"] = run_engine(direct_engine, prefix, direct_workload, args.requests, args.list_order)
+        print_table("Motor directo (sin framework)", report["engine"]["endpoints"])
+
+        print("\nSobrecosto del framework (media HTTP - media motor):")
+        for label, row in report["http"]["endpoints"].items():
+            direct = report["engine"]["endpoints"].get(label)
+            if direct is not None:
+                print(f"  {label:34s} {row['mean_ms'] - direct['mean_ms']:9.3f} ms")
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Pruebas del Árbol Binario de Búsqueda (ABB) ordenado por edad
+"""
+import math
+import random
+import threading
+import time
+
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.model.schemas import Child, ChildUpdate
+
+
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def test_scapegoat_sorted_input_stays_shallow():
+    bst = ChildrenBST(self_rebuilding=True, alpha=0.7)
+    # Entrada ordenada por edad: en un ABB simple produce una lista enlazada
+    for i in range(1, 2001):
+        assert bst.insert(make_child(i, min(i // 100, 18)))
+    
+    limit = math.floor(math.log(bst.size) / math.log(1 / 0.7)) + 1
+    assert bst.size == 2000
+    assert bst.count_nodes() == 2000
+    assert bst.height() <= limit
+    assert bst.rebuild_count > 0
+    
+    ages = [c.age for c in bst.inorder_traversal()]
+    assert ages == sorted(ages)
+
+
+def test_scapegoat_preserves_order_and_deletes():
+    rng = random.Random(7)
+    bst = ChildrenBST(self_rebuilding=True)
+    plain = ChildrenBST()
+    children = [make_child(i, rng.randint(0, 18)) for i in range(1, 501)]
+    for child in children:
+        bst.insert(child)
+        plain.insert(child)
+    
+    assert [c.age for c in bst.inorder_traversal()] == [c.age for c in plain.inorder_traversal()]
+    assert not bst.insert(make_child(1, bst.search(1).age))
+    
+    for child in children[:400]:
+        assert bst.delete(child.id)
+    assert bst.size == 100
+    assert bst.count_nodes() == 100
+    assert bst.is_valid()
+    ages = [c.age for c in bst.inorder_traversal()]
+    assert ages == sorted(ages)
+
+
+def test_adaptive_promotes_when_degenerate():
+    bst = ChildrenBST(adaptive=True, promote_ratio=3.0, promote_min_size=32)
+    for i in range(1, 21):
+        bst.insert(make_child(i, i % 19))
+    assert not bst.promoted
+    
+    # Edades idénticas degeneran el ABB en una lista enlazada
+    for i in range(21, 1001):
+        bst.insert(make_child(i, 18))
+    
+    assert bst.promoted
+    assert bst.self_rebuilding
+    assert bst.size == bst.count_nodes() == 1000
+    assert bst.height() <= 3 * math.log2(bst.size)
+    ages = [c.age for c in bst.inorder_traversal()]
+    assert ages == sorted(ages)
+
+
+def test_update_that_promotes_keeps_version_on_new_node():
+    bst = ChildrenBST(adaptive=True, promote_ratio=3.0, promote_min_size=39)
+    bst.insert(make_child(1, 10))
+    for i in range(2, 39):
+        bst.insert(make_child(i, 18))
+    bst.insert(make_child(39, 5))
+    assert not bst.promoted
+    
+    # Reenlazar el niño al final de la cadena dispara la promoción
+    updated = bst.update(39, ChildUpdate(age=18))
+    assert bst.promoted
+    child, version = bst.search_with_version(39)
+    assert child is updated and child.age == 18
+    assert version == bst.version == 40
+    assert bst.is_valid()
+
+
+def test_update_relocates_node_when_age_changes():
+    rng = random.Random(11)
+    bst = ChildrenBST(self_rebuilding=True)
+    for i in range(1, 301):
+        bst.insert(make_child(i, rng.randint(0, 18)))
+    
+    for _ in range(1000):
+        child_id = rng.randint(1, 300)
+        new_age = rng.randint(0, 18)
+        updated = bst.update(child_id, ChildUpdate(age=new_age))
+        assert updated.age == new_age
+    assert bst.is_valid()
+    
+    for i in range(1, 301, 2):
+        assert bst.delete(i)
+    assert not bst.delete(1)
+    assert bst.search(1) is None
+    assert bst.search(2).id == 2
+    assert bst.is_valid()
+
+
+def test_update_replaces_child_instead_of_mutating():
+    bst = ChildrenBST()
+    for i in range(1, 11):
+        bst.insert(make_child(i, i))
+    before = bst.search(5)
+    listed = bst.inorder_traversal()
+    
+    updated = bst.update(5, ChildUpdate(name="Nuevo", age=1))
+    assert updated is not before and bst.search(5) is updated
+    assert (before.name, before.age) == ("Niño 5", 5)
+    assert (updated.name, updated.age) == ("Nuevo", 1)
+    assert [c.age for c in listed] == list(range(1, 11))
+    assert sorted(c.id for c in bst.range_by_age(1, 1)) == [1, 5]
+    assert bst.update(6, ChildUpdate(gender="F")).age == 6
+    assert bst.is_valid()
+
+
+def test_duplicate_id_rejected_regardless_of_age():
+    bst = ChildrenBST()
+    assert bst.insert(make_child(1, 5))
+    assert not bst.insert(make_child(1, 12))
+    assert bst.size == 1
+
+
+def test_age_queries_match_sorted_scan():
+    rng = random.Random(3)
+    bst = ChildrenBST(self_rebuilding=True)
+    for i in range(1, 401):
+        bst.insert(make_child(i, rng.randint(0, 18)))
+    ordered = bst.inorder_traversal()
+    
+    assert bst.range_by_age(5, 7) == [c for c in ordered if 5 <= c.age <= 7]
+    assert bst.youngest(50) == ordered[:50]
+    assert bst.oldest(50) == ordered[::-1][:50]
+    
+    # Paginación con cursor
+    pages, cursor = [], None
+    while True:
+        page = bst.range_by_age(5, 7, limit=10, after_id=cursor)
+        pages.extend(page)
+        if len(page) < 10:
+            break
+        cursor = page[-1].id
+    assert pages == bst.range_by_age(5, 7)
+    assert bst.youngest(5, after_id=ordered[9].id) == ordered[10:15]
+
+
+def test_lazy_delete_marks_and_compacts_in_background():
+    rng = random.Random(5)
+    bst = ChildrenBST(self_rebuilding=True, lazy_delete=True, compaction_threshold=0.5)
+    for i in range(1, 201):
+        bst.insert(make_child(i, rng.randint(0, 18)))
+    
+    for i in range(1, 81):
+        assert bst.delete(i)
+    assert bst.tombstones == 80
+    assert bst.search(1) is None
+    assert not bst.delete(1)
+    assert all(c.id > 80 for c in bst.inorder_traversal())
+    assert all(c.id > 80 for c in bst.youngest(200))
+    assert bst.compaction_count == 0
+    assert bst.is_valid()
+    
+    # Superar el umbral dispara la compactación en segundo plano
+    for i in range(81, 121):
+        bst.delete(i)
+    bst.wait_for_compaction()
+    assert bst.compaction_count == 1
+    assert bst.tombstones == 0
+    assert bst.size == bst.count_nodes() == 80
+    assert bst.is_valid()
+    
+    # Reinsertar un id eliminado
+    assert bst.insert(make_child(1, 3))
+    assert bst.search(1).age == 3
+
+
+def test_compaction_builds_outside_the_lock_and_discards_stale_copies():
+    bst = ChildrenBST(lazy_delete=True, compaction_threshold=0.9)
+    for i in range(1, 201):
+        bst.insert(make_child(i, i % 19))
+    for i in range(1, 51):
+        bst.delete(i)
+    
+    building, release = threading.Event(), threading.Event()
+    copy_balanced = bst._copy_balanced
+    
+    def slow_copy(entries):
+        building.set()
+        release.wait(5)
+        return copy_balanced(entries)
+    
+    bst._copy_balanced = slow_copy
+    compaction = threading.Thread(target=bst.compact)
+    compaction.start()
+    assert building.wait(5)
+    # La escritura no espera a que termine la construcción de la copia
+    start = time.perf_counter()
+    assert bst.update(100, ChildUpdate(age=3)).age == 3
+    assert time.perf_counter() - start < 1
+    release.set()
+    compaction.join()
+    
+    # La copia se armó con la versión anterior: se descarta
+    assert bst.compaction_count == 0 and bst.tombstones == 50
+    assert bst.search(100).age == 3 and bst.is_valid()
+    
+    del bst._copy_balanced
+    bst.compact()
+    assert bst.compaction_count == 1 and bst.tombstones == 0
+    assert bst.size == bst.count_nodes() == 150
+    assert bst.search(100).age == 3 and bst.is_valid()
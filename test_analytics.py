@@ -0,0 +1,64 @@
+"""
+Pruebas de la instantánea columnar y las analíticas
+"""
+import random
+
+from fastapi.testclient import TestClient
+
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL, ShardedChildrenAVL
+from umanizales_edu.service.columnar import analyze
+from umanizales_edu.model.schemas import Child
+
+
+def test_columnar_snapshot_cached_by_version_and_analytics():
+    rng = random.Random(5)
+    rows = [Child(id=i, age=rng.randint(0, 18), name=f"Niño {i}", gender=rng.choice(["M", "F", "Otro"]))
+            for i in rng.sample(range(1, 10000), 500)]
+    for engine in (ChildrenBST(), ChildrenAVL(), ShardedChildrenAVL(4)):
+        for child in rows:
+            engine.insert(child)
+        snapshot = engine.columnar_snapshot()
+        assert engine.columnar_snapshot() is snapshot
+        assert sorted(snapshot.id.tolist()) == sorted(c.id for c in rows)
+        
+        engine.delete(rows[0].id)
+        snapshot = engine.columnar_snapshot()
+        assert snapshot.version == engine.version and snapshot.size == len(rows) - 1
+        
+        live = rows[1:]
+        result = analyze(snapshot, min_age=4, max_age=15, genders=["F", "Otro"], min_id=100, percentiles=[50], band=4)
+        selected = [c for c in live if 4 <= c.age <= 15 and c.gender != "M" and c.id >= 100]
+        ages = sorted(c.age for c in selected)
+        assert result["count"] == len(selected)
+        assert result["age"]["min"] == ages[0] and result["age"]["max"] == ages[-1]
+        assert result["age"]["percentiles"]["p50"] == (ages[(len(ages) - 1) // 2] + ages[len(ages) // 2]) / 2
+        assert result["genders"] == {"M": 0, "F": sum(c.gender == "F" for c in selected),
+                                     "Otro": sum(c.gender == "Otro" for c in selected)}
+        for row in result["bands"]:
+            assert row["count"] == sum(row["min_age"] <= c.age <= row["max_age"] for c in selected)
+        assert analyze(snapshot, min_id=10**6)["age"] is None
+
+
+def test_analytics_endpoint_filters_and_rejects_bad_percentiles():
+    for app, prefix in ((abb_app, "/children/bst"), (avl_app, "/children/avl")):
+        client = TestClient(app)
+        ids = range(990101, 990106)
+        for i in ids:
+            assert client.post(f"{prefix}/", json={"id": i, "age": i % 10, "name": "Ana", "gender": "F"}).status_code == 201
+        try:
+            response = client.get(f"{prefix}/analytics", params={"min_id": ids[0], "max_id": ids[-1], "percentile": [50],
+                                                                 "gender": ["F", "Otro"], "band": 19})
+            assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+            result = response.json()
+            assert result["count"] == 5 and result["genders"] == {"M": 0, "F": 5, "Otro": 0}
+            assert result["age"]["min"] == 1 and result["age"]["max"] == 5 and result["age"]["percentiles"]["p50"] == 3
+            
+            bad = client.get(f"{prefix}/analytics", params={"percentile": [50, 101]})
+            assert bad.status_code == 400 and bad.json()["detail"] == "Percentiles must be between 0 and 100"
+            assert client.get(f"{prefix}/analytics", params={"gender": "X"}).status_code == 422
+        finally:
+            for i in ids:
+                client.delete(f"{prefix}/{i}")
@@ -1,7 +1,20 @@
 """
-Script de prueba para verificar el Árbol AVL con auto-balanceo
+Pruebas del Árbol AVL con auto-balanceo y de sus almacenes fragmentado y por niveles
 """
-from umanizales_edu.service.avl_service import ChildrenAVL
+import asyncio
+import random
+import threading
+
+import httpx
+from fastapi.testclient import TestClient
+
+from umanizales_edu.config import settings
+from umanizales_edu.controller import avl_controller
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.service.avl_service import ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL
+from umanizales_edu.service.changefeed import ChangeFeed
+from umanizales_edu.service.concurrency import ShardedRWLock
+from umanizales_edu.service.segments import Segment
 from umanizales_edu.model.schemas import Child, ChildUpdate
 
 def print_tree_structure(node, prefix="", is_tail=True):
@@ -10,7 +23,7 @@ def print_tree_structure(node, prefix="", is_tail=True):
         return
     
     print(prefix + ("└── " if is_tail else "├── ") + 
-          f"Doc:{node.child.documento} (h={node.height}, BF={get_balance_factor(node)})")
+          f"Doc:{node.child.id} (h={node.height}, BF={get_balance_factor(node)})")
     
     if node.left is not None or node.right is not None:
         if node.right is not None:
@@ -44,19 +57,19 @@ def test_avl():
     print("   (En ABB simple esto crearía una lista enlazada, pero AVL se auto-balancea)")
     
     children_data = [
-        Child(documento=1000, nombre="Ana García", edad=7, acudiente="José García", notas="Muy aplicada"),
-        Child(documento=2000, nombre="Luis Martínez", edad=9, acudiente="Carmen Martínez", notas="Buen comportamiento"),
-        Child(documento=3000, nombre="María López", edad=8, acudiente="Pedro López", notas="Excelente en arte"),
-        Child(documento=4000, nombre="Carlos Ruiz", edad=10, acudiente="Ana Ruiz", notas="Buen estudiante"),
-        Child(documento=5000, nombre="Sofia Torres", edad=11, acudiente="Miguel Torres", notas="Líder natural"),
-        Child(documento=6000, nombre="Juan Pérez", edad=12, acudiente="Laura Pérez", notas="Destacado en deportes"),
-        Child(documento=7000, nombre="Pedro Sánchez", edad=13, acudiente="Elena Sánchez", notas="Excelente en matemáticas"),
+        Child(id=1000, name="Ana García", age=7, gender="F"),
+        Child(id=2000, name="Luis Martínez", age=9, gender="M"),
+        Child(id=3000, name="María López", age=8, gender="F"),
+        Child(id=4000, name="Carlos Ruiz", age=10, gender="M"),
+        Child(id=5000, name="Sofia Torres", age=11, gender="F"),
+        Child(id=6000, name="Juan Pérez", age=12, gender="M"),
+        Child(id=7000, name="Pedro Sánchez", age=13, gender="M"),
     ]
     
     for child in children_data:
         success = avl.insert(child)
         balance_status = "✓ Balanceado" if avl.is_balanced() else "✗ DESBALANCEADO"
-        print(f"   Insertado: {child.nombre:20s} (Doc: {child.documento}) - Altura: {avl.get_tree_height()} - {balance_status}")
+        print(f"   Insertado: {child.name:20s} (Doc: {child.id}) - Altura: {avl.height()} - {balance_status}")
     
     # Test 2: Mostrar estructura del árbol
     print("\n2. ESTRUCTURA DEL ÁRBOL AVL (Balanceado):")
@@ -64,13 +77,13 @@ def test_avl():
     
     # Test 3: Verificar balanceo
     print("\n3. VERIFICACIÓN DE BALANCEO:")
-    print(f"   Altura del árbol: {avl.get_tree_height()}")
+    print(f"   Altura del árbol: {avl.height()}")
     print(f"   ¿Está balanceado?: {'SÍ ✓' if avl.is_balanced() else 'NO ✗'}")
     print(f"   Altura óptima para 7 nodos: {3} (log₂(7) ≈ 2.8)")
     
     # Test 4: Intentar insertar duplicado
     print("\n4. INTENTANDO INSERTAR DUPLICADO...")
-    duplicate = Child(documento=4000, nombre="Duplicado", edad=10, acudiente="Test", notas="Test")
+    duplicate = Child(id=4000, name="Duplicado", age=10, gender="M")
     success = avl.insert(duplicate)
     print(f"   {'✗' if not success else '✓'} Documento 4000 - {'Rechazado (duplicado)' if not success else 'Insertado'}")
     
@@ -80,7 +93,7 @@ def test_avl():
     for doc in search_docs:
         child = avl.search(doc)
         if child:
-            print(f"   ✓ Encontrado: {child.nombre} (Doc: {doc})")
+            print(f"   ✓ Encontrado: {child.name} (Doc: {doc})")
         else:
             print(f"   ✗ No encontrado: Documento {doc}")
     
@@ -88,24 +101,24 @@ def test_avl():
     print("\n6. RECORRIDO INORDEN (Ordenado por documento):")
     inorder = avl.inorder_traversal()
     for child in inorder:
-        print(f"   - Doc: {child.documento:5d} | {child.nombre:20s} | Edad: {child.edad:2d}")
+        print(f"   - Doc: {child.id:5d} | {child.name:20s} | Edad: {child.age:2d}")
     
     # Test 7: Recorrido Preorden
     print("\n7. RECORRIDO PREORDEN:")
     preorder = avl.preorder_traversal()
-    print(f"   Documentos: {[c.documento for c in preorder]}")
+    print(f"   Documentos: {[c.id for c in preorder]}")
     
     # Test 8: Recorrido Postorden
     print("\n8. RECORRIDO POSTORDEN:")
     postorder = avl.postorder_traversal()
-    print(f"   Documentos: {[c.documento for c in postorder]}")
+    print(f"   Documentos: {[c.id for c in postorder]}")
     
     # Test 9: Actualizar un niño
     print("\n9. ACTUALIZANDO NIÑO...")
-    update_data = ChildUpdate(nombre="Carlos Ruiz Actualizado", edad=11, notas="Promovido de grado")
+    update_data = ChildUpdate(name="Carlos Ruiz Actualizado", age=11)
     updated = avl.update(4000, update_data)
     if updated:
-        print(f"   ✓ Actualizado: {updated.nombre} (Doc: {updated.documento}, Edad: {updated.edad})")
+        print(f"   ✓ Actualizado: {updated.name} (Doc: {updated.id}, Edad: {updated.age})")
         print(f"   ¿Sigue balanceado?: {'SÍ ✓' if avl.is_balanced() else 'NO ✗'}")
     else:
         print(f"   ✗ No se pudo actualizar")
@@ -116,7 +129,7 @@ def test_avl():
     for doc in delete_docs:
         deleted = avl.delete(doc)
         if deleted:
-            print(f"   ✓ Eliminado: Doc {doc} - Altura: {avl.get_tree_height()} - {'Balanceado ✓' if avl.is_balanced() else 'DESBALANCEADO ✗'}")
+            print(f"   ✓ Eliminado: Doc {doc} - Altura: {avl.height()} - {'Balanceado ✓' if avl.is_balanced() else 'DESBALANCEADO ✗'}")
         else:
             print(f"   ✗ No encontrado: Doc {doc}")
     
@@ -128,12 +141,12 @@ def test_avl():
     print("\n12. LISTA FINAL (Inorden):")
     final_list = avl.inorder_traversal()
     for child in final_list:
-        print(f"   - Doc: {child.documento:5d} | {child.nombre:20s} | Edad: {child.edad:2d}")
+        print(f"   - Doc: {child.id:5d} | {child.name:20s} | Edad: {child.age:2d}")
     
     # Test 13: Estadísticas finales
     print("\n13. ESTADÍSTICAS FINALES:")
     print(f"   Total de niños: {len(final_list)}")
-    print(f"   Altura del árbol: {avl.get_tree_height()}")
+    print(f"   Altura del árbol: {avl.height()}")
     print(f"   ¿Está balanceado?: {'SÍ ✓' if avl.is_balanced() else 'NO ✗'}")
     print(f"   Altura óptima para {len(final_list)} nodos: ≈ {len(final_list).bit_length()}")
     
@@ -144,9 +157,9 @@ def test_avl():
     # Caso LR (Left-Right)
     print("\n   Caso LR (Left-Right Rotation):")
     print("   Insertando: 5000, 2000, 3000 (requiere rotación LR)")
-    avl2.insert(Child(documento=5000, nombre="Test1", edad=10, acudiente="Test", notas=""))
-    avl2.insert(Child(documento=2000, nombre="Test2", edad=10, acudiente="Test", notas=""))
-    avl2.insert(Child(documento=3000, nombre="Test3", edad=10, acudiente="Test", notas=""))
+    avl2.insert(Child(id=5000, name="Test1", age=10, gender="M"))
+    avl2.insert(Child(id=2000, name="Test2", age=10, gender="M"))
+    avl2.insert(Child(id=3000, name="Test3", age=10, gender="M"))
     print_tree_structure(avl2.root)
     print(f"   ¿Balanceado?: {'SÍ ✓' if avl2.is_balanced() else 'NO ✗'}")
     
@@ -154,9 +167,9 @@ def test_avl():
     avl3 = ChildrenAVL()
     print("\n   Caso RL (Right-Left Rotation):")
     print("   Insertando: 2000, 5000, 3000 (requiere rotación RL)")
-    avl3.insert(Child(documento=2000, nombre="Test1", edad=10, acudiente="Test", notas=""))
-    avl3.insert(Child(documento=5000, nombre="Test2", edad=10, acudiente="Test", notas=""))
-    avl3.insert(Child(documento=3000, nombre="Test3", edad=10, acudiente="Test", notas=""))
+    avl3.insert(Child(id=2000, name="Test1", age=10, gender="M"))
+    avl3.insert(Child(id=5000, name="Test2", age=10, gender="M"))
+    avl3.insert(Child(id=3000, name="Test3", age=10, gender="M"))
     print_tree_structure(avl3.root)
     print(f"   ¿Balanceado?: {'SÍ ✓' if avl3.is_balanced() else 'NO ✗'}")
     
@@ -165,5 +178,213 @@ def test_avl():
     print("El árbol AVL mantiene el balanceo en todas las operaciones")
     print("=" * 70)
 
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def test_sharded_avl_routes_by_id_and_merges_inorder():
+    rng = random.Random(11)
+    store = ShardedChildrenAVL(4)
+    single = ChildrenAVL()
+    ids = list(range(1, 801))
+    rng.shuffle(ids)
+    for i in ids:
+        assert store.insert(make_child(i, i % 19))
+        single.insert(make_child(i, i % 19))
+    assert not store.insert(make_child(5, 1))
+    assert all(shard.size == 200 for shard in store.shards)
+    
+    for i in ids[:300]:
+        assert store.delete(i)
+        assert single.delete(i)
+    assert not store.delete(ids[0])
+    assert store.update(ids[300], ChildUpdate(age=1)).age == 1
+    
+    assert store.size == store.count_nodes() == single.size == single.count_nodes() == 500
+    assert store.is_balanced() and single.is_balanced()
+    assert [c.id for c in store.iter_inorder()] == [c.id for c in single.iter_inorder()] == sorted(ids[300:])
+    assert store.version == 800 + 300 + 1
+    assert store.partitions() == store.shards and single.partitions() == [single]
+    
+    # La actualización reemplaza al niño: un recorrido anterior conserva la versión vieja
+    listed = store.search(ids[301])
+    updated = store.update(ids[301], ChildUpdate(age=18, name="Otro"))
+    assert updated is store.search(ids[301]) and updated is not listed
+    assert (listed.age, listed.name) == (ids[301] % 19, f"Niño {ids[301]}")
+    assert (updated.age, updated.name, updated.gender) == (18, "Otro", listed.gender)
+
+
+def test_sharded_avl_load_sorted_and_swap_keep_given_version():
+    store = ShardedChildrenAVL(4)
+    store.insert(make_child(1, 1))
+    store.load_sorted([make_child(i, i % 19) for i in range(1, 101)], 500)
+    assert store.version == 500
+    assert all(shard.version == 500 for shard in store.shards)
+    store.load_sorted([make_child(i, i % 19) for i in range(1, 51)])
+    assert store.version > 500
+    
+    replica = ShardedChildrenAVL(4)
+    replica.swap(store)
+    assert replica.version == store.version and replica.size == 50
+    assert replica.update(7, ChildUpdate(age=3)).age == 3
+    assert replica.version == store.version
+
+
+def test_avl_join_based_set_operations_match_python_sets():
+    rng = random.Random(3)
+    for _ in range(50):
+        ids_a = set(rng.sample(range(1, 500), rng.randint(0, 120)))
+        ids_b = set(rng.sample(range(1, 500), rng.randint(0, 120)))
+        a, b = ChildrenAVL(), ChildrenAVL()
+        for i in ids_a:
+            a.insert(make_child(i, 1))
+        for i in ids_b:
+            b.insert(make_child(i, 2))
+        
+        for result, expected in ((a.union(b), ids_a | ids_b), (a.intersection(b), ids_a & ids_b),
+                                 (a.difference(b), ids_a - ids_b)):
+            assert [c.id for c in result.iter_inorder()] == sorted(expected)
+            assert result.size == result.count_nodes() == len(expected)
+            assert result.is_balanced()
+        assert all(c.age == 1 for c in a.union(b).iter_inorder() if c.id in ids_a)
+        
+        pivot = rng.randint(1, 500)
+        left, found, right = a.split(pivot)
+        assert [c.id for c in left.iter_inorder()] == sorted(i for i in ids_a if i < pivot)
+        assert [c.id for c in right.iter_inorder()] == sorted(i for i in ids_a if i > pivot)
+        assert (found is not None) == (pivot in ids_a)
+        
+        # Los operandos no se modifican
+        assert [c.id for c in a.iter_inorder()] == sorted(ids_a)
+        assert a.is_balanced() and b.is_balanced()
+
+
+def test_reconcile_reports_added_removed_and_changed():
+    roster = [make_child(2, 2), make_child(3, 7), make_child(9, 1)]
+    for engine in (ChildrenAVL(), ShardedChildrenAVL(2)):
+        for i in range(1, 5):
+            engine.insert(make_child(i, i))
+        assert engine.reconcile(roster) == ([9], [1, 4], [3])
+
+
+def test_reconcile_endpoint_diffs_the_store_and_rejects_duplicate_ids(monkeypatch):
+    store = ChildrenAVL()
+    for i in range(1, 5):
+        store.insert(make_child(i, i))
+    monkeypatch.setattr(avl_controller, "children_avl", store)
+    client = TestClient(avl_app)
+    roster = [make_child(9, 1), make_child(3, 7), make_child(2, 2)]
+    
+    response = client.post("/children/avl/reconcile", json=[child.model_dump() for child in roster])
+    assert response.status_code == 200 and response.headers["content-type"] == "application/json"
+    assert response.json() == {"added": [9], "removed": [1, 4], "changed": [3], "unchanged": 1}
+    assert store.version == 4 and store.size == 4  # el árbol no se modifica
+    
+    duplicated = client.post("/children/avl/reconcile", json=[child.model_dump() for child in roster + [make_child(3, 1)]])
+    assert duplicated.status_code == 400 and duplicated.json()["detail"] == "Duplicate child ID 3 in roster"
+
+
+def test_bulk_insert_merges_batch_and_skips_existing_ids():
+    for engine in (ChildrenAVL(), ShardedChildrenAVL(3)):
+        for i in range(1, 200, 2):
+            engine.insert(make_child(i, 1))
+        version = engine.version
+        
+        inserted = engine.bulk_insert([make_child(i, 2) for i in range(100, 300)])
+        assert [c.id for c in inserted] == [i for i in range(100, 300) if i >= 200 or i % 2 == 0]
+        assert [c.id for c in engine.iter_inorder()] == sorted(set(range(1, 200, 2)) | set(range(100, 300)))
+        assert engine.search(101).age == 1  # los ids existentes conservan sus datos
+        assert engine.version > version
+        assert engine.size == engine.count_nodes() and engine.is_balanced()
+        
+        # El árbol resultante sigue aceptando modificaciones en el lugar
+        assert engine.delete(150) and engine.insert(make_child(1000, 3))
+        assert engine.is_balanced()
+
+
+def test_tiered_store_spills_faults_in_and_compacts(tmp_path):
+    rng = random.Random(9)
+    tiered = TieredChildrenAVL(40, directory=str(tmp_path), max_segments=3)
+    expected = {}
+    for _ in range(4000):
+        op, id = rng.random(), rng.randint(1, 300)
+        if op < 0.4:
+            assert tiered.insert(make_child(id, rng.randint(0, 18))) == (id not in expected)
+            expected.setdefault(id, tiered.search(id).model_copy())
+        elif op < 0.6:
+            assert tiered.search(id) == expected.get(id)
+        elif op < 0.75:
+            updated = tiered.update(id, ChildUpdate(age=rng.randint(0, 18)))
+            assert (updated is None) == (id not in expected)
+            if updated is not None:
+                expected[id] = updated.model_copy()
+        else:
+            assert tiered.delete(id) == (id in expected)
+            expected.pop(id, None)
+        # Las lecturas no desalojan: lo hace evict() después
+        if tiered.eviction_pending:
+            asyncio.run(tiered.evict())
+        assert tiered.hot.size <= 40 and tiered.size == len(expected)
+    tiered.wait_for_compaction()
+    
+    stats = tiered.tier_stats()
+    assert stats["faults"] and stats["evictions"] and stats["compactions"]
+    assert stats["segments"] <= 4 and len(list(tmp_path.iterdir())) == stats["segments"]
+    assert list(tiered.iter_inorder()) == [expected[id] for id in sorted(expected)]
+    assert sorted(c.id for c in tiered.iter_postorder()) == sorted(expected)
+    
+    # Los filtros de Bloom descartan casi todos los ids ausentes sin leer el disco
+    tiered.load_sorted([make_child(id, id % 19) for id in range(2, 20001, 2)])
+    reads = tiered.disk_reads
+    assert all(tiered.search(id) is None for id in range(1, 20001, 2))
+    assert tiered.disk_reads - reads < 10000 * 0.03
+    assert tiered.search(5000) == make_child(5000, 5000 % 19) and tiered.hot.size == 1
+
+
+
+def test_tiered_reads_defer_eviction_to_a_background_task(tmp_path, monkeypatch):
+    writers = []
+    write = Segment.write.__func__
+    
+    def tracked_write(cls, *args, **kwargs):
+        writers.append(threading.current_thread())
+        return write(cls, *args, **kwargs)
+    
+    tiered = TieredChildrenAVL(4, directory=str(tmp_path))
+    tiered.load_sorted([make_child(id, id % 19) for id in range(1, 101)])
+    monkeypatch.setattr(Segment, "write", classmethod(tracked_write))
+    
+    # En la tienda: buscar ids fríos solo los sube a memoria
+    for id in range(1, 7):
+        assert tiered.search(id) == make_child(id, id % 19)
+    assert tiered.hot.size == 6 and tiered.eviction_pending
+    assert len(tiered._segments) == 1 and not writers
+    asyncio.run(tiered.evict())
+    assert tiered.hot.size == tiered._keep and not tiered.eviction_pending
+    assert len(tiered._segments) == 2 and writers[0] is not threading.main_thread()
+    assert [tiered.search(id).id for id in range(1, 7)] == list(range(1, 7))
+    
+    # Por HTTP: el GET responde sin escribir el segmento; la tarea de fondo desaloja después
+    monkeypatch.setattr(settings, "tiered_hot_capacity", 4)
+    monkeypatch.setattr(avl_controller, "children_avl", tiered)
+    monkeypatch.setattr(avl_controller, "engine_lock", ShardedRWLock(1))
+    monkeypatch.setattr(avl_controller, "change_feed", ChangeFeed(100))
+    monkeypatch.setitem(avl_controller.evictions, "task", None)
+    writers.clear()
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=avl_app), base_url="http://test") as client:
+            responses = [await client.get(f"/children/avl/{id}") for id in range(50, 56)]
+            assert avl_controller.evictions["task"] is not None
+            await avl_controller.evictions["task"]
+            return responses
+    
+    responses = asyncio.run(scenario())
+    assert [response.json()["id"] for response in responses] == list(range(50, 56))
+    assert writers and all(thread is not threading.main_thread() for thread in writers)
+    assert tiered.hot.size <= 4 and tiered.size == 100
+    assert [c.id for c in tiered.iter_inorder()] == list(range(1, 101))
+
+
 if __name__ == "__main__":
     test_avl()
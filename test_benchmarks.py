@@ -0,0 +1,88 @@
+"""
+Pruebas de la suite de benchmarks de motores y del generador de carga ASGI
+"""
+import argparse
+import asyncio
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from benchmarks.bench_engines import DISTRIBUTIONS, compare, run_suite
+from benchmarks.load_asgi import Workload, asgi_request, parse_mix, percentile, run_http
+from umanizales_edu.main_abb import app as abb_app
+
+
+def test_distributions_are_seeded_and_valid():
+    for name, distribution in DISTRIBUTIONS.items():
+        rows = distribution(500, random.Random(4))
+        assert rows == distribution(500, random.Random(4))
+        assert len({child_id for child_id, _ in rows}) == 500
+        assert all(child_id > 0 and 0 <= age <= 18 for child_id, age in rows)
+    assert [age for _, age in DISTRIBUTIONS["sequential"](500, None)] == sorted(
+        age for _, age in DISTRIBUTIONS["sequential"](500, None))
+
+
+def test_suite_measures_every_operation_and_flags_regressions():
+    report = run_suite(["bst", "avl"], ["sequential", "random"], [200], ops=50, seed=1, repeat=2, plain_bst_max=100)
+    cases = Counter((row["engine"], row["distribution"]) for row in report["results"])
+    # El ABB simple se omite donde degenera por encima de plain_bst_max
+    assert set(cases) == {("bst", "random"), ("avl", "sequential"), ("avl", "random")}
+    assert all(count == 8 for count in cases.values())
+    assert report["skipped"] == [{"engine": "bst", "distribution": "sequential", "size": 200,
+                                  "reason": "ABB simple degenerado; tamaño mayor que --plain-bst-max=100"}]
+    assert report["meta"]["seed"] == 1
+
+    assert compare(report, report, 0.25) == []
+    slower = {"results": [dict(row, us_per_op=row["us_per_op"] * 2) for row in report["results"]]}
+    regressions = compare(slower, report, 0.25)
+    assert len(regressions) == len(report["results"])
+    assert all(regression["ratio"] == pytest.approx(2) for regression in regressions)
+    assert compare(slower, report, 1.5) == []
+
+
+def test_load_workload_mix_and_percentiles():
+    workload = Workload(parse_mix("get=2,update=1,delete=2,create=1"), preload=3, seed=2)
+    live = {1, 2, 3}
+    seen = set()
+    for _ in range(300):
+        operation, child_id, payload = workload.next_operation()
+        seen.add(operation)
+        if operation == "create":
+            assert child_id not in live and payload["id"] == child_id
+            live.add(child_id)
+        elif operation == "delete":
+            live.remove(child_id)
+        else:
+            assert child_id in live
+        # Sin ids vivos, las lecturas y eliminaciones pasan a ser creaciones
+        assert set(workload.live_ids) == live
+    assert seen == {"get", "update", "delete", "create"}
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("get=1,scan=2")
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_mix("get=0")
+
+    values = [float(i) for i in range(1, 101)]
+    assert [percentile(values, f) for f in (0.0, 0.5, 0.95, 0.99, 1.0)] == [1.0, 50.0, 95.0, 99.0, 100.0]
+    assert percentile([3.0], 0.99) == 3.0 and percentile([], 0.5) == 0.0
+
+
+def test_load_harness_drives_the_asgi_app():
+    async def scenario():
+        # Sin carga previa el generador crea sus niños por HTTP, con ids que no usan las demás pruebas
+        workload = Workload(parse_mix("get=4,create=2,update=1,delete=1,list=1"), preload=0, seed=5)
+        workload.next_id = 940001
+        report = await run_http(abb_app, "/children/bst", workload, total=300, concurrency=8, list_order="in")
+        status, body = await asgi_request(abb_app, "GET", "/children/bst/stats/tree")
+        return report, status, body
+
+    report, status, body = asyncio.run(scenario())
+    endpoints = report["endpoints"]
+    assert sum(row["count"] for row in endpoints.values()) == 300
+    assert all(row["errors"] == 0 for row in endpoints.values())
+    assert {"POST /children/bst/", "GET /children/bst/{id}", "GET /children/bst/?order=in"} <= set(endpoints)
+    assert all(row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"] for row in endpoints.values())
+    assert status == 200 and json.loads(body)["total_nodes"] >= 0
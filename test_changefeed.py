@@ -0,0 +1,134 @@
+"""
+Pruebas del registro de cambios
+"""
+import asyncio
+import json
+
+import httpx
+from fastapi.testclient import TestClient
+
+from umanizales_edu.config import settings
+from umanizales_edu.controller import avl_controller
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.service.changefeed import ChangeFeed
+from umanizales_edu.service.concurrency import ShardedRWLock
+from umanizales_edu.model.schemas import Child
+
+
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def test_change_feed_sequences_and_resync():
+    feed = ChangeFeed(capacity=3)
+    child = make_child(1, 5)
+    assert feed.since(0) == []
+    feed.publish("insert", 1, child)
+    child.age = 6  # el evento conserva el estado al momento de publicarse
+    feed.publish("update", 1, child)
+    assert [seq for seq, _, _ in feed.since(0)] == [1, 2]
+    assert b'"age":5' in feed.since(0)[0][2]
+    
+    for _ in range(3):
+        feed.publish("delete", 1, None)
+    assert feed.last_seq == 5
+    assert feed.since(2) is not None and [seq for seq, _, _ in feed.since(2)] == [3, 4, 5]
+    assert feed.since(1) is None  # el evento 2 ya salió del buffer
+    assert feed.since(9) is None  # secuencia de otro proceso (p. ej. antes de un reinicio)
+    assert feed.since(5) == []
+
+
+def use_fresh_engine(monkeypatch, ids=range(1, 4), capacity=100) -> ChangeFeed:
+    """Árbol, candado y registro de cambios propios para la app AVL de la prueba"""
+    tree = ChildrenAVL()
+    tree.load_sorted([make_child(i, i % 19) for i in ids])
+    feed = ChangeFeed(capacity)
+    monkeypatch.setattr(avl_controller, "children_avl", tree)
+    monkeypatch.setattr(avl_controller, "engine_lock", ShardedRWLock(1))
+    monkeypatch.setattr(avl_controller, "change_feed", feed)
+    return feed
+
+
+def test_changes_long_poll_times_out_wakes_on_write_and_asks_resync(monkeypatch):
+    use_fresh_engine(monkeypatch)
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=avl_app), base_url="http://test") as client:
+            idle = await client.get("/children/avl/changes", params={"since": 0, "timeout": 0.05})
+            poll = asyncio.ensure_future(client.get("/children/avl/changes", params={"since": 0, "timeout": 5}))
+            await asyncio.sleep(0.05)
+            assert not poll.done()
+            await client.put("/children/avl/2", json={"age": 9})
+            woken = await poll
+            gone = await client.get("/children/avl/changes", params={"since": 5, "timeout": 0})
+            return idle, woken, gone
+    
+    idle, woken, gone = asyncio.run(scenario())
+    assert idle.status_code == 200 and idle.json() == {"events": [], "last_seq": 0}
+    assert woken.status_code == 200 and woken.json()["last_seq"] == 1
+    [event] = woken.json()["events"]
+    assert (event["seq"], event["op"], event["id"], event["child"]["age"]) == (1, "update", 2, 9)
+    assert gone.status_code == 410
+    assert gone.json() == {
+        "detail": "Changes after seq 5 are no longer available; resync with a full listing",
+        "resync_required": True,
+        "last_seq": 1,
+    }
+
+
+def test_change_stream_frames_events_keepalives_and_resync(monkeypatch):
+    feed = use_fresh_engine(monkeypatch)
+    monkeypatch.setattr(settings, "change_feed_keepalive", 0.02)
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=avl_app), base_url="http://test") as client:
+            await client.put("/children/avl/1", json={"age": 5})
+            await client.delete("/children/avl/3")
+            streams = [
+                asyncio.ensure_future(client.get("/children/avl/changes/stream", params={"since": 0})),
+                asyncio.ensure_future(client.get("/children/avl/changes/stream", headers={"Last-Event-ID": "1"})),
+            ]
+            await asyncio.sleep(0.1)
+            # Vaciar el registro deja a ambos consumidores atrás: reciben resync y el flujo termina
+            feed.invalidate()
+            return await asyncio.gather(*streams)
+    
+    first, resumed = asyncio.run(scenario())
+    assert first.headers["content-type"].startswith("text/event-stream")
+    assert first.headers["cache-control"] == "no-cache"
+    frames = first.text.split("\n\n")
+    assert frames[0].splitlines()[:2] == ["id: 1", "event: update"]
+    assert json.loads(frames[0].splitlines()[2].removeprefix("data: "))["child"]["age"] == 5
+    assert frames[1].splitlines() == ["id: 2", "event: delete", 'data: {"seq":2,"op":"delete","id":3,"child":null}']
+    assert ": keepalive" in frames[2:-2]
+    assert frames[-2:] == ['event: resync\ndata: {"resync_required":true,"last_seq":3}', ""]
+    assert resumed.text.startswith("id: 2\nevent: delete\n")
+
+
+def test_listing_change_seq_and_resync_after_large_import(monkeypatch):
+    feed = use_fresh_engine(monkeypatch, capacity=2)
+    monkeypatch.setattr(settings, "change_feed_capacity", 2)
+    monkeypatch.setattr(avl_controller, "import_executor", None)
+    client = TestClient(avl_app)
+    
+    assert client.get("/children/avl/").headers["x-change-seq"] == "0"
+    client.put("/children/avl/1", json={"age": 6})
+    assert client.get("/children/avl/").headers["x-change-seq"] == "1"
+    
+    # Un lote mayor que el buffer no se publica evento por evento: se invalida el registro
+    csv_data = b"id,age,name,gender\n10,1,Ana,F\n11,2,Bob,M\n12,3,Eva,F\n"
+    report = client.post("/children/avl/import", params={"format": "csv"}, content=csv_data,
+                         headers={"Content-Type": "text/csv"})
+    assert report.json()["imported"] == 3
+    assert feed.last_seq == 2
+    gone = client.get("/children/avl/changes", params={"since": 1, "timeout": 0})
+    assert gone.status_code == 410 and gone.json()["last_seq"] == 2
+    listing = client.get("/children/avl/")
+    assert listing.headers["x-change-seq"] == "2" and len(listing.json()) == 6
+    
+    # Un lote pequeño sí se publica
+    client.post("/children/avl/import", content=b'{"id": 13, "age": 4, "name": "Paz", "gender": "F"}\n',
+                headers={"Content-Type": "application/x-ndjson"})
+    page = client.get("/children/avl/changes", params={"since": 2, "timeout": 0}).json()
+    assert [(event["op"], event["id"]) for event in page["events"]] == [("insert", 13)] and page["last_seq"] == 3
@@ -0,0 +1,246 @@
+"""
+Pruebas de las primitivas de concurrencia de los controladores
+"""
+import asyncio
+import json
+
+import httpx
+
+from umanizales_edu.controller import avl_controller
+from umanizales_edu.controller.abb_controller import change_feed
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.model.schemas import Child
+from umanizales_edu.service.avl_service import ShardedChildrenAVL
+from umanizales_edu.service.changefeed import ChangeFeed
+from umanizales_edu.service.concurrency import AsyncRWLock, ShardedRWLock, SingleFlight
+
+
+def make_child(id: int, age: int) -> dict:
+    return {"id": id, "age": age, "name": f"Niño {id}", "gender": "M"}
+
+
+def test_single_flight_coalesces_identical_concurrent_reads():
+    flight = SingleFlight("test")
+    calls = []
+    
+    async def compute(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        if key == "boom":
+            raise ValueError("boom")
+        return object()
+    
+    async def scenario():
+        waiters = [asyncio.ensure_future(flight.do(("in", 1), lambda: compute("in"))) for _ in range(20)]
+        other = asyncio.ensure_future(flight.do(("in", 2), lambda: compute("in")))
+        await asyncio.sleep(0)
+        waiters[0].cancel()  # un cliente que se desconecta no cancela el cálculo de los demás
+        results = await asyncio.gather(*waiters[1:])
+        assert all(result is results[0] for result in results)
+        assert await other is not results[0]
+        assert flight.in_flight == 0
+        assert await flight.do(("in", 1), lambda: compute("in")) is not results[0]
+        
+        failures = await asyncio.gather(*[flight.do("boom", lambda: compute("boom")) for _ in range(3)],
+                                        return_exceptions=True)
+        assert all(isinstance(failure, ValueError) for failure in failures)
+    
+    asyncio.run(scenario())
+    assert calls == ["in", "in", "in", "boom"]
+
+
+def test_rw_lock_runs_readers_together_and_gives_writers_priority():
+    lock = AsyncRWLock()
+    log = []
+    
+    async def reader(name, hold):
+        async with lock.read():
+            log.append(("start", name))
+            await asyncio.sleep(hold)
+            log.append(("end", name))
+    
+    async def writer(name):
+        async with lock.write():
+            log.append(("start", name))
+            await asyncio.sleep(0.01)
+            log.append(("end", name))
+    
+    async def scenario():
+        first = [asyncio.ensure_future(reader(f"r{i}", 0.05)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        pending_writer = asyncio.ensure_future(writer("w"))
+        await asyncio.sleep(0.01)
+        late = asyncio.ensure_future(reader("late", 0.01))
+        await asyncio.gather(*first, pending_writer, late)
+    
+    asyncio.run(scenario())
+    # Los tres lectores iniciales se solapan
+    assert [event for event, _ in log[:3]] == ["start"] * 3
+    # El lector que llega con un escritor en espera pasa después del escritor
+    assert log[-4:] == [("start", "w"), ("end", "w"), ("start", "late"), ("end", "late")]
+
+
+def test_rw_lock_write_timeout_releases_held_readers():
+    lock = AsyncRWLock()
+    
+    async def scenario():
+        release = asyncio.Event()
+        
+        async def long_reader():
+            async with lock.read():
+                await release.wait()
+        
+        holder = asyncio.ensure_future(long_reader())
+        await asyncio.sleep(0)
+        writer = asyncio.ensure_future(lock.acquire_write(timeout=0.05))
+        await asyncio.sleep(0)
+        held = asyncio.ensure_future(asyncio.wait_for(lock.read().__aenter__(), 1))
+        assert await writer is False
+        await held  # el lector retenido por el escritor entra al rendirse este
+        release.set()
+        await holder
+    
+    asyncio.run(scenario())
+
+
+def test_rw_lock_writes_are_not_lost_and_lock_moves_between_loops():
+    lock = AsyncRWLock()
+    state = {"counter": 0, "snapshots": []}
+    
+    async def increment():
+        async with lock.write():
+            value = state["counter"]
+            await asyncio.sleep(0)  # cede el control a mitad de la escritura
+            state["counter"] = value + 1
+    
+    async def snapshot():
+        async with lock.read():
+            before = state["counter"]
+            await asyncio.sleep(0)
+            state["snapshots"].append((before, state["counter"]))
+    
+    async def scenario():
+        await asyncio.gather(*[increment() for _ in range(200)], *[snapshot() for _ in range(50)])
+    
+    # Cada asyncio.run (como cada TestClient) usa un event loop nuevo
+    asyncio.run(scenario())
+    asyncio.run(scenario())
+    assert state["counter"] == 400
+    assert all(before == after for before, after in state["snapshots"])
+
+
+def test_concurrent_writes_and_listings_through_the_api():
+    ids = range(960001, 960401)
+    
+    def ours(children):
+        return {child["id"]: child["age"] for child in children if child["id"] in ids}
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=abb_app), base_url="http://test") as client:
+            created = await asyncio.gather(*[client.post("/children/bst/", json=make_child(i, i % 19)) for i in ids[:300]])
+            assert all(response.status_code == 201 for response in created)
+            start = change_feed.last_seq
+            
+            writes = [client.put(f"/children/bst/{i}", json={"age": (i + 7) % 19}) for i in ids[:200]]
+            writes += [client.delete(f"/children/bst/{i}") for i in ids[200:300]]
+            writes += [client.post("/children/bst/", json=make_child(i, i % 19)) for i in ids[300:]]
+            reads = [client.get("/children/bst/", params={"order": "in"}) for _ in range(30)]
+            results = await asyncio.gather(*writes, *reads)
+            final = await client.get("/children/bst/")
+            return start, results[:len(writes)], results[len(writes):], final
+    
+    start, writes, listings, final = asyncio.run(scenario())
+    assert all(response.status_code in (200, 201) for response in writes)
+    
+    # Estado esperado tras cada evento del registro: un listado debe coincidir
+    # exactamente con el estado en la secuencia que anuncia
+    state = {i: i % 19 for i in ids[:300]}
+    states = {start: dict(state)}
+    for seq, _, payload in change_feed.since(start):
+        event = json.loads(payload)
+        if event["id"] in ids:
+            if event["op"] == "delete":
+                del state[event["id"]]
+            else:
+                state[event["id"]] = event["child"]["age"]
+        states[seq] = dict(state)
+    
+    for listing in listings + [final]:
+        assert listing.status_code == 200
+        children = listing.json()
+        assert [child["age"] for child in children] == sorted(child["age"] for child in children)
+        assert ours(children) == states[int(listing.headers["x-change-seq"])]
+    expected = {i: (i + 7) % 19 for i in ids[:200]} | {i: i % 19 for i in ids[300:]}
+    assert ours(final.json()) == expected
+
+
+def test_sharded_lock_lets_writes_into_shards_the_reader_released():
+    lock = ShardedRWLock(3)
+    log = []
+    
+    async def listing():
+        async with lock.read() as release:
+            for index in range(3):
+                await asyncio.sleep(0.02)
+                log.append(f"read {index}")
+                await release(index)
+        log.append("listing done")
+    
+    async def write(id):
+        async with lock.shard(id).write():
+            log.append(f"write {id % 3}")
+    
+    async def bulk():
+        async with lock.write():
+            log.append("bulk")
+    
+    async def scenario():
+        reader = asyncio.ensure_future(listing())
+        await asyncio.sleep(0.01)
+        await asyncio.gather(reader, write(3), write(5), bulk())
+    
+    asyncio.run(scenario())
+    # Cada escritura puntual espera solo a que el recorrido suelte su fragmento;
+    # la escritura masiva espera a todos
+    assert log == ["read 0", "write 0", "read 1", "read 2", "listing done", "write 2", "bulk"]
+
+
+def test_sharded_avl_listings_stay_consistent_under_concurrent_writes(monkeypatch):
+    store = ShardedChildrenAVL(4)
+    store.load_sorted([Child(id=i, age=i % 19, name=f"Niño {i}", gender="M") for i in range(1, 8001)])
+    feed = ChangeFeed(10000)
+    monkeypatch.setattr(avl_controller, "children_avl", store)
+    monkeypatch.setattr(avl_controller, "engine_lock", ShardedRWLock(4))
+    monkeypatch.setattr(avl_controller, "change_feed", feed)
+    done = []
+    
+    async def tracked(name, request):
+        response = await request
+        done.append(name)
+        return response
+    
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=avl_app), base_url="http://test") as client:
+            listings = [tracked("list", client.get("/children/avl/", params={"order": order}))
+                        for order in ("in", "pre", "post")]
+            writes = [tracked("write", client.put(f"/children/avl/{i}", json={"age": (i + 5) % 19}))
+                      for i in range(4, 8001, 40)]
+            return await asyncio.gather(*listings, *writes)
+    
+    responses = asyncio.run(scenario())
+    listings, writes = responses[:3], responses[3:]
+    assert all(response.status_code == 200 for response in responses)
+    # Escrituras en fragmentos ya recorridos terminan antes que los listados
+    assert done.index("write") < done.index("list")
+    
+    state = {i: i % 19 for i in range(1, 8001)}
+    states = {0: dict(state)}
+    for seq, _, payload in feed.since(0):
+        event = json.loads(payload)
+        state[event["id"]] = event["child"]["age"]
+        states[seq] = dict(state)
+    for listing in listings:
+        children = listing.json()
+        assert {child["id"]: child["age"] for child in children} == states[int(listing.headers["x-change-seq"])]
+    assert [child["id"] for child in listings[0].json()] == list(range(1, 8001))
@@ -0,0 +1,24 @@
+"""
+Pruebas del generador de datos sintéticos
+"""
+from umanizales_edu.generator import encode, generate_rows, populate
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.model.schemas import Child
+
+
+def test_generator_is_seeded_valid_and_loads_engines():
+    for ids in ("sequential", "random", "clustered"):
+        for ages in ("uniform", "skewed", "normal", "increasing"):
+            rows = [row for chunk in generate_rows(12000, ids, ages, seed=3) for row in chunk]
+            assert rows == [row for chunk in generate_rows(12000, ids, ages, seed=3) for row in chunk]
+            assert len({row[0] for row in rows}) == 12000
+            children = [Child.model_validate_json(line) for line in encode(rows, "ndjson").splitlines()]
+            assert [(c.id, c.age, c.name, c.gender) for c in children] == rows
+    assert [row[0] for row in next(generate_rows(5, "sequential"))] == [1, 2, 3, 4, 5]
+    assert next(generate_rows(50, seed=1)) != next(generate_rows(50, seed=2))
+    
+    avl, bst = ChildrenAVL(), ChildrenBST(self_rebuilding=True)
+    assert populate(avl, 5000, ids="clustered") == populate(bst, 5000, ids="clustered") == 5000
+    assert avl.is_balanced() and bst.is_valid()
+    assert [c.id for c in avl.iter_inorder()] == sorted(c.id for c in bst.iter_inorder())
@@ -0,0 +1,172 @@
+"""
+Pruebas de la importación y exportación en streaming
+"""
+import asyncio
+import ast
+import io
+import json
+import zipfile
+from array import array
+
+import httpx
+from fastapi.testclient import TestClient
+
+from umanizales_edu.controller import abb_controller, avl_controller, export
+from umanizales_edu.controller.export import EXPORTS, columnar_stream, ndjson_stream
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.service.bulk_import import validate_stream
+from umanizales_edu.service.changefeed import ChangeFeed
+from umanizales_edu.service.concurrency import AsyncRWLock, ShardedRWLock
+from umanizales_edu.model.schemas import Child
+
+
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def test_validate_stream_collects_row_errors_and_dedupes():
+    async def blocks(data: bytes):
+        for start in range(0, len(data), 7):  # bloques que cortan las líneas
+            yield data[start:start + 7]
+    
+    csv_data = b"name,id,age,gender\r\nAna,3,4,F\r\nBob,1,40,M\r\n\r\n\"Paz, Eva\",2,5,F\r\nDup,3,9,M\r\nx,y\r\n"
+    result = asyncio.run(validate_stream(blocks(csv_data), "csv", None, chunk_rows=2))
+    assert [(c.id, c.name) for c in result.children] == [(2, "Paz, Eva"), (3, "Ana")]
+    assert (result.rows, result.duplicates, result.failed) == (5, 1, 2)
+    assert [row for row, _ in result.errors] == [3, 7]
+    
+    ndjson = b'{"id": 1, "age": 2, "name": "A", "gender": "M"}\nnot json\n{"id": 2, "age": 3, "name": "B", "gender": "F"}'
+    result = asyncio.run(validate_stream(blocks(ndjson), "ndjson", None, max_errors=0))
+    assert [c.id for c in result.children] == [1, 2]
+    assert (result.failed, result.errors) == (1, [])
+
+
+def test_export_streams_ndjson_and_npy_columns():
+    tree = ChildrenAVL()
+    tree.load_sorted([Child(id=i, age=i % 19, name=f'Ñandú "{i}"}},{{"id":', gender=("M", "F", "Otro")[i % 3])
+                      for i in range(1, 26)])
+    
+    async def read(stream):
+        return b"".join([block async for block in stream])
+    
+    lines = asyncio.run(read(ndjson_stream(tree.iter_inorder, chunk_size=7))).splitlines()
+    assert [Child.model_validate_json(line) for line in lines] == tree.inorder_traversal()
+    
+    archive = zipfile.ZipFile(io.BytesIO(asyncio.run(read(columnar_stream(tree.iter_inorder, lambda: tree.size, 7)))))
+    
+    def column(name, typecode):
+        data = archive.read(f"{name}.npy")
+        header_len = int.from_bytes(data[8:10], "little")
+        header = ast.literal_eval(data[10:10 + header_len].decode("latin1"))
+        assert (10 + header_len) % 64 == 0
+        values = array(typecode, data[10 + header_len:])
+        assert header["shape"] == (len(values),)
+        return values
+    
+    assert list(column("id", "q")) == list(range(1, 26))
+    assert list(column("age", "B")) == [i % 19 for i in range(1, 26)]
+    assert list(column("gender", "b")) == [i % 3 for i in range(1, 26)]
+    offsets, data = column("name_offsets", "q"), column("name_data", "B").tobytes()
+    names = [data[start:end].decode() for start, end in zip(offsets, offsets[1:])]
+    assert names == [child.name for child in tree.iter_inorder()]
+
+
+def test_import_endpoint_reports_rows_and_rejects_bad_headers(monkeypatch):
+    monkeypatch.setattr(avl_controller, "import_executor", None)  # validar en el proceso de la prueba
+    client = TestClient(avl_app)
+    
+    bad = client.post("/children/avl/import", params={"format": "csv"}, content=b"id,name\n990001,Ana\n",
+                      headers={"Content-Type": "text/csv"})
+    assert bad.status_code == 400 and "CSV header" in bad.json()["detail"]
+    assert client.get("/children/avl/990001").status_code == 404
+    
+    csv_data = b"id,age,name,gender\n990001,4,Ana,F\n990002,40,Bob,M\n990001,5,Dup,F\n"
+    ndjson = b'{"id": 990003, "age": 7, "name": "Eva", "gender": "F"}\nnot json\n'
+    try:
+        report = client.post("/children/avl/import", params={"format": "csv"}, content=csv_data,
+                             headers={"Content-Type": "text/csv"})
+        assert report.status_code == 200 and report.headers["content-type"] == "application/json"
+        assert {key: report.json()[key] for key in ("rows", "imported", "duplicates", "failed")} == \
+            {"rows": 3, "imported": 1, "duplicates": 1, "failed": 1}
+        assert [error["row"] for error in report.json()["errors"]] == [3]
+        
+        report = client.post("/children/avl/import", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+        assert report.status_code == 200 and (report.json()["imported"], report.json()["failed"]) == (1, 1)
+        assert client.get("/children/avl/990001").json()["name"] == "Ana"
+        assert client.get("/children/avl/990003").json()["age"] == 7
+        assert client.get("/children/avl/990002").status_code == 404
+    finally:
+        for id in (990001, 990003):
+            client.delete(f"/children/avl/{id}")
+
+
+def test_export_endpoint_content_types_and_missing_pyarrow(monkeypatch):
+    client = TestClient(avl_app)
+    for format, (media_type, filename) in EXPORTS.items():
+        if format == "arrow" and export.pyarrow is None:
+            continue
+        response = client.get("/children/avl/export", params={"format": format})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == media_type
+        assert response.headers["content-disposition"] == f'attachment; filename="{filename}"'
+        if format == "csv":
+            assert response.text.splitlines()[0] == "id,age,name,gender"
+    
+    monkeypatch.setattr(export, "pyarrow", None)
+    for app, prefix in ((avl_app, "/children/avl"), (abb_app, "/children/bst")):
+        response = TestClient(app).get(f"{prefix}/export", params={"format": "arrow"})
+        assert response.status_code == 501 and "pyarrow" in response.json()["detail"]
+
+
+def test_write_completes_while_an_export_is_partly_consumed(monkeypatch):
+    tree, bst = ChildrenAVL(), ChildrenBST()
+    for i in range(1, 2501):
+        tree.insert(make_child(i, i % 19))
+        bst.insert(make_child(i, i % 19))
+    monkeypatch.setattr(avl_controller, "children_avl", tree)
+    monkeypatch.setattr(avl_controller, "engine_lock", ShardedRWLock(1))
+    monkeypatch.setattr(avl_controller, "change_feed", ChangeFeed(100))
+    monkeypatch.setattr(abb_controller, "children_bst", bst)
+    monkeypatch.setattr(abb_controller, "engine_lock", AsyncRWLock())
+    monkeypatch.setattr(abb_controller, "change_feed", ChangeFeed(100))
+    
+    async def export_with_stalled_client(app, prefix):
+        chunks, written = [], []
+        requested = False
+        
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Event().wait()
+        
+        async def send(message):
+            if message["type"] != "http.response.body" or not message.get("body"):
+                return
+            chunks.append(message["body"])
+            if len(chunks) == 1:
+                # El cliente no lee más hasta que termine la escritura: antes esperaba a la descarga
+                async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                    update = client.put(f"{prefix}/2000", json={"name": "Cambiado"})
+                    written.append(await asyncio.wait_for(update, 5))
+        
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": f"{prefix}/export", "raw_path": f"{prefix}/export".encode(), "root_path": "",
+            "query_string": b"format=ndjson", "headers": [], "client": ("test", 1), "server": ("test", 80),
+        }
+        await app(scope, receive, send)
+        return b"".join(chunks), written
+    
+    for app, prefix, engine in ((avl_app, "/children/avl", tree), (abb_app, "/children/bst", bst)):
+        body, written = asyncio.run(export_with_stalled_client(app, prefix))
+        assert len(written) == 1 and written[0].status_code == 200
+        assert engine.search(2000).name == "Cambiado"
+        # La exportación conserva la versión del árbol que tenía al empezar
+        rows = [json.loads(line) for line in body.splitlines()]
+        assert len(rows) == 2500
+        assert next(row for row in rows if row["id"] == 2000)["name"] == "Niño 2000"
@@ -0,0 +1,72 @@
+"""
+Pruebas del canal de ingesta por WebSocket
+"""
+import json
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from umanizales_edu.controller.abb_controller import change_feed as abb_change_feed
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.main_avl import app as avl_app
+
+
+def test_ingest_websocket_applies_batches_and_acks_by_seq():
+    client = TestClient(abb_app)
+    feed_start = abb_change_feed.last_seq
+    with client.websocket_connect("/children/bst/ingest") as ws:
+        ready = ws.receive_json()
+        assert ready["type"] == "ready" and ready["window"] >= 1
+        # Más lotes que la ventana sin leer confirmaciones: se aplican y confirman en orden
+        for seq in range(ready["window"] + 3):
+            ws.send_text(json.dumps({"seq": seq, "ops": [
+                {"op": "insert", "child": {"id": 920000 + seq, "age": seq % 19, "name": "Ana", "gender": "F"}},
+                {"op": "update", "id": 920000, "changes": {"age": 12}},
+            ]}))
+        acks = [ws.receive_json() for _ in range(ready["window"] + 3)]
+        assert [ack["seq"] for ack in acks] == list(range(ready["window"] + 3))
+        assert all(ack["applied"] == 2 and ack["failed"] == 0 for ack in acks)
+    
+        ws.send_text(json.dumps({"seq": 99, "ops": [
+            {"op": "insert", "child": {"id": 920000, "age": 3, "name": "Ana", "gender": "F"}},
+            {"op": "update", "id": 929999, "changes": {"age": 4}},
+            {"op": "insert", "child": {"id": 929998}},
+            {"op": "delete", "id": 920000},
+        ]}))
+        ack = ws.receive_json()
+        assert (ack["seq"], ack["applied"], ack["failed"]) == (99, 0, 4)
+        assert [error["index"] for error in ack["errors"]] == [0, 1, 2, 3]
+    
+        ws.send_text(json.dumps({"seq": 100, "ops": [{"op": "update", "id": 1, "changes": {}}] * (ready["max_batch"] + 1)}))
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+        assert closed.value.code == 1009
+    
+    assert client.get("/children/bst/920000").json()["age"] == 12
+    events = abb_change_feed.since(feed_start)
+    assert [op for _, op, _ in events].count("insert") == ready["window"] + 3
+
+
+def test_ingest_into_the_avl_api_and_close_on_invalid_frames():
+    client = TestClient(avl_app)
+    ids = range(990201, 990221)
+    try:
+        with client.websocket_connect("/children/avl/ingest") as ws:
+            assert ws.receive_json()["type"] == "ready"
+            ws.send_text(json.dumps({"seq": 1, "ops": [
+                {"op": "insert", "child": {"id": i, "age": i % 19, "name": "Eva", "gender": "F"}} for i in ids
+            ] + [{"op": "update", "id": ids[0], "changes": {"age": 18}}]}))
+            ack = ws.receive_json()
+            assert (ack["seq"], ack["applied"], ack["failed"]) == (1, 21, 0)
+            
+            ws.send_text("not a batch")
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+            assert closed.value.code == 1007
+        
+        listed = {child["id"]: child["age"] for child in client.get("/children/avl/").json()}
+        assert all(listed[i] == (18 if i == ids[0] else i % 19) for i in ids)
+    finally:
+        for i in ids:
+            client.delete(f"/children/avl/{i}")
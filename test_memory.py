@@ -0,0 +1,50 @@
+"""
+Pruebas de la estimación de memoria
+"""
+import json
+import sys
+import tracemalloc
+
+from fastapi.testclient import TestClient
+
+from umanizales_edu.config import settings
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL
+from umanizales_edu.service.memory import estimate_memory
+from umanizales_edu.model.schemas import Child
+
+
+def test_memory_estimate_tracks_tracemalloc_and_deep_mode(monkeypatch):
+    lines = [json.dumps({"id": 1000 + i, "age": i % 19, "name": f"Niño {i} " + "x" * (i % 30), "gender": "F"})
+             for i in range(20000)]
+    for engine, load in ((ChildrenAVL(), ChildrenAVL.load_sorted), (ChildrenBST(self_rebuilding=True), None)):
+        estimate_memory(engine)  # calibra el tamaño de los nodos antes de medir
+        tracemalloc.start()
+        children = [Child.model_validate_json(line) for line in lines]
+        if load is not None:
+            load(engine, children)
+        else:
+            for child in children:
+                engine.insert(child)
+        traced = tracemalloc.get_traced_memory()[0] - sys.getsizeof(children)
+        tracemalloc.stop()
+        del children
+        report = estimate_memory(engine, seed=1)
+        assert report["nodes"] == 20000 and report["sampled"] == 256
+        assert abs(report["estimated_bytes"] - traced) / traced < 0.1
+        assert report["estimated_bytes"] == sum(report["breakdown"].values())
+    assert report["indexes"]["id_index"] == sys.getsizeof(engine._index)
+    assert estimate_memory(ChildrenAVL())["estimated_bytes"] == 0
+    
+    client = TestClient(abb_app)
+    assert client.get("/children/bst/stats/memory").json()["engine"] == "ChildrenBST"
+    assert client.get("/children/bst/stats/memory?deep=true").status_code == 403
+    monkeypatch.setattr(settings, "memory_deep_enabled", True)
+    try:
+        first = client.get("/children/bst/stats/memory?deep=true&top=3").json()["deep"]
+        second = client.get("/children/bst/stats/memory?deep=true&top=3").json()["deep"]
+    finally:
+        tracemalloc.stop()
+    assert first["tracing_started"] and not second["tracing_started"]
+    assert second["since_previous"] is not None and len(second["top_lines"]) <= 3
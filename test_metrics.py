@@ -0,0 +1,72 @@
+"""
+Pruebas del endpoint /metrics y del middleware de latencia
+"""
+from fastapi.testclient import TestClient
+
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.model.schemas import Child, ChildUpdate
+
+
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def sample(text: str, series: str) -> float:
+    """Valor de una serie exacta (nombre y etiquetas) en el texto de exposición"""
+    for line in text.splitlines():
+        name, _, value = line.rpartition(" ")
+        if name == series:
+            return float(value)
+    return 0.0
+
+
+def test_metrics_exposes_route_templates_and_engine_gauges():
+    client = TestClient(abb_app)
+    before = client.get("/metrics").text
+    assert client.get("/children/bst/950001").status_code == 404
+    assert client.get("/children/bst/950002").status_code == 404
+    assert client.get("/no-such-route").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/plain; version=0.0.4; charset=utf-8"
+    text = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    # La plantilla de la ruta agrupa los ids: la cardinalidad no crece con ellos
+    series = 'http_request_duration_seconds_count{route="/children/bst/{id}",method="GET",status="404"}'
+    assert sample(text, series) - sample(before, series) == 2
+    assert "950001" not in text
+    unmatched = 'http_request_duration_seconds_count{route="unmatched",method="GET",status="404"}'
+    assert sample(text, unmatched) - sample(before, unmatched) == 1
+    buckets = [line for line in text.splitlines()
+               if line.startswith('http_request_duration_seconds_bucket{route="/children/bst/{id}",method="GET",status="404"')]
+    assert buckets[-1].endswith(f" {int(sample(text, series))}") and 'le="+Inf"' in buckets[-1]
+
+    stats = client.get("/children/bst/stats/tree").json()
+    assert sample(text, 'children_engine_height{engine="bst"}') == stats["tree_height"]
+    assert sample(text, 'children_engine_size{engine="bst"}') == stats["total_nodes"]
+
+
+def test_bst_height_is_cached_until_the_shape_changes(monkeypatch):
+    bst = ChildrenBST(self_rebuilding=True, lazy_delete=True, compaction_threshold=0.5)
+    walks = []
+    measure = bst._measure_height
+    monkeypatch.setattr(bst, "_measure_height", lambda: walks.append(1) or measure())
+
+    for i in range(1, 101):
+        bst.insert(make_child(i, i % 19))
+    assert bst.height() == bst.height() == measure()
+    assert len(walks) == 1
+
+    bst.update(5, ChildUpdate(age=18))
+    assert bst.height() == measure() and len(walks) == 2
+    # La compactación reconstruye el árbol sin cambiar la versión
+    for i in range(1, 61):
+        bst.delete(i)
+    version = bst.version
+    bst.wait_for_compaction()
+    assert bst.version == version and bst.compaction_count == 1
+    assert bst.height() == measure() and len(walks) == 3
+    bst.rebuild()
+    assert bst.height() == measure() and len(walks) == 4
@@ -0,0 +1,109 @@
+"""
+Pruebas del perfilado por petición (Server-Timing y aislamiento de la petición perfilada)
+"""
+import asyncio
+import pstats
+import time
+
+import httpx
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from umanizales_edu import profiling
+from umanizales_edu.config import settings
+from umanizales_edu.controller.serialization import children_json, json_body
+from umanizales_edu.model.schemas import Child
+from umanizales_edu.profiling import ProfiledRoute, ProfilingMiddleware
+from umanizales_edu.service.concurrency import AsyncRWLock
+
+
+@pytest.fixture
+def profiled(tmp_path, monkeypatch):
+    """App mínima con rutas perfiladas: (app ASGI, eventos registrados por /wait)"""
+    monkeypatch.setattr(settings, "profiling_enabled", True)
+    monkeypatch.setattr(settings, "profiling_dir", str(tmp_path))
+    monkeypatch.setattr(profiling, "_exclusive", AsyncRWLock())
+    router = APIRouter(route_class=ProfiledRoute)
+    events = []
+
+    @router.post("/echo")
+    async def echo(child: Child = Depends(json_body(Child))):
+        time.sleep(0.03)  # operación sobre el árbol: no cede el event loop
+        return children_json([child] * 20000)
+
+    @router.get("/wait")
+    async def wait(name: str, seconds: float = 0.1):
+        events.append(("start", name))
+        await asyncio.sleep(seconds)
+        events.append(("end", name))
+        return {"name": name}
+
+    app = FastAPI()
+    app.include_router(router)
+    return ProfilingMiddleware(app), events
+
+
+def timings(response) -> dict:
+    header = response.headers["server-timing"]
+    return {name: float(dur.removeprefix("dur=")) for name, dur in (item.strip().split(";") for item in header.split(","))}
+
+
+def test_server_timing_splits_validation_tree_and_serialization(profiled, tmp_path):
+    app, _ = profiled
+    client = TestClient(app)
+    body = {"id": 1, "age": 4, "name": "Ana", "gender": "F"}
+
+    plain = client.post("/echo", json=body)
+    assert plain.status_code == 200 and "server-timing" not in plain.headers
+
+    response = client.post("/echo", json=body, headers={"X-Profile": "1"})
+    assert response.status_code == 200 and len(response.json()) == 20000
+    phases = timings(response)
+    assert list(phases) == ["validation", "tree", "serialization", "total"]
+    # La codificación hecha dentro del endpoint cuenta como serialización, no como árbol
+    assert phases["tree"] >= 30 and phases["serialization"] > 1
+    assert phases["validation"] + phases["tree"] + phases["serialization"] <= phases["total"]
+
+    stats = pstats.Stats(str(tmp_path / response.headers["x-profile-file"]))
+    assert any(function == "echo" for _, _, function in stats.stats)
+
+
+def test_profiled_request_runs_alone(profiled):
+    app, events = profiled
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            before = asyncio.ensure_future(client.get("/wait", params={"name": "before"}))
+            await asyncio.sleep(0.03)
+            traced = asyncio.ensure_future(client.get("/wait", params={"name": "traced"}, headers={"X-Profile": "1"}))
+            await asyncio.sleep(0.03)
+            after = asyncio.ensure_future(client.get("/wait", params={"name": "after"}))
+            return await asyncio.gather(before, traced, after)
+
+    before, traced, after = asyncio.run(scenario())
+    # Espera a la petición en curso y retiene a la que llega después
+    assert events == [("start", "before"), ("end", "before"), ("start", "traced"), ("end", "traced"),
+                      ("start", "after"), ("end", "after")]
+    assert "server-timing" in traced.headers and "server-timing" not in after.headers
+    assert timings(traced)["total"] < 150  # el total no incluye la espera a "before"
+
+
+def test_profiling_gives_up_when_requests_do_not_drain(profiled, monkeypatch):
+    app, events = profiled
+    monkeypatch.setattr(settings, "profiling_drain_timeout", 0.05)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            stream = asyncio.ensure_future(client.get("/wait", params={"name": "stream", "seconds": 0.5}))
+            await asyncio.sleep(0.02)
+            traced = asyncio.ensure_future(client.get("/wait", params={"name": "traced"}, headers={"X-Profile": "1"}))
+            await asyncio.sleep(0.01)
+            held = asyncio.ensure_future(client.get("/wait", params={"name": "held"}))
+            return await asyncio.gather(stream, traced, held)
+
+    _, traced, held = asyncio.run(scenario())
+    # Sin perfilar y sin bloquear a la petición que esperaba detrás de la perfilada
+    assert traced.status_code == held.status_code == 200
+    assert "server-timing" not in traced.headers
+    assert events.index(("end", "held")) < events.index(("end", "stream"))
@@ -0,0 +1,140 @@
+"""
+Pruebas del modo escritor/réplicas
+"""
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from umanizales_edu.config import settings
+from umanizales_edu.controller.avl_controller import change_feed
+from umanizales_edu.controller.serialization import etag_epoch
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.replication import (ReplicaMiddleware, _replica, load_snapshot, publish_snapshot, refresh_snapshot,
+                                        replication_lifespan, write_snapshot)
+from umanizales_edu.service.avl_service import ChildrenAVL, children_avl
+from umanizales_edu.model.schemas import Child
+
+
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def test_avl_snapshot_roundtrip_builds_balanced_replica(tmp_path):
+    avl = ChildrenAVL()
+    for i in range(1, 1001):
+        avl.insert(make_child(i, i % 19))
+    rows = [(c.id, c.age, c.name, c.gender) for c in avl.iter_inorder()]
+    write_snapshot(tmp_path / "avl.pickle", avl.version, rows)
+    
+    replica, snapshot = load_snapshot(tmp_path / "avl.pickle")
+    assert snapshot["version"] == avl.version == 1000
+    assert replica.size == replica.count_nodes() == 1000
+    assert replica.is_balanced()
+    assert replica.height() == 10
+    assert [c.id for c in replica.inorder_traversal()] == list(range(1, 1001))
+    assert replica.search(500).age == 500 % 19
+    assert load_snapshot(tmp_path / "missing.pickle") is None
+
+
+def test_writer_publishes_only_new_versions_and_replica_reloads(tmp_path):
+    path = tmp_path / "avl.pickle"
+    
+    async def scenario():
+        published = await publish_snapshot(path, None)
+        assert published == children_avl.version
+        first = os.stat(path).st_mtime_ns
+        # Sin escrituras nuevas no se recorre el árbol ni se reescribe el archivo
+        assert await publish_snapshot(path, published) == published
+        assert os.stat(path).st_mtime_ns == first
+        
+        writer_epoch = etag_epoch["value"]
+        etag_epoch["value"] = "replica"
+        identity = await refresh_snapshot(path, None)
+        assert _replica["version"] == published and identity is not None
+        assert etag_epoch["value"] == writer_epoch  # la réplica adopta la época del escritor
+        assert await refresh_snapshot(path, identity) == identity
+        
+        children_avl.insert(make_child(970001, 4))
+        try:
+            assert await publish_snapshot(path, published) == published + 1
+            _, snapshot = load_snapshot(path)
+            assert 970001 in {id for id, _, _, _ in snapshot["rows"]}
+        finally:
+            children_avl.delete(970001)
+    
+    asyncio.run(scenario())
+    assert children_avl.search(970001) is None
+
+
+def test_replica_listings_carry_the_writer_change_seq(tmp_path, monkeypatch):
+    path = tmp_path / "avl.pickle"
+    monkeypatch.setitem(_replica, "version", -1)
+    monkeypatch.setattr(change_feed, "last_seq", 4321)
+    
+    async def scenario():
+        await publish_snapshot(path, None)
+        change_feed.last_seq = 0  # una réplica recién arrancada no tiene registro propio
+        await refresh_snapshot(path, None)
+    
+    asyncio.run(scenario())
+    assert load_snapshot(path)[1]["last_seq"] == 4321
+    assert change_feed.last_seq == 4321
+    response = TestClient(avl_app).get("/children/avl/")
+    assert response.status_code == 200 and response.headers["x-change-seq"] == "4321"
+
+
+def test_replication_lifespan_runs_the_loop_for_its_role(tmp_path, monkeypatch):
+    path = tmp_path / "avl.pickle"
+    monkeypatch.setattr(settings, "cluster_snapshot_path", str(path))
+    monkeypatch.setattr(settings, "cluster_max_staleness", 0.02)
+    monkeypatch.setitem(_replica, "version", -1)
+    
+    async def run(role):
+        monkeypatch.setattr(settings, "cluster_role", role)
+        async with replication_lifespan(None):
+            await asyncio.sleep(0.1)
+    
+    asyncio.run(run("standalone"))
+    assert not path.exists()
+    asyncio.run(run("writer"))
+    assert load_snapshot(path)[1]["version"] == children_avl.version
+    asyncio.run(run("reader"))
+    assert _replica["version"] == children_avl.version
+
+
+def test_replica_middleware_redirects_writes_and_rejects_websockets(monkeypatch):
+    monkeypatch.setattr(settings, "cluster_writer_url", "http://writer:8101/")
+    monkeypatch.setitem(_replica, "version", -1)
+    client = TestClient(ReplicaMiddleware(avl_app), follow_redirects=False)
+    
+    redirects = [
+        client.post("/children/avl/", json={"id": 970002, "age": 3, "name": "Ana", "gender": "F"}),
+        client.put("/children/avl/970002", json={"age": 4}),
+        client.delete("/children/avl/970002"),
+        client.get("/children/avl/changes", params={"since": 3}),
+        client.get("/children/avl/changes/stream"),
+    ]
+    assert [response.status_code for response in redirects] == [307] * 5
+    assert redirects[1].headers["location"] == "http://writer:8101/children/avl/970002"
+    assert redirects[3].headers["location"] == "http://writer:8101/children/avl/changes?since=3"
+    assert children_avl.search(970002) is None
+    
+    with pytest.raises(WebSocketDisconnect) as closed:
+        with client.websocket_connect("/children/avl/ingest"):
+            pass
+    assert closed.value.code == 1008
+    
+    # Sin snapshot cargado todavía
+    response = client.get("/children/avl/stats/tree")
+    assert response.status_code == 200
+    assert response.headers["x-snapshot-version"] == "-1" and response.headers["x-snapshot-age"] == "-1.000"
+    
+    monkeypatch.setitem(_replica, "version", 12)
+    monkeypatch.setitem(_replica, "published_at", time.time() - 2)
+    response = client.get("/children/avl/970002")
+    assert response.status_code == 404 and response.headers["x-snapshot-version"] == "12"
+    assert 2 <= float(response.headers["x-snapshot-age"]) < 5
@@ -0,0 +1,42 @@
+"""
+Pruebas de la traza de carga y su reproducción
+"""
+import json
+
+from fastapi.testclient import TestClient
+
+from umanizales_edu.config import settings
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.replay import replay
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.tracing import TraceMiddleware, read_trace
+
+
+def test_trace_middleware_records_engine_operations_for_replay(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "trace_dir", str(tmp_path))
+    traced = TraceMiddleware(abb_app, engine="bst")
+    client = TestClient(traced)
+    body = {"id": 910001, "age": 7, "name": "Traza", "gender": "F"}
+    assert client.post("/children/bst/", json=body).status_code == 201
+    assert client.post("/children/bst/", json={"id": 910002}).status_code == 422
+    assert client.get("/children/bst/910001").status_code == 200
+    assert client.put("/children/bst/910001", json={"age": 9}).status_code == 200
+    assert client.get("/children/bst/?order=post").status_code == 200
+    assert client.delete("/children/bst/910001").status_code == 200
+    assert client.get("/children/bst/910001").status_code == 404
+    traced.writer.close()
+    
+    with open(traced.writer.path, "rb") as file:
+        header, records = read_trace(file)
+        records = list(records)
+    assert header["engine"] == "bst"
+    assert [(r.operation, r.id, r.age) for r in records] == [
+        ("insert", 910001, 7), ("search", 910001, None), ("update", 910001, 9),
+        ("list_post", 0, None), ("delete", 910001, None), ("search", 910001, None),
+    ]
+    assert records[0].size == len(json.dumps(body, separators=(",", ":")))
+    assert all(a.t <= b.t for a, b in zip(records, records[1:]))
+    
+    result = replay(ChildrenBST(), records)
+    assert result["operations"] == 6 and result["latency"]["search"]["count"] == 2
+    assert result["shape"]["size"] == 0
@@ -0,0 +1,75 @@
+"""
+Pruebas de las versiones del árbol (base de los ETag)
+"""
+from fastapi.testclient import TestClient
+
+from umanizales_edu.controller.serialization import etag_epoch
+from umanizales_edu.main_abb import app as abb_app
+from umanizales_edu.main_avl import app as avl_app
+from umanizales_edu.service.abb_service import ChildrenBST
+from umanizales_edu.service.avl_service import ChildrenAVL, ShardedChildrenAVL
+from umanizales_edu.model.schemas import Child, ChildUpdate
+
+
+def make_child(id: int, age: int) -> Child:
+    return Child(id=id, age=age, name=f"Niño {id}", gender="M")
+
+
+def test_versions_bump_on_mutations_and_follow_nodes():
+    for engine in (ChildrenBST(self_rebuilding=True), ChildrenAVL(), ShardedChildrenAVL(3)):
+        for i in range(1, 51):
+            engine.insert(make_child(i, i % 19))
+        version = engine.version
+        assert not engine.insert(make_child(1, 1))
+        assert not engine.delete(999)
+        assert engine.version == version
+        
+        _, v10 = engine.search_with_version(10)
+        _, v20 = engine.search_with_version(20)
+        engine.update(20, ChildUpdate(age=3))
+        assert engine.version == version + 1
+        assert engine.search_with_version(10)[1] == v10
+        assert engine.search_with_version(20)[1] > v20
+        
+        # Eliminar nodos con dos hijos mueve contenidos sin cambiar su versión
+        for i in range(21, 41):
+            engine.delete(i)
+        assert engine.search_with_version(10)[1] == v10
+        assert engine.search_with_version(30) is None
+
+
+def test_conditional_gets_return_304_until_the_child_changes(monkeypatch):
+    for app, prefix in ((abb_app, "/children/bst"), (avl_app, "/children/avl")):
+        client = TestClient(app)
+        assert client.post(f"{prefix}/", json={"id": 980001, "age": 5, "name": "Ana", "gender": "F"}).status_code == 201
+        try:
+            first = client.get(f"{prefix}/980001")
+            etag = first.headers["etag"]
+            assert etag.startswith(f'"{etag_epoch["value"]}.980001.')
+            cached = client.get(f"{prefix}/980001", headers={"If-None-Match": etag})
+            assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+            assert client.get(f"{prefix}/980001", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+            
+            listing = client.get(f"{prefix}/", params={"order": "pre"})
+            list_etag = listing.headers["etag"]
+            assert client.get(f"{prefix}/", params={"order": "pre"},
+                              headers={"If-None-Match": list_etag}).status_code == 304
+            # La misma versión con otro orden es otra representación
+            assert client.get(f"{prefix}/", params={"order": "in"},
+                              headers={"If-None-Match": list_etag}).status_code == 200
+            
+            assert client.put(f"{prefix}/980001", json={"age": 6}).status_code == 200
+            changed = client.get(f"{prefix}/980001", headers={"If-None-Match": etag})
+            assert changed.status_code == 200 and changed.json()["age"] == 6
+            assert changed.headers["etag"] != etag
+            relisted = client.get(f"{prefix}/", params={"order": "pre"}, headers={"If-None-Match": list_etag})
+            assert relisted.status_code == 200 and relisted.headers["etag"] != list_etag
+            
+            # Tras un reinicio las versiones vuelven a empezar: el ETag anterior no debe coincidir
+            current = changed.headers["etag"]
+            monkeypatch.setitem(etag_epoch, "value", "restarted")
+            restarted = client.get(f"{prefix}/980001", headers={"If-None-Match": current})
+            assert restarted.status_code == 200 and restarted.headers["etag"] != current
+            monkeypatch.undo()
+        finally:
+            client.delete(f"{prefix}/980001")
@@ -0,0 +1,61 @@
+"""
+Despliegue multiproceso de la API AVL: un proceso escritor y N réplicas lectoras
+
+El escritor es dueño del árbol, atiende todas las operaciones y publica un
+snapshot en disco cuando hay cambios. Las réplicas (workers de uvicorn que
+comparten el puerto público) sirven las lecturas desde su copia del snapshot
+y redirigen las escrituras al escritor con 307.
+
+Uso:
+    python -m umanizales_edu.cluster --workers 4 --port 8001 --writer-port 8101
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API AVL con un escritor y N réplicas lectoras")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Réplicas lectoras")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001, help="Puerto público (réplicas)")
+    parser.add_argument("--writer-port", type=int, default=8101)
+    parser.add_argument("--writer-url", help="URL pública del escritor para las redirecciones 307")
+    parser.add_argument("--max-staleness", type=float, default=0.5, help="Retraso máximo de las réplicas (s)")
+    parser.add_argument("--snapshot-path", default="snapshots/children_avl.pickle")
+    args = parser.parse_args()
+
+    writer_host = "127.0.0.1" if args.host in ("0.0.0.0", "::") else args.host
+    env = dict(
+        os.environ,
+        CHILDREN_CLUSTER_SNAPSHOT_PATH=args.snapshot_path,
+        CHILDREN_CLUSTER_MAX_STALENESS=str(args.max_staleness),
+        CHILDREN_CLUSTER_WRITER_URL=args.writer_url or f"http://{writer_host}:{args.writer_port}",
+    )
+    uvicorn = [sys.executable, "-m", "uvicorn", "umanizales_edu.main_avl:app", "--host", args.host]
+    writer = subprocess.Popen(
+        uvicorn + ["--port", str(args.writer_port)],
+        env={**env, "CHILDREN_CLUSTER_ROLE": "writer"}
+    )
+    readers = subprocess.Popen(
+        uvicorn + ["--port", str(args.port), "--workers", str(args.workers)],
+        env={**env, "CHILDREN_CLUSTER_ROLE": "reader"}
+    )
+
+    try:
+        while writer.poll() is None and readers.poll() is None:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in (readers, writer):
+            if process.poll() is None:
+                process.terminate()
+        for process in (readers, writer):
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Configuración de la aplicación (variables de entorno con prefijo CHILDREN_)"""
+    bst_self_rebuilding: bool = False
+    bst_alpha: float = 0.7
+    bst_adaptive: bool = False
+    bst_promote_ratio: float = 4.0
+    bst_promote_min_size: int = 64
+    bst_lazy_delete: bool = False
+    bst_compaction_threshold: float = 0.25
+    avl_shards: int = 1
+    tiered_hot_capacity: int = 0  # 0 = todo en memoria; > 0 = niños máximos en el nivel caliente
+    tiered_dir: str = "tiers"
+    tiered_evict_fraction: float = 0.125
+    tiered_bloom_fp_rate: float = 0.01
+    tiered_index_interval: int = 32
+    tiered_max_segments: int = 8
+    metrics_enabled: bool = True
+    traversal_chunk_size: int = 1000
+    change_feed_capacity: int = 10000
+    change_feed_keepalive: float = 15.0  # segundos entre comentarios de /changes/stream sin eventos
+    import_chunk_rows: int = 5000
+    import_workers: Optional[int] = None  # None = un proceso por núcleo; 0 = validar sin pool
+    import_max_errors: int = 100
+    ingest_window: int = 8  # lotes sin confirmar por conexión de /ingest
+    ingest_max_batch: int = 1000
+    profiling_enabled: bool = False
+    profiling_dir: str = "profiles"
+    profiling_header: str = "X-Profile"
+    profiling_token: Optional[str] = None
+    profiling_drain_timeout: float = 5.0  # espera a que terminen las demás peticiones antes de perfilar
+    memory_sample_size: int = 256
+    memory_deep_enabled: bool = False  # GET /stats/memory?deep=true (activa tracemalloc si no lo estaba)
+    memory_trace_frames: int = 1
+    trace_enabled: bool = False
+    trace_dir: str = "traces"
+    cluster_role: Literal["standalone", "writer", "reader"] = "standalone"
+    cluster_snapshot_path: str = "snapshots/children_avl.pickle"
+    cluster_max_staleness: float = 0.5
+    cluster_writer_url: str = "http://127.0.0.1:8101"
+
+    model_config = SettingsConfigDict(env_prefix="CHILDREN_")
+
+
+# Instancia global de configuración
+settings = Settings()
@@ -1,7 +1,23 @@
-from fastapi import APIRouter, HTTPException, Query, status
-from typing import List, Literal, Optional
-from ..model.schemas import Child, ChildUpdate, ChildResponse, MessageResponse, ErrorResponse
-from ..service.bst_service import children_bst
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Tuple
+from ..config import settings
+from ..model.schemas import (
+    AnalyticsResponse, Child, ChildUpdate, ChildResponse, ChangePage, ChildPage, MessageResponse, ErrorResponse
+)
+from ..service.abb_service import children_bst
+from ..service.changefeed import ChangeFeed
+from ..service.columnar import analyze
+from ..service.concurrency import AsyncRWLock, SingleFlight, collect
+from ..service.memory import estimate_memory, traced_memory
+from ..profiling import ProfiledRoute
+from .export import EXPORTS, export_available, export_stream, snapshot_children
+from .ingest import ingest_session
+from .serialization import (
+    body_schema, change_stream, changes_json, child_json, children_bytes, etag_matches, json_body,
+    listing_json, make_etag, not_modified, page_json, resync_required
+)
 
 router = APIRouter(
     prefix="/children/bst",
@@ -10,9 +26,16 @@ router = APIRouter(
         404: {"model": ErrorResponse, "description": "Child not found"},
         400: {"model": ErrorResponse, "description": "Validation error"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
-    }
+    },
+    route_class=ProfiledRoute
 )
 
+# Las escrituras excluyen a los recorridos largos, que ceden el event loop
+engine_lock = AsyncRWLock()
+
+# Registro de cambios para sincronización incremental (/changes)
+change_feed = ChangeFeed(settings.change_feed_capacity)
+
 
 # =========================================================
 # Create Child
@@ -21,6 +44,7 @@ router = APIRouter(
     "/",
     response_model=ChildResponse,
     status_code=status.HTTP_201_CREATED,
+    openapi_extra=body_schema(Child),
     summary="Insert a new child (BST)",
     description="Inserts a new child into the Binary Search Tree (BST). ID must be unique.",
     responses={
@@ -47,7 +71,7 @@ router = APIRouter(
         }
     }
 )
-def create_child(child: Child):
+async def create_child(child: Child = Depends(json_body(Child))):
     """
     Inserts a new child into the BST.
     
@@ -61,13 +85,16 @@ def create_child(child: Child):
         HTTPException: If child with same ID exists or server error occurs
     """
     try:
-        success = children_bst.insert(child)
+        async with engine_lock.write():
+            success = children_bst.insert(child)
+            if success:
+                change_feed.publish("insert", child.id, child)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Child with ID {child.id} already exists"
             )
-        return child
+        return child_json(child, status.HTTP_201_CREATED)
     except HTTPException:
         raise
     except Exception as e:
@@ -77,6 +104,213 @@ def create_child(child: Child):
         )
 
 
+# =========================================================
+# Change feed (long-poll)
+# =========================================================
+@router.get(
+    "/changes",
+    response_model=ChangePage,
+    summary="Poll changes since a sequence number (BST)",
+    description="Returns the insert/update/delete events after `since`, waiting up to `timeout` seconds for new ones (long-poll).",
+    responses={
+        410: {
+            "description": "The requested events are no longer buffered: resync with a full listing",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Changes after seq 10 are no longer available; resync with a full listing",
+                        "resync_required": True,
+                        "last_seq": 25000
+                    }
+                }
+            }
+        }
+    }
+)
+async def poll_changes(
+    since: int = Query(..., ge=0, description="Last sequence number already applied (X-Change-Seq of a full listing)"),
+    timeout: float = Query(30, ge=0, le=60, description="Seconds to wait for new events when there are none")
+):
+    """
+    Incremental sync: apply the returned events in order and poll again with
+    `since=last_seq`. A full listing (`GET /`) returns its position in the
+    `X-Change-Seq` header. A 410 response means the consumer fell behind the
+    buffer and must list everything again.
+    """
+    events = await change_feed.wait(since, timeout)
+    if events is None:
+        return resync_required(since, change_feed.last_seq)
+    return changes_json(events, events[-1][0] if events else since)
+
+
+# =========================================================
+# Change feed (Server-Sent Events)
+# =========================================================
+@router.get(
+    "/changes/stream",
+    summary="Stream changes as Server-Sent Events (BST)",
+    description="Streams insert/update/delete events as `text/event-stream`. Sends a `resync` event and closes if the consumer is too far behind.",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}}
+)
+async def stream_changes(
+    since: Optional[int] = Query(None, ge=0, description="Last sequence number already applied (default: only new events)"),
+    last_event_id: Optional[int] = Header(None, description="Sent by EventSource when reconnecting; overrides `since`")
+):
+    """
+    Server-Sent Events version of the change feed. Each event carries its
+    sequence number as `id`, the operation as `event` and the change as JSON
+    `data`. Comment lines are sent periodically to keep the connection open.
+    """
+    start = last_event_id if last_event_id is not None else since
+    if start is None:
+        start = change_feed.last_seq
+    return StreamingResponse(
+        change_stream(change_feed, start, keepalive=settings.change_feed_keepalive),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+# =========================================================
+# Export (CSV / NDJSON / columnar)
+# =========================================================
+@router.get(
+    "/export",
+    summary="Stream all children as CSV, NDJSON or columnar (BST)",
+    description="Streams the store directly from a tree traversal in chunks, without building the JSON list. `columnar` returns a zip of typed NumPy `.npy` columns (load it with `numpy.load`); `arrow` returns an Arrow IPC stream and requires pyarrow on the server.",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Export file (sent as an attachment)",
+            "content": {
+                "text/csv": {"example": "id,age,name,gender\n1001,10,John Doe,M\n"},
+                "application/x-ndjson": {},
+                "application/zip": {},
+                "application/vnd.apache.arrow.stream": {}
+            }
+        },
+        501: {
+            "description": "Arrow export requested but pyarrow is not installed",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Arrow export requires pyarrow; use format=columnar"}
+                }
+            }
+        }
+    }
+)
+async def export_children(
+    format: Literal["csv", "ndjson", "columnar", "arrow"] = Query("csv", description="Output format"),
+    order: Literal["in", "pre", "post"] = Query("in", description="Traversal order of the rows")
+):
+    """
+    Exports every child as a stream.
+    
+    The traversal is collected as references under the read lock, which is
+    released before the download starts: a slow client does not hold up
+    writes, and since updates replace children instead of mutating them every
+    row still belongs to a single tree version. Rows are encoded chunk by
+    chunk while sending.
+    
+    - **csv**: Header `id,age,name,gender`, one row per child
+    - **ndjson**: One JSON object per line
+    - **columnar**: `.npz` with `id` (int64), `age` (uint8), `gender` (int8 codes into
+      `gender_categories`) and names as UTF-8 `name_data` + `name_offsets`
+    - **arrow**: Arrow IPC stream, one record batch per chunk
+    """
+    if not export_available(format):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow export requires pyarrow; use format=columnar"
+        )
+    traversals = {
+        "in": children_bst.iter_inorder,
+        "pre": children_bst.iter_preorder,
+        "post": children_bst.iter_postorder
+    }
+    children = await snapshot_children(engine_lock, traversals[order])
+    media_type, filename = EXPORTS[format]
+    return StreamingResponse(
+        export_stream(format, children),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# =========================================================
+# Analytics (columnar snapshot)
+# =========================================================
+@router.get(
+    "/analytics",
+    response_model=AnalyticsResponse,
+    summary="Filter and aggregate children with vectorized queries (BST)",
+    description="Answers filtered counts, age percentiles and gender ratios per age band from a NumPy columnar snapshot of the tree. The snapshot is built with one traversal and cached until the tree version changes.",
+    responses={
+        200: {
+            "description": "Aggregates over the selected children",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "version": 42,
+                        "total": 5,
+                        "count": 3,
+                        "age": {"min": 6, "max": 12, "mean": 9.0, "percentiles": {"p50": 9.0}},
+                        "genders": {"M": 2, "F": 1, "Otro": 0},
+                        "bands": [
+                            {"min_age": 5, "max_age": 9, "count": 2, "genders": {"M": 1, "F": 1, "Otro": 0},
+                             "ratios": {"M": 0.5, "F": 0.5, "Otro": 0.0}},
+                            {"min_age": 10, "max_age": 14, "count": 1, "genders": {"M": 1, "F": 0, "Otro": 0},
+                             "ratios": {"M": 1.0, "F": 0.0, "Otro": 0.0}}
+                        ]
+                    }
+                }
+            }
+        },
+        400: {
+            "description": "Invalid percentile",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Percentiles must be between 0 and 100"}
+                }
+            }
+        }
+    }
+)
+async def children_analytics(
+    min_age: Optional[int] = Query(None, ge=0, le=18, description="Minimum age (inclusive)"),
+    max_age: Optional[int] = Query(None, ge=0, le=18, description="Maximum age (inclusive)"),
+    gender: Optional[List[Literal["M", "F", "Otro"]]] = Query(None, description="Genders to include (repeatable)"),
+    min_id: Optional[int] = Query(None, description="Minimum ID (inclusive)"),
+    max_id: Optional[int] = Query(None, description="Maximum ID (inclusive)"),
+    percentile: List[float] = Query([25, 50, 75, 90], description="Age percentiles to compute (repeatable)"),
+    band: int = Query(5, ge=1, le=19, description="Width of the age bands in years")
+):
+    """
+    Analytical queries over the whole store without walking Python objects.
+    
+    Filters are combined with AND. The first query after a write rebuilds the
+    snapshot (one traversal, off the event loop); later queries at the same
+    tree version reuse it.
+    
+    - **count**: Children matching the filters
+    - **age**: min / max / mean and the requested percentiles
+    - **genders**: Count per gender
+    - **bands**: Count and ratio per gender for each age band
+    """
+    try:
+        async with engine_lock.read():
+            snapshot = await asyncio.to_thread(children_bst.columnar_snapshot)
+        return analyze(snapshot, min_age, max_age, gender, min_id, max_id, percentile, band)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing analytics: {str(e)}"
+        )
+
+
 # =========================================================
 # Get Child by ID
 # =========================================================
@@ -86,6 +320,7 @@ def create_child(child: Child):
     summary="Get a child by ID (BST)",
     description="Finds and returns a specific child by their ID.",
     responses={
+        304: {"description": "Not modified: If-None-Match matches the current ETag"},
         200: {
             "description": "Child found",
             "content": {
@@ -109,7 +344,7 @@ def create_child(child: Child):
         }
     }
 )
-def get_child(id: int):
+async def get_child(id: int, request: Request):
     """
     Retrieves a child by their ID.
     
@@ -123,13 +358,17 @@ def get_child(id: int):
         HTTPException: If child not found or server error occurs
     """
     try:
-        child = children_bst.search(id)
-        if child is None:
+        found = children_bst.search_with_version(id)
+        if found is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Child with ID {id} not found"
             )
-        return child
+        child, version = found
+        etag = make_etag(id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return child_json(child, etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -139,6 +378,24 @@ def get_child(id: int):
         )
 
 
+LIST_TRAVERSALS = {
+    "in": children_bst.iter_inorder,
+    "pre": children_bst.iter_preorder,
+    "post": children_bst.iter_postorder
+}
+
+# Coalescencia de listados idénticos concurrentes (misma orden y versión del árbol)
+list_flight = SingleFlight("bst_list")
+
+
+async def _encoded_listing(order: str) -> Tuple[str, int, bytes]:
+    """Recorrer bajo el candado de lectura y codificar: (ETag, secuencia del registro de cambios, cuerpo)"""
+    async with engine_lock.read():
+        etag = make_etag(order, children_bst.version)
+        seq = change_feed.last_seq
+        children = await collect(LIST_TRAVERSALS[order]())
+    return etag, seq, children_bytes(children)
+
 # =========================================================
 # List All Children
 # =========================================================
@@ -148,6 +405,7 @@ def get_child(id: int):
     summary="List all children (BST)",
     description="Returns a list of all children using the specified traversal order (inorder, preorder, or postorder) of the BST.",
     responses={
+        304: {"description": "Not modified: If-None-Match matches the current ETag"},
         200: {
             "description": "List of children",
             "content": {
@@ -161,7 +419,8 @@ def get_child(id: int):
         }
     }
 )
-def list_children(
+async def list_children(
+    request: Request,
     order: Literal["in", "pre", "post"] = Query(
         "in",
         description="BST traversal order: 'in' (inorder), 'pre' (preorder), 'post' (postorder)"
@@ -180,12 +439,15 @@ def list_children(
         HTTPException: If invalid order is provided or server error occurs
     """
     try:
-        if order == "in":
-            return children_bst.inorder_traversal()
-        elif order == "pre":
-            return children_bst.preorder_traversal()
-        elif order == "post":
-            return children_bst.postorder_traversal()
+        if order in LIST_TRAVERSALS:
+            # The ETag depends only on the tree version, so a 304 skips traversal and serialization
+            version = children_bst.version
+            etag = make_etag(order, version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            # Concurrent identical requests share one traversal and the same encoded bytes
+            etag, seq, body = await list_flight.do((order, version), lambda: _encoded_listing(order))
+            return listing_json(body, etag, seq)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -206,6 +468,7 @@ def list_children(
 @router.put(
     "/{id}",
     response_model=ChildResponse,
+    openapi_extra=body_schema(ChildUpdate),
     summary="Update a child (BST)",
     description="Updates the data of an existing child. The 'id' field cannot be modified.",
     responses={
@@ -232,7 +495,7 @@ def list_children(
         }
     }
 )
-def update_child(id: int, child_update: ChildUpdate):
+async def update_child(id: int, child_update: ChildUpdate = Depends(json_body(ChildUpdate))):
     """
     Updates an existing child's information.
     
@@ -248,20 +511,22 @@ def update_child(id: int, child_update: ChildUpdate):
     """
     try:
         # Ensure at least one field is being updated
-        update_data = child_update.dict(exclude_unset=True)
-        if not update_data:
+        if not child_update.model_fields_set:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No update data provided"
             )
             
-        updated_child = children_bst.update(id, child_update)
+        async with engine_lock.write():
+            updated_child = children_bst.update(id, child_update)
+            if updated_child is not None:
+                change_feed.publish("update", id, updated_child)
         if updated_child is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Child with ID {id} not found"
             )
-        return updated_child
+        return child_json(updated_child)
     except HTTPException:
         raise
     except Exception as e:
@@ -298,7 +563,7 @@ def update_child(id: int, child_update: ChildUpdate):
         }
     }
 )
-def delete_child(id: int):
+async def delete_child(id: int):
     """
     Deletes a child from the BST.
     
@@ -312,7 +577,10 @@ def delete_child(id: int):
         HTTPException: If child not found or server error occurs
     """
     try:
-        deleted = children_bst.delete(id)
+        async with engine_lock.write():
+            deleted = children_bst.delete(id)
+            if deleted:
+                change_feed.publish("delete", id, None)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -325,4 +593,326 @@ def delete_child(id: int):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting child: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+# =========================================================
+# Batched Ingest (WebSocket)
+# =========================================================
+@router.websocket("/ingest")
+async def ingest_children(websocket: WebSocket):
+    """
+    Streams batches of inserts and updates over a WebSocket.
+
+    On connect the server sends `{"type": "ready", "window": W, "max_batch": M}`.
+    Each batch is a JSON frame `{"seq": n, "ops": [...]}` where every op is
+    `{"op": "insert", "child": {...}}` or `{"op": "update", "id": 5, "changes": {...}}`.
+    A batch is applied in order under a single write-lock acquisition and
+    acknowledged with `{"type": "ack", "seq": n, "applied": k, "failed": f, "errors": [...]}`;
+    invalid or rejected ops are listed by index without failing the batch.
+
+    Keep at most W batches unacknowledged: when the server falls behind it
+    stops reading the socket and TCP pushes back on the producer. Frames that
+    are not a batch close the connection (1007, or 1009 above M ops).
+    """
+    await ingest_session(websocket, children_bst, engine_lock, change_feed)
+
+# =========================================================
+# Age Queries (range / youngest / oldest)
+# =========================================================
+def _check_cursor(cursor: Optional[int]):
+    """Validates that the cursor refers to an existing child."""
+    if cursor is not None and children_bst.search(cursor) is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid cursor: child with ID {cursor} not found"
+        )
+
+
+def _page(items: List[Child], limit: int) -> Response:
+    """Builds a page from up to limit + 1 items (the extra one signals more results)."""
+    has_more = len(items) > limit
+    items = items[:limit]
+    return page_json(items, items[-1].id if has_more else None)
+
+
+PAGE_EXAMPLE = {
+    200: {
+        "description": "Page of children",
+        "content": {
+            "application/json": {
+                "example": {
+                    "items": [
+                        {"id": 1001, "name": "John Doe", "age": 5, "gender": "M"},
+                        {"id": 1002, "name": "Jane Smith", "age": 6, "gender": "F"}
+                    ],
+                    "next_cursor": 1002
+                }
+            }
+        }
+    }
+}
+
+
+@router.get(
+    "/age/range",
+    response_model=ChildPage,
+    summary="List children within an age range (BST)",
+    description="Returns children with lo <= age <= hi in ascending age order, using a pruned descent of the BST.",
+    responses=PAGE_EXAMPLE
+)
+async def range_by_age(
+    lo: int = Query(..., ge=0, le=18, description="Minimum age (inclusive)"),
+    hi: int = Query(..., ge=0, le=18, description="Maximum age (inclusive)"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of children to return"),
+    cursor: Optional[int] = Query(None, description="Continue after the child with this ID (next_cursor of the previous page)")
+):
+    """
+    Lists children within an age range, paginated with a cursor.
+    
+    Args:
+        lo: Minimum age (inclusive)
+        hi: Maximum age (inclusive)
+        limit: Page size
+        cursor: ID of the last child of the previous page
+        
+    Returns:
+        ChildPage: Children in the range and the cursor for the next page
+        
+    Raises:
+        HTTPException: If the range or cursor is invalid or server error occurs
+    """
+    try:
+        if lo > hi:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid age range: 'lo' must be less than or equal to 'hi'"
+            )
+        _check_cursor(cursor)
+        return _page(children_bst.range_by_age(lo, hi, limit + 1, cursor), limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error querying age range: {str(e)}"
+        )
+
+
+@router.get(
+    "/age/youngest",
+    response_model=ChildPage,
+    summary="List the youngest children (BST)",
+    description="Returns the youngest children in ascending age order.",
+    responses=PAGE_EXAMPLE
+)
+async def youngest_children(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of children to return"),
+    cursor: Optional[int] = Query(None, description="Continue after the child with this ID (next_cursor of the previous page)")
+):
+    """
+    Lists the youngest children, paginated with a cursor.
+    
+    Args:
+        limit: Page size
+        cursor: ID of the last child of the previous page
+        
+    Returns:
+        ChildPage: The youngest children and the cursor for the next page
+        
+    Raises:
+        HTTPException: If the cursor is invalid or server error occurs
+    """
+    try:
+        _check_cursor(cursor)
+        return _page(children_bst.youngest(limit + 1, cursor), limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error querying youngest children: {str(e)}"
+        )
+
+
+@router.get(
+    "/age/oldest",
+    response_model=ChildPage,
+    summary="List the oldest children (BST)",
+    description="Returns the oldest children in descending age order.",
+    responses=PAGE_EXAMPLE
+)
+async def oldest_children(
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of children to return"),
+    cursor: Optional[int] = Query(None, description="Continue after the child with this ID (next_cursor of the previous page)")
+):
+    """
+    Lists the oldest children, paginated with a cursor.
+    
+    Args:
+        limit: Page size
+        cursor: ID of the last child of the previous page
+        
+    Returns:
+        ChildPage: The oldest children and the cursor for the next page
+        
+    Raises:
+        HTTPException: If the cursor is invalid or server error occurs
+    """
+    try:
+        _check_cursor(cursor)
+        return _page(children_bst.oldest(limit + 1, cursor), limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error querying oldest children: {str(e)}"
+        )
+
+# =========================================================
+# Get BST Statistics
+# =========================================================
+@router.get(
+    "/stats/tree",
+    summary="Get BST statistics",
+    description="Returns information about the BST (height, node count, self-rebuilding, adaptive promotion and tombstone activity).",
+    responses={
+        200: {
+            "description": "Tree statistics",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "tree_height": 4,
+                        "total_nodes": 10,
+                        "self_rebuilding": True,
+                        "adaptive": True,
+                        "promoted": True,
+                        "rebuild_count": 2,
+                        "lazy_delete": True,
+                        "tombstones": 3,
+                        "compaction_count": 1,
+                        "tree_type": "Binary Search Tree (Scapegoat rebuilding)"
+                    }
+                }
+            }
+        }
+    }
+)
+async def get_tree_stats():
+    """
+    Gets statistics about the BST.
+    
+    - **tree_height**: Height of the tree
+    - **total_nodes**: Total number of nodes
+    - **self_rebuilding**: Whether scapegoat-style rebuilding is enabled
+    - **adaptive**: Whether the tree promotes itself when it degenerates
+    - **promoted**: Whether the adaptive tree has already been promoted
+    - **rebuild_count**: Number of subtree rebuilds performed
+    - **lazy_delete**: Whether deletes only mark nodes (tombstones)
+    - **tombstones**: Number of marked nodes awaiting compaction
+    - **compaction_count**: Number of background compactions performed
+    - **tree_type**: Type of tree used
+    """
+    try:
+        return {
+            "tree_height": children_bst.height(),
+            "total_nodes": children_bst.size,
+            "self_rebuilding": children_bst.self_rebuilding,
+            "adaptive": children_bst.adaptive,
+            "promoted": children_bst.promoted,
+            "rebuild_count": children_bst.rebuild_count,
+            "lazy_delete": children_bst.lazy_delete,
+            "tombstones": children_bst.tombstones,
+            "compaction_count": children_bst.compaction_count,
+            "tree_type": (
+                "Binary Search Tree (Scapegoat rebuilding)"
+                if children_bst.self_rebuilding
+                else "Binary Search Tree"
+            )
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error getting tree statistics: {str(e)}"
+        )
+
+
+# =========================================================
+# Get BST Memory Usage
+# =========================================================
+@router.get(
+    "/stats/memory",
+    summary="Estimate memory usage (BST)",
+    description="Sampled estimate of the memory held by the tree: nodes, child records, name strings, indexes and caches. Optional tracemalloc deep mode.",
+    responses={
+        200: {
+            "description": "Memory estimate",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "engine": "ChildrenBST",
+                        "nodes": 200000,
+                        "sampled": 256,
+                        "bytes_per_node": 165.0,
+                        "bytes_per_record": 508.0,
+                        "bytes_per_name": 100.6,
+                        "estimated_bytes": 167205848,
+                        "breakdown": {
+                            "nodes": 33000000,
+                            "records": 101600000,
+                            "names": 20120000,
+                            "indexes": 10485848,
+                            "caches": 2000000
+                        },
+                        "indexes": {"id_index": 10485848},
+                        "caches": {"columnar": 2000000, "change_feed": 0},
+                        "elapsed_ms": 3.1
+                    }
+                }
+            }
+        },
+        403: {"model": ErrorResponse, "description": "Deep mode is disabled"}
+    }
+)
+async def get_memory_stats(
+    sample: int = Query(settings.memory_sample_size, ge=1, le=100000, description="Nodes sampled for the estimate"),
+    deep: bool = Query(False, description="Add tracemalloc statistics (requires CHILDREN_MEMORY_DEEP_ENABLED=true)"),
+    top: int = Query(10, ge=1, le=100, description="Entries in each deep-mode ranking")
+):
+    """
+    Estimates the memory held by the BST from a random sample of nodes.
+    
+    - **bytes_per_node**: Tree node object (calibrated once) plus its version
+    - **bytes_per_record**: Child model, its attribute dict and fields set, and the id
+    - **bytes_per_name**: Name strings; names shared between children (pydantic-core
+      reuses repeated short strings) are counted once
+    - **indexes** / **caches**: Id index, columnar view and change feed buffer
+    
+    Measuring the sample is O(sample). Picking it is a systematic skip over
+    the id index: an O(n) scan, but done in C by islice (about 7 ms per
+    million children), so no node is visited from Python.
+    
+    With **deep=true** the response also carries tracemalloc statistics (top
+    allocation lines and files, and the difference against the previous deep
+    call). Tracing starts on the first deep call and only sees later
+    allocations; start the server with `PYTHONTRACEMALLOC=1` to include the
+    tree itself.
+    """
+    try:
+        if deep and not settings.memory_deep_enabled:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Deep memory mode is disabled (set CHILDREN_MEMORY_DEEP_ENABLED=true)"
+            )
+        # Sampling never yields to the event loop, so no write can interleave with it
+        report = estimate_memory(children_bst, sample, change_feed)
+        if deep:
+            report["deep"] = await asyncio.to_thread(traced_memory, top)
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error estimating memory usage: {str(e)}"
+        )
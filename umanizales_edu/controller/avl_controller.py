@@ -1,7 +1,27 @@
-from fastapi import APIRouter, HTTPException, Query, status
-from typing import List, Literal, Optional
-from ..model.schemas import Child, ChildUpdate, ChildResponse, MessageResponse, ErrorResponse
+import asyncio
+from itertools import chain
+from operator import attrgetter
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, WebSocket, status
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Tuple
+from ..config import settings
+from ..model.schemas import (
+    AnalyticsResponse, Child, ChildUpdate, ChildResponse, ChangePage, ImportReport, MessageResponse, ErrorResponse,
+    ReconcileResponse
+)
 from ..service.avl_service import children_avl
+from ..service.bulk_import import get_executor, validate_stream
+from ..service.changefeed import ChangeFeed
+from ..service.columnar import analyze
+from ..service.concurrency import ShardedRWLock, SingleFlight, collect
+from ..service.memory import estimate_memory, traced_memory
+from ..profiling import ProfiledRoute
+from .export import EXPORTS, export_available, export_stream, snapshot_children
+from .ingest import ingest_session
+from .serialization import (
+    body_schema, change_stream, changes_json, child_json, children_bytes, etag_matches, json_body,
+    listing_json, make_etag, not_modified, resync_required
+)
 
 router = APIRouter(
     prefix="/children/avl",
@@ -10,9 +30,33 @@ router = APIRouter(
         404: {"model": ErrorResponse, "description": "Child not found"},
         400: {"model": ErrorResponse, "description": "Validation error"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
-    }
+    },
+    route_class=ProfiledRoute
 )
 
+# Las escrituras excluyen a los recorridos largos, que ceden el event loop; con
+# el almacén particionado, una escritura puntual solo espera por su fragmento
+engine_lock = ShardedRWLock(len(children_avl.partitions()))
+
+# Registro de cambios para sincronización incremental (/changes)
+change_feed = ChangeFeed(settings.change_feed_capacity)
+
+# Desalojo en curso del almacén por niveles (las lecturas solo suben niños a memoria)
+evictions = {"task": None}
+
+
+async def _evict_cold() -> None:
+    """Desalojar lo que subieron las lecturas, con el candado de escritura y el disco en un hilo"""
+    async with engine_lock.write():
+        await children_avl.evict()
+
+
+def schedule_eviction() -> None:
+    """Lanzar el desalojo en segundo plano si el nivel caliente se llenó y no hay uno en curso"""
+    task = evictions["task"]
+    if children_avl.eviction_pending and (task is None or task.done()):
+        evictions["task"] = asyncio.create_task(_evict_cold())
+
 # ---------------------------------------------------------
 # Create child
 # ---------------------------------------------------------
@@ -20,6 +64,7 @@ router = APIRouter(
     "/",
     response_model=ChildResponse,
     status_code=status.HTTP_201_CREATED,
+    openapi_extra=body_schema(Child),
     summary="Insert a new child (AVL)",
     description="Inserts a new child into the self-balancing AVL Tree. ID must be unique. The tree automatically rebalances after insertion.",
     responses={
@@ -46,7 +91,7 @@ router = APIRouter(
         }
     }
 )
-def create_child(child: Child):
+async def create_child(child: Child = Depends(json_body(Child))):
     """
     Inserts a new child into the AVL Tree.
     
@@ -59,13 +104,16 @@ def create_child(child: Child):
     - **gender**: Gender of the child (M/F/O)
     """
     try:
-        success = children_avl.insert(child)
+        async with engine_lock.shard(child.id).write():
+            success = children_avl.insert(child)
+            if success:
+                change_feed.publish("insert", child.id, child)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Child with ID {child.id} already exists"
             )
-        return child
+        return child_json(child, status.HTTP_201_CREATED)
     except HTTPException:
         raise
     except Exception as e:
@@ -74,6 +122,213 @@ def create_child(child: Child):
             detail=f"Error inserting child: {str(e)}"
         )
 
+# ---------------------------------------------------------
+# Change feed (long-poll)
+# ---------------------------------------------------------
+@router.get(
+    "/changes",
+    response_model=ChangePage,
+    summary="Poll changes since a sequence number (AVL)",
+    description="Returns the insert/update/delete events after `since`, waiting up to `timeout` seconds for new ones (long-poll).",
+    responses={
+        410: {
+            "description": "The requested events are no longer buffered: resync with a full listing",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "detail": "Changes after seq 10 are no longer available; resync with a full listing",
+                        "resync_required": True,
+                        "last_seq": 25000
+                    }
+                }
+            }
+        }
+    }
+)
+async def poll_changes(
+    since: int = Query(..., ge=0, description="Last sequence number already applied (X-Change-Seq of a full listing)"),
+    timeout: float = Query(30, ge=0, le=60, description="Seconds to wait for new events when there are none")
+):
+    """
+    Incremental sync: apply the returned events in order and poll again with
+    `since=last_seq`. A full listing (`GET /`) returns its position in the
+    `X-Change-Seq` header. A 410 response means the consumer fell behind the
+    buffer and must list everything again.
+    """
+    events = await change_feed.wait(since, timeout)
+    if events is None:
+        return resync_required(since, change_feed.last_seq)
+    return changes_json(events, events[-1][0] if events else since)
+
+
+# ---------------------------------------------------------
+# Change feed (Server-Sent Events)
+# ---------------------------------------------------------
+@router.get(
+    "/changes/stream",
+    summary="Stream changes as Server-Sent Events (AVL)",
+    description="Streams insert/update/delete events as `text/event-stream`. Sends a `resync` event and closes if the consumer is too far behind.",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/event-stream": {}}}}
+)
+async def stream_changes(
+    since: Optional[int] = Query(None, ge=0, description="Last sequence number already applied (default: only new events)"),
+    last_event_id: Optional[int] = Header(None, description="Sent by EventSource when reconnecting; overrides `since`")
+):
+    """
+    Server-Sent Events version of the change feed. Each event carries its
+    sequence number as `id`, the operation as `event` and the change as JSON
+    `data`. Comment lines are sent periodically to keep the connection open.
+    """
+    start = last_event_id if last_event_id is not None else since
+    if start is None:
+        start = change_feed.last_seq
+    return StreamingResponse(
+        change_stream(change_feed, start, keepalive=settings.change_feed_keepalive),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+# ---------------------------------------------------------
+# Export (CSV / NDJSON / columnar)
+# ---------------------------------------------------------
+@router.get(
+    "/export",
+    summary="Stream all children as CSV, NDJSON or columnar (AVL)",
+    description="Streams the store directly from a tree traversal in chunks, without building the JSON list. `columnar` returns a zip of typed NumPy `.npy` columns (load it with `numpy.load`); `arrow` returns an Arrow IPC stream and requires pyarrow on the server.",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Export file (sent as an attachment)",
+            "content": {
+                "text/csv": {"example": "id,age,name,gender\n1001,10,John Doe,M\n"},
+                "application/x-ndjson": {},
+                "application/zip": {},
+                "application/vnd.apache.arrow.stream": {}
+            }
+        },
+        501: {
+            "description": "Arrow export requested but pyarrow is not installed",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Arrow export requires pyarrow; use format=columnar"}
+                }
+            }
+        }
+    }
+)
+async def export_children(
+    format: Literal["csv", "ndjson", "columnar", "arrow"] = Query("csv", description="Output format"),
+    order: Literal["in", "pre", "post"] = Query("in", description="Traversal order of the rows")
+):
+    """
+    Exports every child as a stream.
+    
+    The traversal is collected as references under the read lock, which is
+    released before the download starts: a slow client does not hold up
+    writes, and since updates replace children instead of mutating them every
+    row still belongs to a single tree version. Rows are encoded chunk by
+    chunk while sending.
+    
+    - **csv**: Header `id,age,name,gender`, one row per child
+    - **ndjson**: One JSON object per line
+    - **columnar**: `.npz` with `id` (int64), `age` (uint8), `gender` (int8 codes into
+      `gender_categories`) and names as UTF-8 `name_data` + `name_offsets`
+    - **arrow**: Arrow IPC stream, one record batch per chunk
+    """
+    if not export_available(format):
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow export requires pyarrow; use format=columnar"
+        )
+    traversals = {
+        "in": children_avl.iter_inorder,
+        "pre": children_avl.iter_preorder,
+        "post": children_avl.iter_postorder
+    }
+    children = await snapshot_children(engine_lock, traversals[order])
+    media_type, filename = EXPORTS[format]
+    return StreamingResponse(
+        export_stream(format, children),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+# ---------------------------------------------------------
+# Analytics (columnar snapshot)
+# ---------------------------------------------------------
+@router.get(
+    "/analytics",
+    response_model=AnalyticsResponse,
+    summary="Filter and aggregate children with vectorized queries (AVL)",
+    description="Answers filtered counts, age percentiles and gender ratios per age band from a NumPy columnar snapshot of the tree. The snapshot is built with one traversal and cached until the tree version changes.",
+    responses={
+        200: {
+            "description": "Aggregates over the selected children",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "version": 42,
+                        "total": 5,
+                        "count": 3,
+                        "age": {"min": 6, "max": 12, "mean": 9.0, "percentiles": {"p50": 9.0}},
+                        "genders": {"M": 2, "F": 1, "Otro": 0},
+                        "bands": [
+                            {"min_age": 5, "max_age": 9, "count": 2, "genders": {"M": 1, "F": 1, "Otro": 0},
+                             "ratios": {"M": 0.5, "F": 0.5, "Otro": 0.0}},
+                            {"min_age": 10, "max_age": 14, "count": 1, "genders": {"M": 1, "F": 0, "Otro": 0},
+                             "ratios": {"M": 1.0, "F": 0.0, "Otro": 0.0}}
+                        ]
+                    }
+                }
+            }
+        },
+        400: {
+            "description": "Invalid percentile",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Percentiles must be between 0 and 100"}
+                }
+            }
+        }
+    }
+)
+async def children_analytics(
+    min_age: Optional[int] = Query(None, ge=0, le=18, description="Minimum age (inclusive)"),
+    max_age: Optional[int] = Query(None, ge=0, le=18, description="Maximum age (inclusive)"),
+    gender: Optional[List[Literal["M", "F", "Otro"]]] = Query(None, description="Genders to include (repeatable)"),
+    min_id: Optional[int] = Query(None, description="Minimum ID (inclusive)"),
+    max_id: Optional[int] = Query(None, description="Maximum ID (inclusive)"),
+    percentile: List[float] = Query([25, 50, 75, 90], description="Age percentiles to compute (repeatable)"),
+    band: int = Query(5, ge=1, le=19, description="Width of the age bands in years")
+):
+    """
+    Analytical queries over the whole store without walking Python objects.
+    
+    Filters are combined with AND. The first query after a write rebuilds the
+    snapshot (one traversal, off the event loop); later queries at the same
+    tree version reuse it.
+    
+    - **count**: Children matching the filters
+    - **age**: min / max / mean and the requested percentiles
+    - **genders**: Count per gender
+    - **bands**: Count and ratio per gender for each age band
+    """
+    try:
+        async with engine_lock.read():
+            snapshot = await asyncio.to_thread(children_avl.columnar_snapshot)
+        return analyze(snapshot, min_age, max_age, gender, min_id, max_id, percentile, band)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error computing analytics: {str(e)}"
+        )
+
+
 # ---------------------------------------------------------
 # Get child by ID
 # ---------------------------------------------------------
@@ -83,6 +338,7 @@ def create_child(child: Child):
     summary="Get a child by ID (AVL)",
     description="Finds and returns a specific child by their ID. Search is optimized by the AVL tree's balancing.",
     responses={
+        304: {"description": "Not modified: If-None-Match matches the current ETag"},
         200: {
             "description": "Child found",
             "content": {
@@ -106,7 +362,7 @@ def create_child(child: Child):
         }
     }
 )
-def get_child(id: int):
+async def get_child(id: int, request: Request):
     """
     Retrieves a child by their ID.
     
@@ -115,13 +371,19 @@ def get_child(id: int):
     - **id**: The unique identifier of the child to retrieve
     """
     try:
-        child = children_avl.search(id)
-        if child is None:
+        found = children_avl.search_with_version(id)
+        if settings.tiered_hot_capacity:
+            schedule_eviction()
+        if found is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Child with ID {id} not found"
             )
-        return child
+        child, version = found
+        etag = make_etag(id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return child_json(child, etag=etag)
     except HTTPException:
         raise
     except Exception as e:
@@ -136,6 +398,7 @@ def get_child(id: int):
 @router.put(
     "/{id}",
     response_model=ChildResponse,
+    openapi_extra=body_schema(ChildUpdate),
     summary="Update a child (AVL)",
     description="Updates the data of an existing child. The 'id' field cannot be modified.",
     responses={
@@ -170,7 +433,7 @@ def get_child(id: int):
         }
     }
 )
-def update_child(id: int, child_update: ChildUpdate):
+async def update_child(id: int, child_update: ChildUpdate = Depends(json_body(ChildUpdate))):
     """
     Updates an existing child's information.
     
@@ -181,20 +444,22 @@ def update_child(id: int, child_update: ChildUpdate):
     """
     try:
         # Ensure at least one field is being updated
-        update_data = child_update.dict(exclude_unset=True)
-        if not update_data:
+        if not child_update.model_fields_set:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No update data provided"
             )
 
-        updated_child = children_avl.update(id, child_update)
+        async with engine_lock.shard(id).write():
+            updated_child = children_avl.update(id, child_update)
+            if updated_child is not None:
+                change_feed.publish("update", id, updated_child)
         if updated_child is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Child with ID {id} not found"
             )
-        return updated_child
+        return child_json(updated_child)
     except HTTPException:
         raise
     except Exception as e:
@@ -203,6 +468,40 @@ def update_child(id: int, child_update: ChildUpdate):
             detail=f"Error updating child: {str(e)}"
         )
 
+# Recorrido de cada parte del almacén (un fragmento, o el árbol completo si no está particionado)
+LIST_TRAVERSALS = {
+    "in": attrgetter("iter_inorder"),
+    "pre": attrgetter("iter_preorder"),
+    "post": attrgetter("iter_postorder")
+}
+
+# Coalescencia de listados idénticos concurrentes (misma orden y versión del árbol)
+list_flight = SingleFlight("avl_list")
+
+
+async def _encoded_listing(order: str) -> Tuple[str, int, bytes]:
+    """Recorrer bajo el candado de lectura y codificar: (ETag, secuencia del registro de cambios, cuerpo)
+
+    Cada fragmento se suelta en cuanto termina su recorrido, así que sus
+    escrituras no esperan al resto del listado; el inorden global se ordena
+    por id después.
+    """
+    async with engine_lock.read() as release:
+        etag = make_etag(order, children_avl.version)
+        seq = change_feed.last_seq
+        parts = []
+        for index, partition in enumerate(children_avl.partitions()):
+            parts.append(await collect(LIST_TRAVERSALS[order](partition)()))
+            await release(index)
+    if len(parts) == 1:
+        children = parts[0]
+    elif order == "in":
+        # Timsort reconoce las partes ya ordenadas: mezclarlas así es más barato que heapq.merge
+        children = sorted(chain.from_iterable(parts), key=attrgetter("id"))
+    else:
+        children = list(chain.from_iterable(parts))
+    return etag, seq, children_bytes(children)
+
 # ---------------------------------------------------------
 # List all children
 # ---------------------------------------------------------
@@ -212,6 +511,7 @@ def update_child(id: int, child_update: ChildUpdate):
     summary="List all children (AVL)",
     description="Returns a list of all children using the specified traversal order (inorder, preorder, or postorder) of the balanced AVL tree.",
     responses={
+        304: {"description": "Not modified: If-None-Match matches the current ETag"},
         200: {
             "description": "List of children",
             "content": {
@@ -235,7 +535,8 @@ def update_child(id: int, child_update: ChildUpdate):
         }
     }
 )
-def list_children(
+async def list_children(
+    request: Request,
     order: Literal["in", "pre", "post"] = Query(
         "in",
         description="AVL tree traversal order: 'in' (inorder), 'pre' (preorder), 'post' (postorder)"
@@ -251,12 +552,15 @@ def list_children(
     The AVL tree ensures it remains balanced, making traversals efficient.
     """
     try:
-        if order == "in":
-            return children_avl.inorder_traversal()
-        elif order == "pre":
-            return children_avl.preorder_traversal()
-        elif order == "post":
-            return children_avl.postorder_traversal()
+        if order in LIST_TRAVERSALS:
+            # The ETag depends only on the tree version, so a 304 skips traversal and serialization
+            version = children_avl.version
+            etag = make_etag(order, version)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            # Concurrent identical requests share one traversal and the same encoded bytes
+            etag, seq, body = await list_flight.do((order, version), lambda: _encoded_listing(order))
+            return listing_json(body, etag, seq)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -297,7 +601,7 @@ def list_children(
         }
     }
 )
-def delete_child(id: int):
+async def delete_child(id: int):
     """
     Deletes a child from the system.
     
@@ -307,7 +611,10 @@ def delete_child(id: int):
     - **id**: The ID of the child to delete
     """
     try:
-        deleted = children_avl.delete(id)
+        async with engine_lock.shard(id).write():
+            deleted = children_avl.delete(id)
+            if deleted:
+                change_feed.publish("delete", id, None)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -322,6 +629,176 @@ def delete_child(id: int):
             detail=f"Error deleting child: {str(e)}"
         )
 
+# ---------------------------------------------------------
+# Reconcile against an external roster
+# ---------------------------------------------------------
+@router.post(
+    "/reconcile",
+    response_model=ReconcileResponse,
+    openapi_extra=body_schema(List[Child]),
+    summary="Compare the tree with an external roster (AVL)",
+    description="Returns the IDs that would be added, removed or changed to make the tree match the roster. The tree is not modified.",
+    responses={
+        200: {
+            "description": "Differences between the roster and the tree",
+            "content": {
+                "application/json": {
+                    "example": {"added": [1004], "removed": [1002], "changed": [1001], "unchanged": 2}
+                }
+            }
+        },
+        400: {
+            "description": "Duplicate ID in the roster",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Duplicate child ID 1001 in roster"}
+                }
+            }
+        }
+    }
+)
+async def reconcile_children(roster: List[Child] = Depends(json_body(List[Child]))):
+    """
+    Reconciles the AVL tree against a roster using join-based set operations.
+    
+    The roster is bulk-loaded into a temporary AVL tree and compared with
+    `difference` / `intersection`, which cost O(m log(n/m + 1)) instead of
+    diffing two full listings.
+    
+    - **added**: IDs only in the roster
+    - **removed**: IDs only in the tree
+    - **changed**: IDs in both whose name, age or gender differ
+    """
+    roster.sort(key=lambda child: child.id)
+    for previous, child in zip(roster, roster[1:]):
+        if previous.id == child.id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Duplicate child ID {child.id} in roster"
+            )
+    try:
+        added, removed, changed = children_avl.reconcile(roster)
+        return {
+            "added": added,
+            "removed": removed,
+            "changed": changed,
+            "unchanged": len(roster) - len(added) - len(changed)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reconciling children: {str(e)}"
+        )
+
+# ---------------------------------------------------------
+# Batched ingest (WebSocket)
+# ---------------------------------------------------------
+@router.websocket("/ingest")
+async def ingest_children(websocket: WebSocket):
+    """
+    Streams batches of inserts and updates over a WebSocket.
+
+    On connect the server sends `{"type": "ready", "window": W, "max_batch": M}`.
+    Each batch is a JSON frame `{"seq": n, "ops": [...]}` where every op is
+    `{"op": "insert", "child": {...}}` or `{"op": "update", "id": 5, "changes": {...}}`.
+    A batch is applied in order under a single write-lock acquisition and
+    acknowledged with `{"type": "ack", "seq": n, "applied": k, "failed": f, "errors": [...]}`;
+    invalid or rejected ops are listed by index without failing the batch.
+
+    Keep at most W batches unacknowledged: when the server falls behind it
+    stops reading the socket and TCP pushes back on the producer. Frames that
+    are not a batch close the connection (1007, or 1009 above M ops).
+    """
+    await ingest_session(websocket, children_avl, engine_lock, change_feed)
+
+# ---------------------------------------------------------
+# Bulk import (CSV / NDJSON)
+# ---------------------------------------------------------
+# Pool de procesos compartido por todas las importaciones de este proceso
+import_executor = get_executor()
+
+@router.post(
+    "/import",
+    response_model=ImportReport,
+    summary="Bulk import children from CSV or NDJSON (AVL)",
+    description="Streams the request body in chunks, validates them in a process pool and bulk-builds the valid rows into the tree. Invalid rows are reported without aborting the import; IDs already in the tree are skipped.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string"}, "example": '{"id": 1001, "age": 10, "name": "John Doe", "gender": "M"}\n'},
+                "text/csv": {"schema": {"type": "string"}, "example": "id,age,name,gender\n1001,10,John Doe,M\n"}
+            }
+        }
+    },
+    responses={
+        200: {
+            "description": "Import summary",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "rows": 3,
+                        "imported": 1,
+                        "duplicates": 1,
+                        "failed": 1,
+                        "errors": [{"row": 4, "error": "age: Input should be less than or equal to 18"}]
+                    }
+                }
+            }
+        },
+        400: {
+            "description": "Invalid CSV header",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "CSV header must contain the columns id, age, name, gender; got id, name"}
+                }
+            }
+        }
+    }
+)
+async def import_children(request: Request, format: Literal["csv", "ndjson"] = Query("ndjson")):
+    """
+    Imports a large roster in a single request.
+    
+    The body is read in chunks of `CHILDREN_IMPORT_CHUNK_ROWS` lines, so memory
+    for the input stays bounded regardless of file size. Validation runs in a
+    process pool (one process per core by default) outside the engine lock;
+    only the final merge into the tree takes the write lock.
+    
+    - **format**: `ndjson` (one child object per line) or `csv` (header with id, age, name, gender)
+    - **rows**: Rows read
+    - **imported**: Children inserted
+    - **duplicates**: Valid rows skipped because the ID already existed or repeated in the file
+    - **failed**: Rows rejected by validation (the first ones are listed in **errors**)
+    """
+    try:
+        try:
+            result = await validate_stream(request.stream(), format, import_executor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        async with engine_lock.write():
+            inserted = children_avl.bulk_insert(result.children)
+            # Un lote mayor que el buffer lo desbordaría: se pide resincronizar
+            if len(inserted) > settings.change_feed_capacity:
+                change_feed.invalidate()
+            else:
+                for child in inserted:
+                    change_feed.publish("insert", child.id, child)
+        return {
+            "rows": result.rows,
+            "imported": len(inserted),
+            "duplicates": result.duplicates + len(result.children) - len(inserted),
+            "failed": result.failed,
+            "errors": [{"row": row, "error": error} for row, error in result.errors]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error importing children: {str(e)}"
+        )
+
 # ---------------------------------------------------------
 # Get AVL tree statistics
 # ---------------------------------------------------------
@@ -345,13 +822,16 @@ def delete_child(id: int):
         }
     }
 )
-def get_tree_stats():
+async def get_tree_stats():
     """
     Gets statistics about the AVL tree.
     
     - **tree_height**: Height of the tree
     - **total_nodes**: Total number of nodes
     - **is_balanced**: Indicates if the tree is balanced (always True for AVL)
+    - **shards**: Number of id partitions (1 = single tree; height is the tallest shard)
+    - **tiers**: Hot tier and disk segment statistics when tiered storage is enabled
+      (height and balance then describe the in-memory tier)
     - **tree_type**: Type of tree used
     """
     try:
@@ -359,6 +839,8 @@ def get_tree_stats():
             "tree_height": children_avl.height(),
             "total_nodes": children_avl.count_nodes(),
             "is_balanced": children_avl.is_balanced(),
+            "shards": settings.avl_shards,
+            "tiers": children_avl.tier_stats() if settings.tiered_hot_capacity else None,
             "tree_type": "AVL Tree (Self-balancing)"
         }
     except Exception as e:
@@ -366,3 +848,80 @@ def get_tree_stats():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error getting tree statistics: {str(e)}"
         )
+
+# ---------------------------------------------------------
+# Memory usage
+# ---------------------------------------------------------
+@router.get(
+    "/stats/memory",
+    summary="Estimate memory usage (AVL)",
+    description="Sampled estimate of the memory held by the tree: nodes, child records, name strings, indexes and caches. Optional tracemalloc deep mode.",
+    responses={
+        200: {
+            "description": "Memory estimate",
+            "content": {
+                "application/json": {
+                    "example": {
+                        "engine": "ChildrenAVL",
+                        "nodes": 200000,
+                        "sampled": 256,
+                        "bytes_per_node": 137.0,
+                        "bytes_per_record": 508.0,
+                        "bytes_per_name": 100.6,
+                        "estimated_bytes": 151120000,
+                        "breakdown": {
+                            "nodes": 27400000,
+                            "records": 101600000,
+                            "names": 20120000,
+                            "indexes": 0,
+                            "caches": 2000000
+                        },
+                        "indexes": {},
+                        "caches": {"columnar": 2000000, "change_feed": 0},
+                        "elapsed_ms": 3.1
+                    }
+                }
+            }
+        },
+        403: {"model": ErrorResponse, "description": "Deep mode is disabled"}
+    }
+)
+async def get_memory_stats(
+    sample: int = Query(settings.memory_sample_size, ge=1, le=100000, description="Nodes sampled for the estimate"),
+    deep: bool = Query(False, description="Add tracemalloc statistics (requires CHILDREN_MEMORY_DEEP_ENABLED=true)"),
+    top: int = Query(10, ge=1, le=100, description="Entries in each deep-mode ranking")
+):
+    """
+    Estimates the memory held by the AVL store (every shard, or the hot tier plus in-memory segment metadata) from a random sample of nodes.
+    
+    - **bytes_per_node**: Tree node object (calibrated once) plus its version
+    - **bytes_per_record**: Child model, its attribute dict and fields set, and the id
+    - **bytes_per_name**: Name strings; names shared between children (pydantic-core
+      reuses repeated short strings) are counted once
+    - **indexes** / **caches**: Tiered storage LRU, tombstones and segment filters, columnar view and change feed buffer
+    
+    Cost is O(sample · log n): each sampled node is picked by rank using the
+    subtree counts. With **deep=true** the response also carries tracemalloc
+    statistics (top allocation lines and files, and the difference against
+    the previous deep call). Tracing starts on the first deep call and only
+    sees later allocations; start the server with `PYTHONTRACEMALLOC=1` to
+    include the tree itself.
+    """
+    try:
+        if deep and not settings.memory_deep_enabled:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Deep memory mode is disabled (set CHILDREN_MEMORY_DEEP_ENABLED=true)"
+            )
+        # Sampling never yields to the event loop, so no write can interleave with it
+        report = estimate_memory(children_avl, sample, change_feed)
+        if deep:
+            report["deep"] = await asyncio.to_thread(traced_memory, top)
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error estimating memory usage: {str(e)}"
+        )
@@ -0,0 +1,201 @@
+import csv
+import io
+import struct
+import sys
+import zipfile
+from array import array
+from itertools import accumulate, islice
+from operator import attrgetter
+from typing import AsyncIterator, Callable, Iterator, List, Union
+
+from pydantic import TypeAdapter
+
+from ..config import settings
+from ..model.schemas import Child
+from ..service.columnar import GENDER_CODES, GENDERS
+from ..service.concurrency import AsyncRWLock, ShardedRWLock, collect
+
+try:
+    import pyarrow
+except ImportError:  # dependencia opcional: sin pyarrow no hay exportación Arrow
+    pyarrow = None
+
+Traversal = Callable[[], Iterator[Child]]
+
+EXPORTS = {
+    "csv": ("text/csv; charset=utf-8", "children.csv"),
+    "ndjson": ("application/x-ndjson", "children.ndjson"),
+    "columnar": ("application/zip", "children.npz"),
+    "arrow": ("application/vnd.apache.arrow.stream", "children.arrows"),
+}
+
+_children_adapter = TypeAdapter(List[Child])
+_row = attrgetter("id", "age", "name", "gender")
+_id, _age, _name, _gender = (attrgetter(field) for field in ("id", "age", "name", "gender"))
+_ENDIAN = "<" if sys.byteorder == "little" else ">"
+
+
+def _chunks(traversal: Traversal, chunk_size: int) -> Iterator[List[Child]]:
+    iterator = traversal()
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+async def snapshot_children(lock: Union[AsyncRWLock, ShardedRWLock], traversal: Traversal) -> List[Child]:
+    """Tomar las referencias a los niños del recorrido bajo el candado de lectura
+
+    Las actualizaciones reemplazan al niño en lugar de modificarlo, así que la
+    lista sigue siendo una foto de una sola versión del árbol después de
+    soltar el candado: la descarga se envía sin candado y un cliente lento no
+    frena las escrituras. Cuesta una referencia por niño, no las filas
+    codificadas.
+    """
+    async with lock.read():
+        return await collect(traversal())
+
+
+# ==================== FORMATOS POR FILAS ====================
+
+async def csv_stream(traversal: Traversal, chunk_size: int = settings.traversal_chunk_size) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(("id", "age", "name", "gender"))
+    for chunk in _chunks(traversal, chunk_size):
+        writer.writerows(map(_row, chunk))
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def ndjson_stream(traversal: Traversal, chunk_size: int = settings.traversal_chunk_size) -> AsyncIterator[bytes]:
+    """Cada bloque se serializa como arreglo JSON en pydantic-core y se parte en líneas
+
+    La secuencia `},{"id":` solo aparece entre objetos: dentro de un string
+    JSON las comillas van escapadas.
+    """
+    for chunk in _chunks(traversal, chunk_size):
+        yield _children_adapter.dump_json(chunk)[1:-1].replace(b'},{"id":', b'}\n{"id":') + b"\n"
+
+
+# ==================== FORMATO COLUMNAR (.npy EN ZIP) ====================
+#
+# Un .npz (zip sin compresión, como np.savez) con una columna tipada por
+# archivo .npy: np.load("children.npz")["age"] devuelve el arreglo sin
+# parsear texto. Los nombres, de largo variable, van como en Arrow: los bytes
+# UTF-8 concatenados (name_data) y sus posiciones (name_offsets, n + 1
+# enteros). El formato .npy se escribe a mano (cabecera + datos crudos) para
+# poder emitir cada columna por bloques: cada columna es una pasada por el
+# recorrido y solo se codifica un bloque a la vez.
+
+def _npy_header(descr: str, length: int) -> bytes:
+    """Cabecera .npy v1.0 de un arreglo 1-D (alineada a 64 bytes, como la escribe NumPy)"""
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (descr, length)
+    header += " " * ((64 - (10 + len(header) + 1) % 64) % 64) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class _Sink(io.RawIOBase):
+    """Destino no posicionable (para zipfile y pyarrow): acumula lo escrito hasta entregarlo"""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+async def columnar_stream(traversal: Traversal, size: Callable[[], int],
+                          chunk_size: int = settings.traversal_chunk_size) -> AsyncIterator[bytes]:
+    """Exportar los niños como columnas .npy dentro de un zip, en streaming
+
+    `size` se consulta al empezar: las cabeceras .npy llevan la longitud de
+    cada columna antes que los datos.
+    """
+    length = size()
+    sink = _Sink()
+    columns = (
+        ("id", "q", "i8", lambda chunk: map(_id, chunk)),
+        ("age", "B", "u1", lambda chunk: map(_age, chunk)),
+        ("gender", "b", "i1", lambda chunk: map(GENDER_CODES.__getitem__, map(_gender, chunk))),
+    )
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for name, typecode, descr, values in columns:
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as entry:
+                entry.write(_npy_header(_ENDIAN + descr, length))
+                for chunk in _chunks(traversal, chunk_size):
+                    entry.write(array(typecode, values(chunk)).tobytes())
+                    yield sink.drain()
+
+        offset = 0
+        with archive.open("name_offsets.npy", "w", force_zip64=True) as entry:
+            entry.write(_npy_header(_ENDIAN + "i8", length + 1))
+            entry.write(array("q", (0,)).tobytes())
+            for chunk in _chunks(traversal, chunk_size):
+                offsets = array("q", accumulate((len(name.encode()) for name in map(_name, chunk)), initial=offset))
+                offset = offsets[-1]
+                entry.write(offsets[1:].tobytes())
+                yield sink.drain()
+        with archive.open("name_data.npy", "w", force_zip64=True) as entry:
+            entry.write(_npy_header("|u1", offset))
+            for chunk in _chunks(traversal, chunk_size):
+                entry.write("".join(map(_name, chunk)).encode())
+                yield sink.drain()
+
+        categories = "".join(gender.ljust(4, "\0") for gender in GENDERS).encode(f"utf-32-{sys.byteorder[0]}e")
+        archive.writestr("gender_categories.npy", _npy_header(_ENDIAN + "U4", len(GENDERS)) + categories)
+    yield sink.drain()
+
+
+# ==================== ARROW IPC (OPCIONAL) ====================
+
+async def arrow_stream(traversal: Traversal, chunk_size: int = settings.traversal_chunk_size) -> AsyncIterator[bytes]:
+    """Formato de streaming de Arrow IPC: un record batch por bloque del recorrido"""
+    schema = pyarrow.schema([
+        ("id", pyarrow.int64()),
+        ("age", pyarrow.uint8()),
+        ("gender", pyarrow.dictionary(pyarrow.int8(), pyarrow.string())),
+        ("name", pyarrow.string()),
+    ])
+    categories = pyarrow.array(GENDERS)
+    sink = _Sink()
+    writer = pyarrow.ipc.new_stream(pyarrow.PythonFile(sink, mode="w"), schema)
+    for chunk in _chunks(traversal, chunk_size):
+        writer.write_batch(pyarrow.record_batch([
+            pyarrow.array([child.id for child in chunk], pyarrow.int64()),
+            pyarrow.array([child.age for child in chunk], pyarrow.uint8()),
+            pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array([GENDER_CODES[child.gender] for child in chunk], pyarrow.int8()), categories
+            ),
+            pyarrow.array([child.name for child in chunk], pyarrow.string()),
+        ], schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def export_available(format: str) -> bool:
+    """Arrow solo está disponible si pyarrow está instalado"""
+    return format != "arrow" or pyarrow is not None
+
+
+def export_stream(format: str, children: List[Child]) -> AsyncIterator[bytes]:
+    """Generador de bytes para el formato pedido sobre la lista de `snapshot_children`"""
+    if format == "csv":
+        return csv_stream(children.__iter__)
+    if format == "ndjson":
+        return ndjson_stream(children.__iter__)
+    if format == "columnar":
+        return columnar_stream(children.__iter__, children.__len__)
+    return arrow_stream(children.__iter__)
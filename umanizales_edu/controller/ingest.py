@@ -0,0 +1,135 @@
+import asyncio
+from typing import List, NamedTuple, Tuple, Union
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import TypeAdapter, ValidationError
+
+from ..config import settings
+from ..model.schemas import IngestAck, IngestBatch, IngestInsert, IngestOperation, IngestOpError
+from ..service.bulk_import import describe_error
+from ..service.changefeed import ChangeFeed
+from ..service.concurrency import AsyncRWLock, ShardedRWLock
+
+# Códigos de cierre (RFC 6455) para los marcos que no son un lote válido
+INVALID_FRAME = 1007
+FRAME_TOO_BIG = 1009
+
+_operation_adapter = TypeAdapter(IngestOperation)
+
+
+class Batch(NamedTuple):
+    """Lote leído del socket: operaciones válidas (con su posición) y rechazadas"""
+    seq: int
+    operations: List[Tuple[int, IngestOperation]]
+    errors: List[IngestOpError]
+
+
+class Close(NamedTuple):
+    """Cierre pedido por el lector tras un marco inválido"""
+    code: int
+    reason: str
+
+
+def parse_batch(frame: Union[str, bytes], max_batch: int) -> Union[Batch, Close]:
+    """Validar el sobre del lote y cada operación por separado
+
+    Una operación inválida solo se reporta en la confirmación; un marco que no
+    es un lote (JSON inválido, sin `seq` o con más de `max_batch` operaciones)
+    cierra la conexión, porque el productor no puede asociarlo a una confirmación.
+    """
+    try:
+        batch = IngestBatch.model_validate_json(frame)
+    except ValidationError as e:
+        return Close(INVALID_FRAME, describe_error(e, "batch")[:120])
+    if len(batch.ops) > max_batch:
+        return Close(FRAME_TOO_BIG, f"Batch {batch.seq} has {len(batch.ops)} operations (max {max_batch})")
+    operations, errors = [], []
+    for index, raw in enumerate(batch.ops):
+        try:
+            operations.append((index, _operation_adapter.validate_python(raw)))
+        except ValidationError as e:
+            errors.append(IngestOpError(index=index, detail=describe_error(e, "op")))
+    return Batch(batch.seq, operations, errors)
+
+
+def apply_batch(engine, feed: ChangeFeed, batch: Batch) -> IngestAck:
+    """Aplicar las operaciones válidas en orden (el llamador tiene el candado de escritura)"""
+    applied = 0
+    errors = list(batch.errors)
+    for index, operation in batch.operations:
+        try:
+            if isinstance(operation, IngestInsert):
+                child = operation.child
+                if not engine.insert(child):
+                    errors.append(IngestOpError(index=index, detail=f"Child with ID {child.id} already exists"))
+                    continue
+                feed.publish("insert", child.id, child)
+            else:
+                if not operation.changes.model_fields_set:
+                    errors.append(IngestOpError(index=index, detail="No update data provided"))
+                    continue
+                updated_child = engine.update(operation.id, operation.changes)
+                if updated_child is None:
+                    errors.append(IngestOpError(index=index, detail=f"Child with ID {operation.id} not found"))
+                    continue
+                feed.publish("update", operation.id, updated_child)
+            applied += 1
+        except Exception as e:
+            errors.append(IngestOpError(index=index, detail=f"Error applying operation: {str(e)}"))
+    errors.sort(key=lambda error: error.index)
+    return IngestAck(seq=batch.seq, applied=applied, failed=len(errors), errors=errors)
+
+
+async def _read_batches(websocket: WebSocket, queue: asyncio.Queue, max_batch: int) -> None:
+    """Leer marcos del socket hacia la cola acotada
+
+    Con la cola llena el lector deja de leer: los marcos se acumulan en los
+    búferes del socket y TCP frena al productor que no respeta la ventana.
+    """
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            frame = message.get("text")
+            if frame is None:
+                frame = message.get("bytes") or b""
+            item = parse_batch(frame, max_batch)
+            await queue.put(item)
+            if isinstance(item, Close):
+                return
+    except WebSocketDisconnect:
+        pass
+    # El productor se fue: los lotes sin confirmar se descartan (los reenviará)
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+
+async def ingest_session(websocket: WebSocket, engine, lock: Union[AsyncRWLock, ShardedRWLock], feed: ChangeFeed,
+                         window: int = settings.ingest_window,
+                         max_batch: int = settings.ingest_max_batch) -> None:
+    """Atender una conexión del canal de ingesta
+
+    Al conectar se anuncia la ventana (lotes sin confirmar que el productor
+    puede tener en vuelo) y el tamaño máximo de lote. Cada lote se aplica con
+    una sola adquisición del candado de escritura y se confirma con su `seq`;
+    las confirmaciones salen en el orden de llegada de los lotes.
+    """
+    await websocket.accept()
+    await websocket.send_json({"type": "ready", "window": window, "max_batch": max_batch})
+    queue: asyncio.Queue = asyncio.Queue(maxsize=window)
+    reader = asyncio.create_task(_read_batches(websocket, queue, max_batch))
+    try:
+        while (item := await queue.get()) is not None:
+            if isinstance(item, Close):
+                await websocket.close(item.code, item.reason)
+                return
+            async with lock.write():
+                ack = apply_batch(engine, feed, item)
+            await websocket.send_text(ack.model_dump_json())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
@@ -0,0 +1,30 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ..metrics import registry
+
+router = APIRouter(tags=["Monitoring"])
+
+
+# =========================================================
+# Prometheus Metrics
+# =========================================================
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics",
+    description="Exposes request latency histograms and tree engine counters in the Prometheus text format."
+)
+async def get_metrics():
+    """
+    Returns the metrics collected since the process started.
+    
+    Runs on the event loop, like the writers, so the engine gauges never
+    read a tree that is being modified.
+    
+    Returns:
+        PlainTextResponse: Metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,159 @@
+import secrets
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from typing_extensions import TypedDict
+
+from ..model.schemas import Child
+from ..profiling import serialization_phase
+from ..service.changefeed import ChangeFeed, Event
+
+class _Page(TypedDict):
+    items: List[Child]
+    next_cursor: Optional[int]
+
+
+# Serializadores precompilados (pydantic-core) para las respuestas frecuentes
+_child_adapter = TypeAdapter(Child)
+_children_adapter = TypeAdapter(List[Child])
+_page_adapter = TypeAdapter(_Page)
+
+
+# ==================== ENTRADA ====================
+
+def json_body(model: Any) -> Callable:
+    """Dependencia que valida el cuerpo crudo en modo JSON de pydantic (`validate_json`)
+
+    Evita el paso intermedio de FastAPI (bytes → dict con json.loads → modelo):
+    pydantic-core parsea y valida en una sola pasada. `model` puede ser un
+    modelo o cualquier tipo que acepte TypeAdapter (p. ej. List[Child]). Los
+    errores se reportan igual que los de FastAPI (422 con `loc` que empieza
+    por "body").
+    """
+    adapter = TypeAdapter(model)
+
+    async def dependency(request: Request):
+        try:
+            return adapter.validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)
+            ])
+    return dependency
+
+
+def body_schema(model: Any) -> dict:
+    """`openapi_extra` que documenta el cuerpo de una ruta que usa json_body"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": TypeAdapter(model).json_schema()}},
+        }
+    }
+
+
+# ==================== SALIDA ====================
+# Los niños guardados en los árboles ya fueron validados al entrar, así que se
+# serializan directamente sin la revalidación de `response_model`. FastAPI no
+# procesa una Response devuelta por el endpoint; `response_model` sigue
+# declarado en las rutas solo para la documentación. La codificación se marca
+# con serialization_phase para que el perfilado la cuente como serialización.
+
+def child_json(child: Child, status_code: int = 200, etag: Optional[str] = None) -> Response:
+    headers = {"ETag": etag} if etag is not None else None
+    with serialization_phase():
+        body = _child_adapter.dump_json(child)
+    return Response(body, status_code=status_code, headers=headers, media_type="application/json")
+
+
+def children_json(children: List[Child], etag: Optional[str] = None) -> Response:
+    headers = {"ETag": etag} if etag is not None else None
+    return Response(children_bytes(children), headers=headers, media_type="application/json")
+
+
+def children_bytes(children: List[Child]) -> bytes:
+    with serialization_phase():
+        return _children_adapter.dump_json(children)
+
+
+def listing_json(body: bytes, etag: str, seq: int) -> Response:
+    """Listado ya codificado: las peticiones coalescidas comparten los mismos bytes"""
+    return Response(body, headers={"ETag": etag, "X-Change-Seq": str(seq)}, media_type="application/json")
+
+
+def page_json(items: List[Child], next_cursor: Optional[int]) -> Response:
+    with serialization_phase():
+        body = _page_adapter.dump_json({"items": items, "next_cursor": next_cursor})
+    return Response(body, media_type="application/json")
+
+
+# ==================== GET CONDICIONAL ====================
+
+# Época de las versiones del árbol: vuelven a empezar en cada arranque, así que
+# sin ella un ETag de una ejecución anterior podría coincidir con datos
+# distintos. Las réplicas adoptan la del escritor al cargar su snapshot.
+etag_epoch = {"value": secrets.token_hex(4)}
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag fuerte con la época del proceso y las partes dadas (p. ej. id y versión)"""
+    return '"' + ".".join(str(part) for part in (etag_epoch["value"], *parts)) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Evaluar If-None-Match contra el ETag actual (comparación débil, RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Respuesta 304 sin cuerpo: el cliente ya tiene la representación vigente"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+# ==================== REGISTRO DE CAMBIOS ====================
+
+def changes_json(events: List[Event], last_seq: int) -> Response:
+    """Página de cambios armada con los eventos ya codificados (no se vuelven a serializar)"""
+    body = b'{"events":[' + b",".join(payload for _, _, payload in events) + b'],"last_seq":%d}' % last_seq
+    return Response(body, media_type="application/json")
+
+
+def resync_required(since: int, last_seq: int) -> JSONResponse:
+    """410: los eventos pedidos ya no están en el buffer; hay que volver a listar todo"""
+    return JSONResponse(
+        status_code=410,
+        content={
+            "detail": f"Changes after seq {since} are no longer available; resync with a full listing",
+            "resync_required": True,
+            "last_seq": last_seq,
+        }
+    )
+
+
+async def change_stream(feed: ChangeFeed, since: int, keepalive: float) -> AsyncIterator[bytes]:
+    """Eventos del registro en formato Server-Sent Events
+
+    Cada evento lleva `id:` (su secuencia, que el navegador reenvía como
+    Last-Event-ID al reconectar) y `event:` con la operación. Si el consumidor
+    se quedó atrás se envía un evento `resync` y se cierra el flujo.
+    """
+    seq = since
+    while True:
+        events = await feed.wait(seq, keepalive)
+        if events is None:
+            yield b'event: resync\ndata: {"resync_required":true,"last_seq":%d}\n\n' % feed.last_seq
+            return
+        if not events:
+            yield b": keepalive\n\n"
+            continue
+        for event_seq, op, payload in events:
+            yield b"id: %d\nevent: %s\ndata: %s\n\n" % (event_seq, op.encode(), payload)
+        seq = events[-1][0]
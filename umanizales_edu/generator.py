@@ -0,0 +1,262 @@
+"""
+Generador de datos sintéticos de niños
+
+Produce millones de niños válidos con un patrón de ids (secuencial,
+aleatorio o en bloques), una distribución de edades y nombres en español
+(uno o dos nombres y dos apellidos). Con la misma semilla el resultado es
+idéntico, así que los conjuntos de datos de los benchmarks se pueden
+reproducir. Los números salen de NumPy por bloques y los nombres provienen
+de listas fijas sin comillas ni barras, así que las filas se escriben
+directamente en NDJSON o CSV, o se envían en streaming a
+`POST /children/avl/import` (la ruta de carga masiva del servidor).
+
+Uso:
+    python -m umanizales_edu.generator 1000000 -o children.ndjson --ids random --ages skewed
+    python -m umanizales_edu.generator 200000 -o roster.csv --ids clustered --seed 7
+    python -m umanizales_edu.generator 1000000 --url http://127.0.0.1:8001
+"""
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Union
+
+import numpy as np
+
+from .model.schemas import Child
+from .service.abb_service import ChildrenBST
+from .service.avl_service import ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL
+from .service.bulk_import import CSV_COLUMNS, ImportFormat, Row
+
+GENDERS = ("M", "F", "Otro")
+BLOCK_ROWS = 10000
+# Proporción de cada género (en el orden de GENDERS)
+GENDER_WEIGHTS = (0.49, 0.49, 0.02)
+
+MALE_NAMES = (
+    "Santiago", "Sebastián", "Matías", "Nicolás", "Samuel", "Alejandro", "Daniel", "Mateo", "Tomás",
+    "Martín", "Emmanuel", "Jerónimo", "Juan José", "David", "Gabriel", "Felipe", "Andrés", "Lucas",
+    "Miguel Ángel", "Simón", "Juan Pablo", "Emiliano", "Joaquín", "Maximiliano", "Julián", "Esteban",
+    "Diego", "Benjamín", "Carlos", "Pablo", "Jacobo", "Agustín", "Luis", "Manuel", "Thiago", "Iker",
+)
+FEMALE_NAMES = (
+    "Valentina", "Sofía", "Isabella", "Mariana", "Salomé", "Gabriela", "Sara", "Luciana", "Antonella",
+    "Valeria", "Daniela", "Camila", "María José", "Emily", "Juliana", "Victoria", "Martina", "Paula",
+    "Ana Sofía", "Emma", "Manuela", "Laura", "Isabel", "Lucía", "Samantha", "Catalina", "Violeta",
+    "Abigail", "Jimena", "Renata", "Elena", "Natalia", "Carolina", "Alejandra", "Ximena", "Amelia",
+)
+SURNAMES = (
+    "García", "Rodríguez", "Martínez", "López", "González", "Hernández", "Pérez", "Sánchez", "Ramírez",
+    "Torres", "Flores", "Rivera", "Gómez", "Díaz", "Cruz", "Morales", "Reyes", "Gutiérrez", "Ortiz",
+    "Castro", "Jiménez", "Ruiz", "Álvarez", "Romero", "Vargas", "Moreno", "Rojas", "Muñoz", "Suárez",
+    "Ramos", "Herrera", "Medina", "Aguilar", "Castillo", "Ospina", "Cardona", "Giraldo", "Restrepo",
+    "Valencia", "Londoño", "Arango", "Zapata", "Quintero", "Mejía", "Salazar", "Osorio", "Marín",
+    "Henao", "Duque", "Correa", "Betancur", "Montoya", "Cárdenas", "Orozco", "Toro", "Franco",
+)
+
+
+# ==================== PATRONES DE IDS ====================
+
+def sequential_ids(count: int, rng: np.random.Generator, spread: int) -> np.ndarray:
+    """1..count en orden (el peor caso de inserción para un árbol sin balanceo)"""
+    return np.arange(1, count + 1, dtype=np.int64)
+
+
+def random_ids(count: int, rng: np.random.Generator, spread: int) -> np.ndarray:
+    """Ids distintos tomados de 1..count*spread, en orden aleatorio"""
+    return rng.choice(count * spread, size=count, replace=False).astype(np.int64) + 1
+
+
+def clustered_ids(count: int, rng: np.random.Generator, spread: int) -> np.ndarray:
+    """Bloques de ids consecutivos (como los rangos asignados a cada sede) en orden aleatorio
+
+    Hay uno por cada ~1000 niños; dentro de cada bloque los ids llegan en orden.
+    """
+    clusters = max(1, count // 1000)
+    length = -(-count // clusters)
+    slots = rng.choice(max(clusters, count * spread // length), size=clusters, replace=False)
+    ids = (slots[:, None] * length + np.arange(length)).ravel()[:count]
+    return ids.astype(np.int64) + 1
+
+
+ID_PATTERNS: Dict[str, Callable[[int, np.random.Generator, int], np.ndarray]] = {
+    "sequential": sequential_ids,
+    "random": random_ids,
+    "clustered": clustered_ids,
+}
+
+
+# ==================== DISTRIBUCIONES DE EDAD ====================
+
+def uniform_ages(count: int, rng: np.random.Generator) -> np.ndarray:
+    """0 a 18 años con la misma probabilidad"""
+    return rng.integers(0, 19, size=count, dtype=np.int8)
+
+
+def skewed_ages(count: int, rng: np.random.Generator) -> np.ndarray:
+    """80% entre 6 y 8 años, el resto uniforme (muchas edades repetidas para el ABB)"""
+    return np.where(rng.random(count) < 0.8, rng.integers(6, 9, size=count),
+                    rng.integers(0, 19, size=count)).astype(np.int8)
+
+
+def normal_ages(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Normal con media 9 y desviación 4, redondeada y recortada a 0..18"""
+    return np.clip(np.rint(rng.normal(9, 4, size=count)), 0, 18).astype(np.int8)
+
+
+def increasing_ages(count: int, rng: np.random.Generator) -> np.ndarray:
+    """Edades crecientes en el orden de llegada (el ABB por edad degenera en una lista)"""
+    return (np.arange(count, dtype=np.int64) * 19 // max(count, 1)).astype(np.int8)
+
+
+AGE_DISTRIBUTIONS: Dict[str, Callable[[int, np.random.Generator], np.ndarray]] = {
+    "uniform": uniform_ages,
+    "skewed": skewed_ages,
+    "normal": normal_ages,
+    "increasing": increasing_ages,
+}
+
+
+# ==================== GENERACIÓN ====================
+
+def _names(gender: np.ndarray, rng: np.random.Generator) -> List[str]:
+    """Uno o dos nombres según el género (ambas listas para "Otro") y dos apellidos"""
+    count = len(gender)
+    male, female = len(MALE_NAMES), len(FEMALE_NAMES)
+    pool = MALE_NAMES + FEMALE_NAMES
+    # Índices en `pool`: M toma de la primera mitad, F de la segunda, Otro de ambas
+    low = np.where(gender == 1, male, 0)
+    high = np.where(gender == 0, male, male + female)
+    first = rng.integers(low, high)
+    second = np.where(rng.random(count) < 0.3, rng.integers(low, high), -1)
+    surnames = rng.integers(0, len(SURNAMES), size=(count, 2))
+    return [
+        f"{pool[a]} {pool[b]} {SURNAMES[s1]} {SURNAMES[s2]}" if b >= 0 and b != a
+        else f"{pool[a]} {SURNAMES[s1]} {SURNAMES[s2]}"
+        for a, b, (s1, s2) in zip(first.tolist(), second.tolist(), surnames.tolist())
+    ]
+
+
+def generate_rows(count: int, ids: str = "random", ages: str = "uniform", seed: int = 42,
+                  spread: int = 10) -> Iterator[List[Row]]:
+    """Generar `count` niños válidos como bloques de BLOCK_ROWS tuplas (id, age, name, gender)
+
+    Los ids (distintos entre sí) y las edades se generan de una vez; géneros
+    y nombres, por bloque, cada uno con su propio generador derivado de la
+    semilla. El resultado depende solo de los argumentos.
+
+    Raises:
+        ValueError: Si el patrón de ids o la distribución de edades no existe
+    """
+    if ids not in ID_PATTERNS:
+        raise ValueError(f"Unknown id pattern '{ids}' (expected one of {', '.join(ID_PATTERNS)})")
+    if ages not in AGE_DISTRIBUTIONS:
+        raise ValueError(f"Unknown age distribution '{ages}' (expected one of {', '.join(AGE_DISTRIBUTIONS)})")
+    rng = np.random.default_rng(seed)
+    all_ids = ID_PATTERNS[ids](count, rng, spread)
+    all_ages = AGE_DISTRIBUTIONS[ages](count, rng)
+    for block, start in enumerate(range(0, count, BLOCK_ROWS)):
+        block_rng = np.random.default_rng((seed, block))
+        gender = block_rng.choice(len(GENDERS), size=min(BLOCK_ROWS, count - start), p=GENDER_WEIGHTS)
+        yield list(zip(
+            all_ids[start:start + BLOCK_ROWS].tolist(),
+            all_ages[start:start + BLOCK_ROWS].tolist(),
+            _names(gender, block_rng),
+            [GENDERS[code] for code in gender.tolist()],
+        ))
+
+
+def generate_children(count: int, **options) -> Iterator[Child]:
+    """Los mismos niños que generate_rows, como modelos (ya válidos: no se revalidan)"""
+    for rows in generate_rows(count, **options):
+        for id, age, name, gender in rows:
+            yield Child.model_construct(id=id, age=age, name=name, gender=gender)
+
+
+def populate(engine: Union[ChildrenBST, ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL],
+             count: int, **options) -> int:
+    """Cargar niños generados en un motor por su ruta de carga masiva
+
+    Los árboles AVL reciben el lote ordenado por id con bulk_insert (unión en
+    bloque); el ABB, ordenado por edad, inserta uno por uno.
+
+    Returns:
+        Cantidad de niños insertados
+    """
+    children = list(generate_children(count, **options))
+    if isinstance(engine, ChildrenBST):
+        return sum(engine.insert(child) for child in children)
+    children.sort(key=lambda child: child.id)
+    return len(engine.bulk_insert(children))
+
+
+# ==================== SALIDA ====================
+
+def encode(rows: List[Row], format: ImportFormat) -> bytes:
+    """Un bloque de filas en NDJSON o CSV (sin cabecera)
+
+    Los nombres vienen de listas fijas sin comillas, comas ni barras, así
+    que no hace falta escaparlos.
+    """
+    if format == "ndjson":
+        return "".join(
+            f'{{"id":{id},"age":{age},"name":"{name}","gender":"{gender}"}}\n' for id, age, name, gender in rows
+        ).encode()
+    return "".join(f"{id},{age},{name},{gender}\n" for id, age, name, gender in rows).encode()
+
+
+def stream(chunks: Iterable[List[Row]], format: ImportFormat) -> Iterator[bytes]:
+    if format == "csv":
+        yield (",".join(CSV_COLUMNS) + "\n").encode()
+    for rows in chunks:
+        yield encode(rows, format)
+
+
+def upload(blocks: Iterable[bytes], format: ImportFormat, url: str) -> dict:
+    """Enviar los bloques a `POST /children/avl/import` con codificación chunked"""
+    content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/children/avl/import?format={format}",
+        data=blocks,
+        method="POST",
+        headers={"Content-Type": content_type},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar niños sintéticos (NDJSON, CSV o importación masiva)")
+    parser.add_argument("count", type=int)
+    parser.add_argument("-o", "--output", help="Archivo de salida ('-' = salida estándar)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Por defecto según la extensión (ndjson)")
+    parser.add_argument("--url", help="Enviar al servidor AVL (escritor) en lugar de escribir un archivo")
+    parser.add_argument("--ids", choices=list(ID_PATTERNS), default="random")
+    parser.add_argument("--ages", choices=list(AGE_DISTRIBUTIONS), default="uniform")
+    parser.add_argument("--spread", type=int, default=10, help="Ids aleatorios/en bloques entre 1 y count*spread")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if (args.output is None) == (args.url is None):
+        parser.error("use exactly one of --output or --url")
+
+    format = args.format or ("csv" if (args.output or "").lower().endswith(".csv") else "ndjson")
+    blocks = stream(generate_rows(args.count, args.ids, args.ages, args.seed, args.spread), format)
+    start = time.perf_counter()
+    if args.url:
+        try:
+            print(json.dumps(upload(blocks, format, args.url), indent=2, ensure_ascii=False))
+        except urllib.error.HTTPError as e:
+            sys.exit(f"HTTP {e.code}: {e.read().decode(errors='replace')}")
+    else:
+        output: BinaryIO = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+        with output:
+            for block in blocks:
+                output.write(block)
+    elapsed = time.perf_counter() - start
+    print(f"{args.count} niños en {elapsed:.2f} s ({args.count / elapsed:.0f} filas/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
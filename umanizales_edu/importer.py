@@ -0,0 +1,96 @@
+"""
+Importación masiva de niños desde CSV o NDJSON
+
+Envía el archivo en streaming al endpoint `POST /children/avl/import` del
+servidor (que valida en paralelo y construye el árbol en bloque), o con
+--dry-run lo valida localmente con el mismo pipeline y solo reporta los
+errores y el rendimiento, sin tocar ningún árbol.
+
+El CSV lleva cabecera con las columnas id, age, name, gender; el NDJSON, un
+objeto Child por línea. El formato se deduce de la extensión si no se indica.
+
+Uso:
+    python -m umanizales_edu.importer roster.csv --url http://127.0.0.1:8001
+    python -m umanizales_edu.importer roster.ndjson --dry-run --workers 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import AsyncIterator, BinaryIO
+
+from .service.bulk_import import get_executor, validate_stream
+
+BLOCK_SIZE = 1 << 20
+
+
+async def read_blocks(file: BinaryIO) -> AsyncIterator[bytes]:
+    while block := file.read(BLOCK_SIZE):
+        yield block
+
+
+def upload(path: str, format: str, url: str) -> dict:
+    """Enviar el archivo al servidor sin cargarlo completo en memoria"""
+    content_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    with open(path, "rb") as file:
+        request = urllib.request.Request(
+            f"{url.rstrip('/')}/children/avl/import?format={format}",
+            data=file,
+            method="POST",
+            headers={"Content-Type": content_type, "Content-Length": str(os.path.getsize(path))},
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+
+async def dry_run(path: str, format: str, workers: int, chunk_rows: int) -> dict:
+    """Validar localmente con el pipeline del servidor (bloques + pool de procesos)"""
+    executor = get_executor(workers)
+    try:
+        with open(path, "rb") as file:
+            result = await validate_stream(read_blocks(file), format, executor, chunk_rows)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return {
+        "rows": result.rows,
+        "valid": len(result.children),
+        "duplicates": result.duplicates,
+        "failed": result.failed,
+        "errors": [{"row": row, "error": error} for row, error in result.errors],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de niños (CSV o NDJSON)")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Por defecto según la extensión")
+    parser.add_argument("--url", default="http://127.0.0.1:8001", help="URL del servidor AVL (escritor)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo validar localmente, sin enviar")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos de validación (--dry-run)")
+    parser.add_argument("--chunk-rows", type=int, default=5000, help="Filas por bloque (--dry-run)")
+    args = parser.parse_args()
+
+    format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    start = time.perf_counter()
+    try:
+        if args.dry_run:
+            report = asyncio.run(dry_run(args.path, format, args.workers, args.chunk_rows))
+        else:
+            report = upload(args.path, format, args.url)
+    except urllib.error.HTTPError as e:
+        sys.exit(f"HTTP {e.code}: {e.read().decode(errors='replace')}")
+    except ValueError as e:
+        sys.exit(str(e))
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"{report['rows']} filas en {elapsed:.2f} s ({report['rows'] / elapsed:.0f} filas/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
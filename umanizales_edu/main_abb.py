@@ -1,5 +1,10 @@
 from fastapi import FastAPI
 from .controller.abb_controller import router as children_router
+from .controller.metrics_controller import router as metrics_router
+from .config import settings
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .tracing import TraceMiddleware
 
 app = FastAPI(
     title="Children Management API - BST",
@@ -11,6 +16,18 @@ app = FastAPI(
 
 # Incluir el router de children
 app.include_router(children_router)
+app.include_router(metrics_router)
+
+# Latencia por ruta y estado para /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Perfilado bajo demanda (solo si está habilitado en la configuración)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Traza de las operaciones sobre el árbol para reproducirlas (umanizales_edu.replay)
+if settings.trace_enabled:
+    app.add_middleware(TraceMiddleware, engine="bst")
 
 @app.get("/", tags=["Root"])
 def read_root():
@@ -23,6 +40,17 @@ def read_root():
             "GET /children/{documento}": "Obtener un niño por documento",
             "GET /children?order=in|pre|post": "Listar todos los niños",
             "PUT /children/{documento}": "Actualizar un niño",
-            "DELETE /children/{documento}": "Eliminar un niño"
+            "DELETE /children/{documento}": "Eliminar un niño",
+            "GET /children/age/range?lo=&hi=": "Listar niños en un rango de edad (paginado)",
+            "GET /children/age/youngest": "Listar los niños más jóvenes (paginado)",
+            "GET /children/age/oldest": "Listar los niños mayores (paginado)",
+            "GET /children/changes?since=": "Cambios posteriores a una secuencia (long-poll)",
+            "GET /children/changes/stream": "Cambios en tiempo real (Server-Sent Events)",
+            "GET /children/export?format=csv|ndjson|columnar|arrow": "Exportar todo el almacén en streaming",
+            "GET /children/analytics": "Conteos, percentiles de edad y proporción de géneros por banda (vectorizado)",
+            "WS /children/ingest": "Lotes de inserciones y actualizaciones con confirmación por secuencia",
+            "GET /children/stats/memory?deep=": "Memoria estimada del árbol (muestreo; tracemalloc opcional)",
+            "GET /metrics": "Métricas en formato Prometheus",
+            "GET /children/stats/tree": "Obtener estadísticas del árbol ABB"
         }
     }
@@ -1,5 +1,11 @@
 from fastapi import FastAPI
 from .controller.avl_controller import router as children_avl_router
+from .controller.metrics_controller import router as metrics_router
+from .config import settings
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
+from .tracing import TraceMiddleware
+from .replication import ReplicaMiddleware, replication_lifespan
 
 app = FastAPI(
     title="Children Management API - AVL Tree",
@@ -21,11 +27,28 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=replication_lifespan
 )
 
 # Incluir el router de children AVL
 app.include_router(children_avl_router)
+app.include_router(metrics_router)
+
+# Latencia por ruta y estado para /metrics
+app.add_middleware(MetricsMiddleware)
+
+# Perfilado bajo demanda (solo si está habilitado en la configuración)
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Traza de las operaciones sobre el árbol para reproducirlas (umanizales_edu.replay)
+if settings.trace_enabled:
+    app.add_middleware(TraceMiddleware, engine="avl")
+
+# Réplica de solo lectura en el despliegue multiproceso (umanizales_edu.cluster)
+if settings.cluster_role == "reader":
+    app.add_middleware(ReplicaMiddleware)
 
 @app.get("/", tags=["Root"])
 def read_root():
@@ -45,6 +68,15 @@ def read_root():
             "GET /children?order=in|pre|post": "Listar todos los niños",
             "PUT /children/{documento}": "Actualizar un niño",
             "DELETE /children/{documento}": "Eliminar un niño (con auto-balanceo)",
+            "POST /children/reconcile": "Comparar el árbol con un listado externo (added/removed/changed)",
+            "POST /children/import?format=csv|ndjson": "Importación masiva en streaming (validación en paralelo)",
+            "GET /children/changes?since=": "Cambios posteriores a una secuencia (long-poll)",
+            "GET /children/changes/stream": "Cambios en tiempo real (Server-Sent Events)",
+            "GET /children/export?format=csv|ndjson|columnar|arrow": "Exportar todo el almacén en streaming",
+            "GET /children/analytics": "Conteos, percentiles de edad y proporción de géneros por banda (vectorizado)",
+            "WS /children/ingest": "Lotes de inserciones y actualizaciones con confirmación por secuencia",
+            "GET /children/stats/memory?deep=": "Memoria estimada del árbol (muestreo; tracemalloc opcional)",
+            "GET /metrics": "Métricas en formato Prometheus",
             "GET /children/stats/tree": "Obtener estadísticas del árbol AVL"
         }
     }
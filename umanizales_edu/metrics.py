@@ -0,0 +1,224 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from .config import settings
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Buckets de latencia en segundos (similares a los de los clientes Prometheus)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Buckets para cantidades de nodos visitados / comparaciones
+NODE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class MetricsRegistry:
+    """Registro de métricas con contadores por hilo (sin candados en el camino caliente)
+
+    Cada hilo escribe en su propio fragmento (`threading.local`); solo al
+    generar el texto de exposición se suman los fragmentos de todos los hilos.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._local = threading.local()
+        self._shards: List[Tuple[Dict, Dict]] = []
+        self._shards_lock = threading.Lock()
+        self._descriptions: Dict[str, Tuple[str, str]] = {}
+        self._buckets: Dict[str, Tuple[float, ...]] = {}
+        self._gauge_callbacks: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+
+    def _shard(self) -> Tuple[Dict, Dict]:
+        """Fragmento (contadores, histogramas) del hilo actual"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = ({}, {})
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    # ==================== DEFINICIÓN ====================
+
+    def counter(self, name: str, help_text: str) -> None:
+        self._descriptions[name] = ("counter", help_text)
+
+    def gauge(self, name: str, help_text: str) -> None:
+        self._descriptions[name] = ("gauge", help_text)
+
+    def histogram(self, name: str, help_text: str, buckets: Tuple[float, ...]) -> None:
+        self._descriptions[name] = ("histogram", help_text)
+        self._buckets[name] = buckets
+
+    def register_gauge_callback(self, callback: Callable[[], Iterable[Tuple[str, Labels, float]]]) -> None:
+        """Registrar una función que devuelve (nombre, etiquetas, valor) al momento de exponer"""
+        self._gauge_callbacks.append(callback)
+
+    # ==================== REGISTRO ====================
+
+    def inc(self, name: str, labels: Labels, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        counters = self._shard()[0]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        if not self.enabled:
+            return
+        histograms = self._shard()[1]
+        key = (name, labels)
+        state = histograms.get(key)
+        if state is None:
+            # [conteos por bucket (+Inf al final), suma, cantidad]
+            state = histograms[key] = [[0] * (len(self._buckets[name]) + 1), 0.0, 0]
+        state[0][bisect_left(self._buckets[name], value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    # ==================== EXPOSICIÓN ====================
+
+    def collect(self) -> Tuple[Dict, Dict]:
+        """Sumar los fragmentos de todos los hilos"""
+        counters: Dict = {}
+        histograms: Dict = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard_counters, shard_histograms in shards:
+            for key, value in shard_counters.copy().items():
+                counters[key] = counters.get(key, 0) + value
+            for key, (buckets, total, count) in shard_histograms.copy().items():
+                state = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+                for i, bucket_count in enumerate(buckets):
+                    state[0][i] += bucket_count
+                state[1] += total
+                state[2] += count
+        return counters, histograms
+
+    def render(self) -> str:
+        """Generar el formato de texto de exposición de Prometheus"""
+        counters, histograms = self.collect()
+        gauges: Dict = {}
+        for callback in self._gauge_callbacks:
+            for name, labels, value in callback():
+                gauges[(name, labels)] = value
+
+        lines: List[str] = []
+        for name, (metric_type, help_text) in sorted(self._descriptions.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            if metric_type == "histogram":
+                bounds = [_format_value(bound) for bound in self._buckets[name]] + ["+Inf"]
+                for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(bounds, buckets):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+            else:
+                values = counters if metric_type == "counter" else gauges
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+# Registro global de métricas
+registry = MetricsRegistry(enabled=settings.metrics_enabled)
+
+registry.histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta, método y código de estado",
+    LATENCY_BUCKETS
+)
+registry.counter("children_engine_operations_total", "Operaciones ejecutadas sobre el árbol")
+registry.counter("children_engine_comparisons_total", "Comparaciones de claves realizadas por operación")
+registry.histogram(
+    "children_engine_search_nodes_visited",
+    "Nodos visitados por búsqueda",
+    NODE_BUCKETS
+)
+registry.counter("children_engine_rotations_total", "Rotaciones AVL por tipo")
+registry.gauge("children_engine_height", "Altura actual del árbol")
+registry.gauge("children_engine_size", "Cantidad actual de niños en el árbol")
+registry.gauge("children_engine_rebuilds", "Reconstrucciones de subárboles realizadas (ABB)")
+registry.counter(
+    "children_coalesced_reads_total",
+    "Lecturas que lanzaron un cálculo (leader) o esperaron uno idéntico en curso (follower)"
+)
+
+
+def record_operation(engine: str, operation: str, comparisons: int) -> None:
+    """Registrar una operación del motor y sus comparaciones"""
+    if not registry.enabled:
+        return
+    labels = (("engine", engine), ("operation", operation))
+    registry.inc("children_engine_operations_total", labels)
+    registry.inc("children_engine_comparisons_total", labels, comparisons)
+
+
+def record_search(engine: str, nodes_visited: int) -> None:
+    """Registrar una búsqueda por id y los nodos visitados"""
+    if not registry.enabled:
+        return
+    registry.inc("children_engine_operations_total", (("engine", engine), ("operation", "search")))
+    registry.inc("children_engine_comparisons_total", (("engine", engine), ("operation", "search")), nodes_visited)
+    registry.observe("children_engine_search_nodes_visited", (("engine", engine),), nodes_visited)
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mide la latencia de cada petición por ruta y estado
+
+    Se usa la plantilla de la ruta (p. ej. /children/avl/{id}) para que la
+    cardinalidad de las etiquetas no crezca con los ids.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            registry.observe(
+                "http_request_duration_seconds",
+                (("route", path), ("method", scope["method"]), ("status", str(status_code))),
+                time.perf_counter() - start
+            )
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Dict, List, Literal, Optional, Union
 
 
 class Child(BaseModel):
@@ -41,6 +41,113 @@ class ChildResponse(Child):
     pass
 
 
+class ChildPage(BaseModel):
+    """Modelo de respuesta para una página de niños con cursor"""
+    items: List[ChildResponse]
+    next_cursor: Optional[int] = Field(None, description="ID del último niño de la página; None si no hay más resultados")
+
+
+class ChangeEvent(BaseModel):
+    """Evento del registro de cambios (inserción, actualización o eliminación)"""
+    seq: int = Field(..., description="Número de secuencia del evento (creciente)")
+    op: Literal["insert", "update", "delete"]
+    id: int = Field(..., description="ID del niño afectado")
+    child: Optional[Child] = Field(None, description="Estado del niño tras el cambio; None en eliminaciones")
+
+
+class ChangePage(BaseModel):
+    """Modelo de respuesta del long-poll de cambios"""
+    events: List[ChangeEvent]
+    last_seq: int = Field(..., description="Secuencia a usar como `since` en la siguiente consulta")
+
+
+class ReconcileResponse(BaseModel):
+    """Modelo de respuesta de la conciliación contra un listado externo"""
+    added: List[int] = Field(..., description="IDs que están en el listado pero no en el árbol")
+    removed: List[int] = Field(..., description="IDs que están en el árbol pero no en el listado")
+    changed: List[int] = Field(..., description="IDs presentes en ambos con datos distintos")
+    unchanged: int = Field(..., description="Cantidad de niños idénticos en ambos")
+
+
+class ImportRowError(BaseModel):
+    """Fila rechazada durante una importación"""
+    row: int = Field(..., description="Número de línea en el archivo (la cabecera CSV es la línea 1)")
+    error: str = Field(..., description="Motivo del rechazo")
+
+
+class ImportReport(BaseModel):
+    """Modelo de respuesta de una importación masiva"""
+    rows: int = Field(..., description="Filas leídas (sin contar cabecera ni líneas vacías)")
+    imported: int = Field(..., description="Niños insertados en el árbol")
+    duplicates: int = Field(..., description="Filas válidas omitidas porque su ID ya existía o se repetía en el archivo")
+    failed: int = Field(..., description="Filas que no pasaron la validación")
+    errors: List[ImportRowError] = Field(..., description="Primeras filas rechazadas (acotado por configuración)")
+
+
+class AgeStats(BaseModel):
+    """Estadísticas de edad de las filas seleccionadas"""
+    min: int
+    max: int
+    mean: float
+    percentiles: Dict[str, float] = Field(..., description="Percentiles pedidos, con clave p<N> (p. ej. p50)")
+
+
+class AgeBand(BaseModel):
+    """Conteo por género dentro de una banda de edad"""
+    min_age: int
+    max_age: int
+    count: int
+    genders: Dict[str, int]
+    ratios: Dict[str, float] = Field(..., description="Proporción de cada género dentro de la banda")
+
+
+class AnalyticsResponse(BaseModel):
+    """Modelo de respuesta de las consultas analíticas sobre la vista columnar"""
+    version: int = Field(..., description="Versión del árbol sobre la que se calculó")
+    total: int = Field(..., description="Niños en el árbol")
+    count: int = Field(..., description="Niños que cumplen los filtros")
+    age: Optional[AgeStats] = Field(None, description="None si ningún niño cumple los filtros")
+    genders: Dict[str, int]
+    bands: List[AgeBand] = Field(..., description="Bandas de edad con al menos un niño")
+
+
+class IngestInsert(BaseModel):
+    """Inserción dentro de un lote del canal de ingesta"""
+    op: Literal["insert"]
+    child: Child
+
+
+class IngestUpdate(BaseModel):
+    """Actualización dentro de un lote del canal de ingesta"""
+    op: Literal["update"]
+    id: int = Field(..., description="ID del niño a actualizar")
+    changes: ChildUpdate
+
+
+IngestOperation = Annotated[Union[IngestInsert, IngestUpdate], Field(discriminator="op")]
+
+
+class IngestBatch(BaseModel):
+    """Lote del canal de ingesta (las operaciones se validan una a una al aplicarlo)"""
+    seq: int = Field(..., description="Número de secuencia asignado por el productor", ge=0)
+    ops: List[dict] = Field(..., description="Operaciones insert/update en el orden en que se aplican")
+
+
+class IngestOpError(BaseModel):
+    """Operación rechazada dentro de un lote"""
+    index: int = Field(..., description="Posición de la operación en el lote")
+    detail: str
+
+
+class IngestAck(BaseModel):
+    """Confirmación de un lote aplicado"""
+    type: Literal["ack"] = "ack"
+    seq: int
+    applied: int = Field(..., description="Operaciones aplicadas al árbol")
+    failed: int = Field(..., description="Operaciones rechazadas (validación, ID repetido o inexistente)")
+    errors: List[IngestOpError]
+
+
 class MessageResponse(BaseModel):
     """Modelo de respuesta para mensajes"""
     message: str
@@ -0,0 +1,213 @@
+import cProfile
+import functools
+import inspect
+import pstats
+import re
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, ContextManager, Optional
+
+from fastapi.routing import APIRoute
+
+from .config import settings
+from .service.concurrency import AsyncRWLock
+
+# Contexto del perfilado de la petición en curso (None si no se está perfilando)
+_current: ContextVar[Optional[dict]] = ContextVar("profiling_context", default=None)
+
+# El perfilador del event loop registra todo lo que corre en él, y las fases
+# se miden con el reloj de pared: una petición perfilada corre sola. Las demás
+# peticiones toman el candado de lectura; la perfilada, el de escritura (espera
+# a que terminen las que están en curso y retiene a las nuevas).
+_exclusive = AsyncRWLock()
+_NO_PHASE = nullcontext()
+
+
+class _SerializationPhase:
+    """Acumula en el contexto el tiempo de codificación dentro del endpoint"""
+
+    def __init__(self, context: dict):
+        self.context = context
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.context["encoding"] = self.context.get("encoding", 0.0) + time.perf_counter() - self.start
+
+
+def serialization_phase() -> ContextManager:
+    """Marcar la codificación de la respuesta hecha dentro del endpoint
+
+    Los endpoints devuelven la respuesta ya codificada (ver
+    controller.serialization), así que ese tiempo se descuenta de la fase
+    `tree` y se suma a `serialization`. Sin perfilado no hace nada.
+    """
+    context = _current.get()
+    return _NO_PHASE if context is None else _SerializationPhase(context)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Envolver el endpoint para medir la operación sobre el árbol
+
+    Los endpoints síncronos corren en el pool de hilos, fuera del alcance del
+    perfilador del event loop, así que allí se usa un perfilador propio.
+    """
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            context = _current.get()
+            if context is None:
+                return await endpoint(*args, **kwargs)
+            context["endpoint_start"] = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                context["endpoint_end"] = time.perf_counter()
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def sync_wrapper(*args, **kwargs):
+        context = _current.get()
+        if context is None:
+            return endpoint(*args, **kwargs)
+        profiler = cProfile.Profile() if threading.get_ident() != context["thread"] else None
+        context["endpoint_start"] = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return endpoint(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                context["profilers"].append(profiler)
+            context["endpoint_end"] = time.perf_counter()
+    return sync_wrapper
+
+
+class ProfiledRoute(APIRoute):
+    """Ruta que registra las fases de la petición cuando se está perfilando
+
+    Si el perfilado está deshabilitado en la configuración, se comporta
+    exactamente como APIRoute (no se envuelve nada).
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        if settings.profiling_enabled:
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not settings.profiling_enabled:
+            return handler
+
+        async def profiled_handler(request):
+            context = _current.get()
+            if context is None:
+                return await handler(request)
+            context["handler_start"] = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                context["handler_end"] = time.perf_counter()
+
+        return profiled_handler
+
+
+def _server_timing(context: dict, total: float) -> str:
+    """Construir el encabezado Server-Timing (duraciones en ms)
+
+    validation: del inicio del manejador de la ruta a la llamada al endpoint
+    (cuerpo y parámetros); tree: el endpoint sin la codificación de la
+    respuesta; serialization: esa codificación más lo que FastAPI hace con el
+    valor devuelto.
+    """
+    metrics = []
+    if "handler_start" in context and "endpoint_start" in context:
+        encoding = context.get("encoding", 0.0)
+        metrics.append(("validation", context["endpoint_start"] - context["handler_start"]))
+        metrics.append(("tree", context["endpoint_end"] - context["endpoint_start"] - encoding))
+        metrics.append(("serialization", context["handler_end"] - context["endpoint_end"] + encoding))
+    metrics.append(("total", total))
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in metrics)
+
+
+def _profile_path(scope: dict) -> Path:
+    directory = Path(settings.profiling_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return directory / f"{timestamp}-{scope['method']}-{slug}.prof"
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI que perfila una petición cuando trae el encabezado configurado
+
+    Guarda el perfil (formato pstats) en `profiling_dir` y agrega los
+    encabezados `Server-Timing` y `X-Profile-File` a la respuesta. Solo se
+    registra en la app cuando `profiling_enabled` es verdadero.
+
+    La petición perfilada corre sin otras intercaladas: espera hasta
+    `profiling_drain_timeout` segundos a que terminen las que están en curso
+    (las nuevas esperan detrás de ella). Si no terminan a tiempo (p. ej. un
+    long-poll o un flujo SSE abierto), se atiende sin perfilar.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.profiling_header.lower().encode("latin-1")
+
+    def _requested(self, scope: dict) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                if settings.profiling_token is None:
+                    return True
+                return value.decode("latin-1") == settings.profiling_token
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if not self._requested(scope) or not await _exclusive.acquire_write(settings.profiling_drain_timeout):
+            async with _exclusive.read():
+                await self.app(scope, receive, send)
+            return
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            await _exclusive.release_write()
+
+    async def _profile(self, scope, receive, send):
+        context = {"thread": threading.get_ident(), "profilers": []}
+        token = _current.set(context)
+        path = _profile_path(scope)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                timing = _server_timing(context, time.perf_counter() - start)
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                headers.append((b"x-profile-file", path.name.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+            stats = pstats.Stats(profiler)
+            for worker_profiler in context["profilers"]:
+                stats.add(worker_profiler)
+            stats.dump_stats(str(path))
+        finally:
+            _current.reset(token)
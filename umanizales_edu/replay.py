@@ -0,0 +1,161 @@
+"""
+Reproducción de trazas de carga contra los motores de árbol
+
+Lee una traza grabada por TraceMiddleware (CHILDREN_TRACE_ENABLED=true) y
+ejecuta cada operación directamente sobre un motor nuevo, sin HTTP: a máxima
+velocidad o respetando los tiempos de llegada originales (--timing original,
+acelerados con --speed). Reporta throughput, distribución de latencias por
+operación y la forma final del árbol de cada motor, para juzgar cambios en
+los motores con tráfico real.
+
+La traza no guarda los datos de los niños: se generan a partir del id, la
+edad grabada (la que ordena el ABB) y el tamaño del cuerpo.
+
+Uso:
+    python -m umanizales_edu.replay traces/avl-20250101-120000-4242.trace
+    python -m umanizales_edu.replay carga.trace --engines bst bst_scapegoat avl --timing original --speed 10
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+from .config import settings
+from .model.schemas import Child, ChildUpdate
+from .service.abb_service import ChildrenBST
+from .service.avl_service import ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL
+from .tracing import OPERATIONS, TraceRecord, read_trace
+
+ENGINES: Dict[str, Callable[[], object]] = {
+    "bst": ChildrenBST,
+    "bst_scapegoat": lambda: ChildrenBST(self_rebuilding=True),
+    "bst_adaptive": lambda: ChildrenBST(adaptive=True),
+    "avl": ChildrenAVL,
+    "avl_sharded": lambda: ShardedChildrenAVL(4),
+    "avl_tiered": lambda: TieredChildrenAVL(settings.tiered_hot_capacity or 10000),
+}
+
+GENDERS = ("M", "F", "Otro")
+# Bytes de un cuerpo de inserción sin nombre ni dígitos: {"id":,"age":,"name":"","gender":"M"}
+_BODY_OVERHEAD = 37
+
+
+def _child(record: TraceRecord) -> Child:
+    """Niño con el id y la edad grabados y un nombre del largo que tenía el cuerpo"""
+    length = min(100, max(1, record.size - _BODY_OVERHEAD - len(str(record.id)) - 2))
+    return Child.model_construct(
+        id=record.id,
+        age=record.id % 19 if record.age is None else record.age,
+        name=f"Niño {record.id}".ljust(length, "x")[:length],
+        gender=GENDERS[record.id % len(GENDERS)],
+    )
+
+
+def prepare(engine, record: TraceRecord) -> Callable[[], object]:
+    """Operación lista para ejecutar (los datos se generan antes de medir)"""
+    if record.operation == "insert":
+        child = _child(record)
+        return lambda: engine.insert(child)
+    if record.operation == "search":
+        return lambda: engine.search(record.id)
+    if record.operation == "update":
+        if record.age is not None:
+            update = ChildUpdate.model_construct(age=record.age)
+        else:
+            update = ChildUpdate.model_construct(name=_child(record).name)
+        return lambda: engine.update(record.id, update)
+    if record.operation == "delete":
+        return lambda: engine.delete(record.id)
+    traversal = {"list_in": engine.iter_inorder, "list_pre": engine.iter_preorder,
+                 "list_post": engine.iter_postorder}[record.operation]
+    return lambda: deque(traversal(), maxlen=0)
+
+
+def _percentile(values: List[int], p: float) -> float:
+    """Percentil por rango más cercano (values ordenada)"""
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def replay(engine, records: List[TraceRecord], timing: str = "full", speed: float = 1.0) -> dict:
+    """Ejecutar la traza sobre el motor y devolver throughput, latencias (µs) y forma final
+
+    Con timing="original" cada operación espera a su momento de llegada
+    (dividido por `speed`); las latencias miden solo la operación.
+    """
+    operations: List[Tuple[str, Callable[[], object]]] = [
+        (record.operation, prepare(engine, record)) for record in records
+    ]
+    latencies: Dict[str, List[int]] = {operation: [] for operation in OPERATIONS}
+    start = time.perf_counter()
+    for record, (operation, run) in zip(records, operations):
+        if timing == "original":
+            delay = record.t / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        begin = time.perf_counter_ns()
+        run()
+        latencies[operation].append(time.perf_counter_ns() - begin)
+    elapsed = time.perf_counter() - start
+
+    busy = sum(sum(values) for values in latencies.values()) / 1e9
+    latencies["all"] = [value for values in latencies.values() for value in values]
+    report = {}
+    for operation, values in latencies.items():
+        if values:
+            values.sort()
+            report[operation] = {
+                "count": len(values),
+                **{f"p{p}_us": _percentile(values, p) / 1e3 for p in (50, 95, 99)},
+                "max_us": values[-1] / 1e3,
+            }
+    size = engine.size
+    return {
+        "operations": len(records),
+        "elapsed_s": elapsed,
+        "throughput_ops": len(records) / busy if busy else 0.0,
+        "latency": report,
+        "shape": {
+            "size": size,
+            "height": engine.height(),
+            "optimal_height": math.ceil(math.log2(size + 1)),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducir una traza de carga contra los motores de árbol")
+    parser.add_argument("trace")
+    parser.add_argument("--engines", nargs="+", choices=list(ENGINES), default=["bst", "bst_scapegoat", "avl"])
+    parser.add_argument("--timing", choices=["full", "original"], default="full",
+                        help="full: sin pausas; original: respetar los tiempos de llegada")
+    parser.add_argument("--speed", type=float, default=1.0, help="Aceleración de --timing original")
+    parser.add_argument("--output", help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    try:
+        with open(args.trace, "rb") as file:
+            header, records = read_trace(file)
+            records = list(records)
+    except (OSError, ValueError) as e:
+        sys.exit(str(e))
+
+    print(f"{len(records)} operaciones grabadas sobre '{header['engine']}'")
+    print(f"{'motor':14s} {'ops/s':>10s} {'p50 µs':>8s} {'p99 µs':>8s} {'tamaño':>8s} {'altura':>7s} {'óptima':>7s}")
+    results = {}
+    for name in args.engines:
+        result = results[name] = replay(ENGINES[name](), records, args.timing, args.speed)
+        overall = result["latency"].get("all", {"p50_us": 0.0, "p99_us": 0.0})
+        shape = result["shape"]
+        print(f"{name:14s} {result['throughput_ops']:10.0f} {overall['p50_us']:8.2f} {overall['p99_us']:8.2f} "
+              f"{shape['size']:8d} {shape['height']:7d} {shape['optimal_height']:7d}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"trace": args.trace, "header": header, "timing": args.timing, "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
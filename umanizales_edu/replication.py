@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import os
+import pickle
+import time
+from contextlib import asynccontextmanager, suppress
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from .config import settings
+from .controller.avl_controller import change_feed, engine_lock
+from .controller.serialization import etag_epoch
+from .model.schemas import Child
+from .service.avl_service import ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL, children_avl, new_avl_store
+from .service.concurrency import collect
+
+logger = logging.getLogger(__name__)
+
+# Métodos que una réplica puede atender; el resto se redirige al escritor
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# El registro de cambios solo existe en el escritor: también se redirige
+FEED_PATHS = ("/changes", "/changes/stream")
+
+Row = Tuple[int, int, str, str]
+
+# Snapshot cargado actualmente en este proceso (solo réplicas)
+_replica = {"version": -1, "published_at": 0.0}
+
+
+# ==================== SNAPSHOTS ====================
+
+def write_snapshot(path: Path, version: int, rows: List[Row], last_seq: int = 0) -> None:
+    """Escribir el snapshot de forma atómica (archivo temporal + os.replace)
+
+    Los lectores nunca ven un archivo a medio escribir: o ven el anterior o
+    el nuevo completo. `last_seq` es la posición del registro de cambios del
+    escritor que corresponde a `rows`.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temporary, "wb") as file:
+        pickle.dump({"version": version, "epoch": etag_epoch["value"], "last_seq": last_seq,
+                     "published_at": time.time(), "rows": rows}, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def load_snapshot(path: Path) -> Optional[Tuple[Union[ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL], dict]]:
+    """Leer un snapshot y construir un árbol nuevo con su contenido
+
+    El archivo lo escribe el proceso escritor del mismo despliegue; las filas
+    ya vienen validadas y ordenadas por id, así que no se revalidan.
+    """
+    try:
+        with open(path, "rb") as file:
+            snapshot = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    replica = new_avl_store()
+    replica.load_sorted([
+        Child.model_construct(id=id, age=age, name=name, gender=gender)
+        for id, age, name, gender in snapshot["rows"]
+    ], version=snapshot["version"])
+    return replica, snapshot
+
+
+# ==================== PROCESOS ESCRITOR Y LECTOR ====================
+
+async def publish_snapshot(path: Path, published: Optional[int]) -> Optional[int]:
+    """Escritor: publicar el árbol si su versión cambió desde `published`
+
+    Devuelve la versión publicada (o `published` si no había nada nuevo, sin
+    recorrer el árbol ni reescribir el archivo).
+    """
+    if children_avl.version == published:
+        return published
+    async with engine_lock.read():
+        version = children_avl.version
+        if version == published:
+            return published
+        last_seq = change_feed.last_seq
+        rows = await collect((c.id, c.age, c.name, c.gender) for c in children_avl.iter_inorder())
+    await asyncio.to_thread(write_snapshot, path, version, rows, last_seq)
+    return version
+
+
+async def refresh_snapshot(path: Path, current: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
+    """Réplica: cargar el snapshot si el archivo cambió desde `current` (inodo, mtime)
+
+    Devuelve la identidad del archivo cargado, o `current` si no cambió.
+    """
+    try:
+        stat = os.stat(path)
+        identity = (stat.st_ino, stat.st_mtime_ns)
+    except FileNotFoundError:
+        return current
+    if identity == current:
+        return current
+    loaded = await asyncio.to_thread(load_snapshot, path)
+    if loaded is not None:
+        replica, snapshot = loaded
+        # Los recorridos en curso conservan la raíz anterior
+        children_avl.swap(replica)
+        children_avl.version = snapshot["version"]
+        # Las versiones son las del escritor: también su época, para que los ETag coincidan entre procesos
+        etag_epoch["value"] = snapshot.get("epoch", etag_epoch["value"])
+        # Y su posición en el registro de cambios: los listados de la réplica la
+        # devuelven en X-Change-Seq y el consumidor sigue desde ahí en el escritor
+        change_feed.last_seq = snapshot.get("last_seq", 0)
+        _replica["version"] = snapshot["version"]
+        _replica["published_at"] = snapshot["published_at"]
+    return identity
+
+
+async def _publish_loop(path: Path, interval: float) -> None:
+    """Escritor: publicar un snapshot nuevo cada `interval` segundos si hubo cambios"""
+    published = None
+    while True:
+        published = await publish_snapshot(path, published)
+        await asyncio.sleep(interval)
+
+
+async def _refresh_loop(path: Path, interval: float) -> None:
+    """Réplica: recargar el snapshot cuando el escritor publica uno nuevo"""
+    current = None
+    while True:
+        current = await refresh_snapshot(path, current)
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def replication_lifespan(app):
+    """Lifespan de la app AVL: arranca la tarea de publicación o de recarga según el rol
+
+    En modo `standalone` no hace nada. Cada lado revisa cada
+    `cluster_max_staleness / 2` segundos, de modo que una escritura es visible
+    en todas las réplicas a lo sumo `cluster_max_staleness` segundos después
+    (más lo que tarde serializar y cargar el snapshot).
+    """
+    if settings.cluster_role == "standalone":
+        yield
+        return
+    path = Path(settings.cluster_snapshot_path)
+    interval = settings.cluster_max_staleness / 2
+    loop = _publish_loop if settings.cluster_role == "writer" else _refresh_loop
+    logger.info("Replicación en modo %s (snapshot %s, cada %.3fs)", settings.cluster_role, path, interval)
+    task = asyncio.create_task(loop(path, interval))
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+class ReplicaMiddleware:
+    """Middleware ASGI de las réplicas de solo lectura
+
+    Las escrituras y el registro de cambios se responden con 307 hacia el
+    proceso escritor (`cluster_writer_url`), que conserva método y cuerpo; las
+    conexiones WebSocket (ingesta) se rechazan. Las lecturas llevan
+    los encabezados `X-Snapshot-Version` y `X-Snapshot-Age` (segundos desde que
+    el escritor publicó el snapshot servido).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.writer_url = settings.cluster_writer_url.rstrip("/")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            # El canal de ingesta escribe: un WebSocket no sigue redirecciones, se rechaza
+            await send({"type": "websocket.close", "code": 1008, "reason": "Read-only replica"})
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] not in READ_METHODS or scope["path"].endswith(FEED_PATHS):
+            location = self.writer_url + scope["path"]
+            if scope["query_string"]:
+                location += "?" + scope["query_string"].decode("latin-1")
+            await send({
+                "type": "http.response.start",
+                "status": 307,
+                "headers": [(b"location", location.encode("latin-1")), (b"content-length", b"0")],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                age = max(0.0, time.time() - _replica["published_at"]) if _replica["version"] >= 0 else -1
+                headers = list(message.get("headers", []))
+                headers.append((b"x-snapshot-version", str(_replica["version"]).encode("latin-1")))
+                headers.append((b"x-snapshot-age", f"{age:.3f}".encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
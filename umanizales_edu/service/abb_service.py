@@ -1,13 +1,28 @@
-from typing import Optional, List
+import logging
+import math
+import random
+import sys
+import threading
+from itertools import islice
+from typing import Callable, Dict, Iterator, Optional, List, Tuple
+from ..config import settings
+from ..metrics import record_operation, record_search, registry
 from ..model.schemas import Child, ChildUpdate
+from .columnar import ColumnarCache, ColumnarSnapshot
+from .memory import instance_bytes
+
+logger = logging.getLogger(__name__)
 
 
 class BSTNode:
     """Nodo del Árbol Binario de Búsqueda"""
-    def __init__(self, child: Child):
+    def __init__(self, child: Child, version: int = 0):
         self.child = child
         self.left: Optional['BSTNode'] = None
         self.right: Optional['BSTNode'] = None
+        self.parent: Optional['BSTNode'] = None
+        self.deleted: bool = False  # Lápida (eliminación perezosa)
+        self.version = version  # Versión del árbol en la última modificación del niño
 
 
 class ChildrenBST:
@@ -16,10 +31,58 @@ class ChildrenBST:
     El árbol mantiene la propiedad de orden por el campo 'age':
     - Subárbol izquierdo: edades menores
     - Subárbol derecho: edades mayores
+    
+    Un índice id -> nodo y los punteros al padre permiten buscar, actualizar y
+    eliminar por id sin recorrer el árbol; reubicar un nodo cuesta O(profundidad).
+    
+    Modo auto-reconstruible (scapegoat): si una inserción queda más profunda
+    que log_{1/alpha}(n), se reconstruye el subárbol "chivo expiatorio" en
+    forma perfectamente balanceada. Inserción amortizada O(log n).
+    
+    Modo adaptativo: el árbol arranca como ABB simple y vigila la razón
+    profundidad / log2(n) en cada inserción. Si supera `promote_ratio`, migra
+    su contenido a un árbol balanceado y pasa al modo auto-reconstruible.
+    
+    Modo de eliminación perezosa: eliminar solo marca el nodo con una lápida
+    (O(1)); las lecturas omiten los nodos marcados. Cuando la proporción de
+    lápidas supera `compaction_threshold`, un hilo en segundo plano reconstruye
+    el árbol sin ellas.
+    
+    Las escrituras se serializan con un candado; las lecturas no lo toman.
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        self_rebuilding: bool = False,
+        alpha: float = 0.7,
+        adaptive: bool = False,
+        promote_ratio: float = 4.0,
+        promote_min_size: int = 64,
+        lazy_delete: bool = False,
+        compaction_threshold: float = 0.25
+    ):
+        if not 0.5 <= alpha < 1:
+            raise ValueError("alpha debe estar en el rango [0.5, 1)")
         self.root: Optional[BSTNode] = None
+        self._index: Dict[int, BSTNode] = {}
+        self.self_rebuilding = self_rebuilding
+        self.alpha = alpha
+        self.adaptive = adaptive
+        self.promote_ratio = promote_ratio
+        self.promote_min_size = promote_min_size
+        self.promoted: bool = False
+        self.lazy_delete = lazy_delete
+        self.compaction_threshold = compaction_threshold
+        self.size: int = 0
+        self.version: int = 0  # Se incrementa con cada modificación exitosa
+        self.max_size: int = 0  # Tamaño máximo desde la última reconstrucción total
+        self.tombstones: int = 0
+        self.rebuild_count: int = 0
+        self.compaction_count: int = 0
+        self._lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._columnar = ColumnarCache()
+        self._height: Tuple[Tuple[int, int], int] = ((0, 0), 0)  # ((versión, reconstrucciones), altura)
     
     def insert(self, child: Child) -> bool:
         """Insertar un niño en el árbol
@@ -30,27 +93,259 @@ class ChildrenBST:
         Returns:
             True si se insertó correctamente, False si el id ya existe
         """
-        if self.root is None:
-            self.root = BSTNode(child)
+        with self._lock:
+            if child.id in self._index:
+                # ID duplicado
+                return False
+            
+            self.version += 1
+            node = BSTNode(child, self.version)
+            self._index[child.id] = node
+            self.size += 1
+            self.max_size = max(self.max_size, self.size)
+            record_operation("bst", "insert", self._attach(node))
             return True
-        return self._insert_recursive(self.root, child)
     
-    def _insert_recursive(self, node: BSTNode, child: Child) -> bool:
-        """Inserción recursiva"""
-        if child.id == node.child.id:
-            # ID duplicado
-            return False
+    def _attach(self, new_node: BSTNode) -> int:
+        """Enlazar un nodo suelto en su posición por edad y aplicar el balanceo
         
-        if child.age < node.child.age:
-            if node.left is None:
-                node.left = BSTNode(child)
-                return True
-            return self._insert_recursive(node.left, child)
+        Returns:
+            Profundidad a la que se enlazó el nodo (= comparaciones realizadas)
+        """
+        path = self._insert_iterative(new_node)
+        
+        # Profundidad del nuevo nodo = cantidad de ancestros en el camino
+        depth = len(path) - 1
+        if self.self_rebuilding:
+            if depth > self._depth_limit(self.size + self.tombstones):
+                self._rebuild_scapegoat(path[:-1], path[-1])
+        elif self.adaptive and self._is_degenerate(depth):
+            self._promote(depth)
+        return depth
+    
+    def _insert_iterative(self, new_node: BSTNode) -> List[BSTNode]:
+        """Inserción iterativa (soporta árboles degenerados sin límite de recursión)
+        
+        Returns:
+            Camino desde la raíz hasta el nuevo nodo (inclusive)
+        """
+        age = new_node.child.age
+        path: List[BSTNode] = []
+        node = self.root
+        while node is not None:
+            path.append(node)
+            node = node.left if age < node.child.age else node.right
+        
+        if not path:
+            self.root = new_node
+        elif age < path[-1].child.age:
+            path[-1].left = new_node
         else:
-            if node.right is None:
-                node.right = BSTNode(child)
-                return True
-            return self._insert_recursive(node.right, child)
+            path[-1].right = new_node
+        new_node.parent = path[-1] if path else None
+        path.append(new_node)
+        return path
+    
+    def _replace_child(self, parent: Optional[BSTNode], old: BSTNode, new: Optional[BSTNode]) -> None:
+        """Reemplazar el enlace parent -> old por parent -> new"""
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+        if new is not None:
+            new.parent = parent
+    
+    def _detach(self, node: BSTNode) -> None:
+        """Desenlazar un nodo del árbol en O(profundidad) preservando el inorden
+        
+        Con dos hijos, el sucesor inorden ocupa el lugar del nodo (se mueve el
+        nodo, no su contenido, para que el índice por id siga siendo válido).
+        """
+        if node.left is not None and node.right is not None:
+            successor = self._find_min(node.right)
+            if successor.parent is not node:
+                self._replace_child(successor.parent, successor, successor.right)
+                successor.right = node.right
+                successor.right.parent = successor
+            successor.left = node.left
+            successor.left.parent = successor
+            self._replace_child(node.parent, node, successor)
+        else:
+            self._replace_child(node.parent, node, node.left if node.left is not None else node.right)
+        node.parent = node.left = node.right = None
+    
+    def _is_degenerate(self, depth: int) -> bool:
+        """Verificar si la profundidad supera promote_ratio * log2(n)"""
+        node_count = self.size + self.tombstones
+        if node_count < self.promote_min_size:
+            return False
+        return depth / math.log2(node_count) > self.promote_ratio
+    
+    def _promote(self, depth: int) -> None:
+        """Migrar el contenido a un árbol balanceado y activar el modo scapegoat
+        
+        El nuevo árbol se construye con nodos nuevos a partir de una copia del
+        inorden, de modo que las lecturas concurrentes siguen recorriendo el
+        árbol anterior; el cambio de raíz es una única asignación.
+        """
+        self._rebuild_copy()
+        self.self_rebuilding = True
+        self.promoted = True
+        logger.warning(
+            "ChildrenBST degenerado (profundidad %d con %d nodos): migrado a modo auto-reconstruible",
+            depth, self.size
+        )
+    
+    def _depth_limit(self, size: int) -> int:
+        """Profundidad máxima permitida: floor(log_{1/alpha}(n))"""
+        return int(math.log(size) / math.log(1 / self.alpha))
+    
+    def _rebuild_scapegoat(self, path: List[BSTNode], new_node: BSTNode) -> None:
+        """Buscar el ancestro desbalanceado más cercano y reconstruirlo
+        
+        Un nodo es chivo expiatorio si size(hijo) > alpha * size(nodo).
+        """
+        child_node = new_node
+        child_size = 1
+        for parent in reversed(path):
+            sibling = parent.right if parent.left is child_node else parent.left
+            parent_size = 1 + child_size + self._subtree_size(sibling)
+            if child_size > self.alpha * parent_size:
+                grandparent = parent.parent
+                rebuilt = self._build_balanced(self._live_nodes(parent))
+                self._replace_child(grandparent, parent, rebuilt)
+                self.rebuild_count += 1
+                return
+            child_node = parent
+            child_size = parent_size
+    
+    def _subtree_size(self, node: Optional[BSTNode]) -> int:
+        """Contar los nodos de un subárbol (iterativo)"""
+        count = 0
+        stack = [node] if node is not None else []
+        while stack:
+            current = stack.pop()
+            count += 1
+            if current.left is not None:
+                stack.append(current.left)
+            if current.right is not None:
+                stack.append(current.right)
+        return count
+    
+    def _flatten(self, node: Optional[BSTNode]) -> List[BSTNode]:
+        """Aplanar un subárbol en una lista de nodos en inorden (iterativo)"""
+        nodes: List[BSTNode] = []
+        stack: List[BSTNode] = []
+        current = node
+        while stack or current is not None:
+            while current is not None:
+                stack.append(current)
+                current = current.left
+            current = stack.pop()
+            nodes.append(current)
+            current = current.right
+        return nodes
+    
+    def _live_nodes(self, node: Optional[BSTNode]) -> List[BSTNode]:
+        """Nodos vivos del subárbol en inorden; las lápidas encontradas se purgan"""
+        nodes = self._flatten(node)
+        live = [current for current in nodes if not current.deleted]
+        self.tombstones -= len(nodes) - len(live)
+        return live
+    
+    def _build_balanced(self, nodes: List[BSTNode], start: int = 0, end: Optional[int] = None) -> Optional[BSTNode]:
+        """Construir un subárbol perfectamente balanceado reutilizando los nodos
+        
+        Preserva el orden inorden, por lo que se mantiene el orden por edad. O(n).
+        """
+        if end is None:
+            end = len(nodes)
+        if start >= end:
+            return None
+        mid = (start + end) // 2
+        node = nodes[mid]
+        node.left = self._build_balanced(nodes, start, mid)
+        node.right = self._build_balanced(nodes, mid + 1, end)
+        if node.left is not None:
+            node.left.parent = node
+        if node.right is not None:
+            node.right.parent = node
+        return node
+    
+    def rebuild(self) -> None:
+        """Reconstruir todo el árbol en forma perfectamente balanceada (sin lápidas)"""
+        with self._lock:
+            self.root = self._build_balanced(self._live_nodes(self.root))
+            if self.root is not None:
+                self.root.parent = None
+            self.max_size = self.size
+            self.rebuild_count += 1
+    
+    def _live_entries(self) -> List[Tuple[Child, int]]:
+        """(niño, versión) de los nodos vivos en inorden"""
+        return [(node.child, node.version) for node in self._flatten(self.root) if not node.deleted]
+    
+    def _copy_balanced(self, entries: List[Tuple[Child, int]]) -> Tuple[Optional[BSTNode], Dict[int, BSTNode]]:
+        """Árbol balanceado con nodos nuevos para `entries` (en inorden) y su índice por id
+        
+        No toca el árbol actual: puede correr sin el candado.
+        """
+        nodes = [BSTNode(child, version) for child, version in entries]
+        root = self._build_balanced(nodes)
+        if root is not None:
+            root.parent = None
+        return root, {node.child.id: node for node in nodes}
+    
+    def _install(self, root: Optional[BSTNode], index: Dict[int, BSTNode]) -> None:
+        """Reemplazar raíz e índice por una copia sin lápidas"""
+        self.root = root
+        self._index = index
+        self.tombstones = 0
+        self.max_size = self.size
+        self.rebuild_count += 1
+    
+    def _rebuild_copy(self) -> None:
+        """Reconstruir el árbol balanceado con nodos nuevos y reemplazarlo de una vez
+        
+        Las lecturas concurrentes siguen recorriendo el árbol anterior, que no
+        se modifica; el índice y la raíz se reemplazan al final.
+        """
+        self._install(*self._copy_balanced(self._live_entries()))
+    
+    def compact(self) -> None:
+        """Compactar el árbol eliminando físicamente los nodos marcados
+        
+        Bajo el candado solo se toman los nodos vivos; la copia balanceada se
+        arma sin él, así que las escrituras no esperan a la construcción. Si
+        alguna llegó mientras tanto la copia se descarta y la compactación
+        queda para la próxima eliminación.
+        """
+        with self._lock:
+            version = self.version
+            entries = self._live_entries()
+        root, index = self._copy_balanced(entries)
+        with self._lock:
+            if version != self.version:
+                return
+            self._install(root, index)
+            self.compaction_count += 1
+    
+    def _maybe_compact(self) -> None:
+        """Lanzar la compactación en segundo plano si hay demasiadas lápidas"""
+        if self.tombstones <= self.compaction_threshold * (self.size + self.tombstones):
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, name="bst-compaction", daemon=True)
+        self._compaction_thread.start()
+    
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Esperar a que termine la compactación en segundo plano (si hay una en curso)"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
     
     def search(self, child_id: int) -> Optional[Child]:
         """Buscar un niño por ID
@@ -61,26 +356,27 @@ class ChildrenBST:
         Returns:
             Objeto Child si se encuentra, None si no existe
         """
-        return self._search_recursive(self.root, child_id)
+        node = self._index.get(child_id)
+        # Búsqueda por índice: no se recorre ningún nodo del árbol
+        record_search("bst", 0)
+        return node.child if node is not None else None
     
-    def _search_recursive(self, node: Optional[BSTNode], child_id: int) -> Optional[Child]:
-        """Búsqueda recursiva por ID (recorre todo el árbol si es necesario)"""
-        if node is None:
-            return None
-        
-        if child_id == node.child.id:
-            return node.child
+    def search_with_version(self, child_id: int) -> Optional[Tuple[Child, int]]:
+        """Buscar un niño por ID junto con la versión de su última modificación
         
-        # Buscar en ambos subárboles ya que el árbol está ordenado por age, no por id
-        left_result = self._search_recursive(node.left, child_id)
-        if left_result is not None:
-            return left_result
-        
-        return self._search_recursive(node.right, child_id)
+        Returns:
+            Tupla (Child, versión) si se encuentra, None si no existe
+        """
+        node = self._index.get(child_id)
+        record_search("bst", 0)
+        return (node.child, node.version) if node is not None else None
     
     def update(self, child_id: int, child_update: ChildUpdate) -> Optional[Child]:
         """Actualizar un niño existente
         
+        Si cambia la edad, el nodo se desenlaza y se vuelve a insertar en su
+        nueva posición para mantener el orden del árbol.
+        
         Args:
             child_id: ID del niño a actualizar
             child_update: Datos a actualizar
@@ -88,34 +384,30 @@ class ChildrenBST:
         Returns:
             Objeto Child actualizado si existe, None si no se encuentra
         """
-        node = self._find_node(self.root, child_id)
-        if node is None:
-            return None
-        
-        # Actualizar solo los campos proporcionados
-        if child_update.name is not None:
-            node.child.name = child_update.name
-        if child_update.age is not None:
-            node.child.age = child_update.age
-        if child_update.gender is not None:
-            node.child.gender = child_update.gender
-        
-        return node.child
-    
-    def _find_node(self, node: Optional[BSTNode], child_id: int) -> Optional[BSTNode]:
-        """Encontrar un nodo por ID (recorre todo el árbol si es necesario)"""
-        if node is None:
-            return None
-        
-        if child_id == node.child.id:
-            return node
-        
-        # Buscar en ambos subárboles ya que el árbol está ordenado por age, no por id
-        left_result = self._find_node(node.left, child_id)
-        if left_result is not None:
-            return left_result
-        
-        return self._find_node(node.right, child_id)
+        with self._lock:
+            node = self._index.get(child_id)
+            if node is None:
+                return None
+            
+            # La versión se asigna antes de reenlazar: si el reenlace dispara la
+            # promoción, la copia del árbol conserva la versión del nodo
+            self.version += 1
+            node.version = self.version
+            
+            # Actualizar solo los campos proporcionados, en una copia: quien ya
+            # tomó el niño (un listado o una exportación en curso) lo conserva
+            # como estaba
+            changes = child_update.model_dump(exclude_none=True)
+            moves = "age" in changes and changes["age"] != node.child.age
+            comparisons = 0
+            if moves:
+                self._detach(node)
+            node.child = node.child.model_copy(update=changes)
+            if moves:
+                comparisons = self._attach(node)
+            
+            record_operation("bst", "update", comparisons)
+            return node.child
     
     def delete(self, child_id: int) -> bool:
         """Eliminar un niño por ID
@@ -126,45 +418,26 @@ class ChildrenBST:
         Returns:
             True si se eliminó correctamente, False si no existe
         """
-        self.root, deleted = self._delete_recursive(self.root, child_id)
-        return deleted
-    
-    def _delete_recursive(self, node: Optional[BSTNode], child_id: int) -> tuple[Optional[BSTNode], bool]:
-        """Eliminación recursiva
-        
-        Returns:
-            Tupla (nodo actualizado, si se eliminó)
-        """
-        if node is None:
-            return None, False
-        
-        # Buscar el nodo por ID (no por age)
-        if child_id == node.child.id:
-            # Nodo encontrado - 3 casos
+        with self._lock:
+            node = self._index.pop(child_id, None)
+            if node is None:
+                return False
+            self.size -= 1
+            self.version += 1
+            record_operation("bst", "delete", 0)
             
-            # Caso 1: Nodo hoja (sin hijos)
-            if node.left is None and node.right is None:
-                return None, True
-            
-            # Caso 2: Nodo con un solo hijo
-            if node.left is None:
-                return node.right, True
-            if node.right is None:
-                return node.left, True
+            if self.lazy_delete:
+                # Solo marcar el nodo; la compactación lo retira después
+                node.deleted = True
+                self.tombstones += 1
+                self._maybe_compact()
+                return True
             
-            # Caso 3: Nodo con dos hijos
-            # Encontrar el sucesor inorden (mínimo del subárbol derecho)
-            successor = self._find_min(node.right)
-            node.child = successor.child
-            node.right, _ = self._delete_recursive(node.right, successor.child.id)
-            return node, True
-        else:
-            # Buscar en ambos subárboles
-            node.left, deleted = self._delete_recursive(node.left, child_id)
-            if deleted:
-                return node, True
-            node.right, deleted = self._delete_recursive(node.right, child_id)
-            return node, deleted
+            self._detach(node)
+            # Reconstrucción total si el árbol se redujo demasiado (scapegoat)
+            if self.self_rebuilding and self.size < self.alpha * self.max_size:
+                self.rebuild()
+            return True
     
     def _find_min(self, node: BSTNode) -> BSTNode:
         """Encontrar el nodo con el valor mínimo"""
@@ -173,6 +446,103 @@ class ChildrenBST:
             current = current.left
         return current
     
+    def _find_max(self, node: BSTNode) -> BSTNode:
+        """Encontrar el nodo con el valor máximo"""
+        current = node
+        while current.right is not None:
+            current = current.right
+        return current
+    
+    def _successor(self, node: BSTNode) -> Optional[BSTNode]:
+        """Siguiente nodo en inorden (O(1) amortizado usando punteros al padre)"""
+        if node.right is not None:
+            return self._find_min(node.right)
+        while node.parent is not None and node.parent.right is node:
+            node = node.parent
+        return node.parent
+    
+    def _predecessor(self, node: BSTNode) -> Optional[BSTNode]:
+        """Nodo anterior en inorden (O(1) amortizado usando punteros al padre)"""
+        if node.left is not None:
+            return self._find_max(node.left)
+        while node.parent is not None and node.parent.left is node:
+            node = node.parent
+        return node.parent
+    
+    def _first_at_least(self, age: int) -> Optional[BSTNode]:
+        """Primer nodo en inorden con edad >= age (descenso podado, O(profundidad))"""
+        candidate = None
+        node = self.root
+        while node is not None:
+            if node.child.age >= age:
+                candidate = node
+                node = node.left
+            else:
+                node = node.right
+        return candidate
+    
+    # ==================== CONSULTAS POR EDAD ====================
+    
+    def range_by_age(self, lo: int, hi: int, limit: Optional[int] = None, after_id: Optional[int] = None) -> List[Child]:
+        """Niños con lo <= edad <= hi en orden ascendente de edad
+        
+        Args:
+            lo: Edad mínima (inclusive)
+            hi: Edad máxima (inclusive)
+            limit: Cantidad máxima de resultados (None = sin límite)
+            after_id: Cursor; continuar después del niño con este id
+            
+        Returns:
+            Lista de niños en el rango. Costo O(profundidad + k)
+        """
+        if after_id is not None:
+            node = self._index.get(after_id)
+            node = self._successor(node) if node is not None else None
+        else:
+            node = self._first_at_least(lo)
+        
+        result: List[Child] = []
+        visited = 0
+        while node is not None and node.child.age <= hi and (limit is None or len(result) < limit):
+            visited += 1
+            if node.child.age >= lo and not node.deleted:
+                result.append(node.child)
+            node = self._successor(node)
+        record_operation("bst", "range", visited)
+        return result
+    
+    def youngest(self, k: int, after_id: Optional[int] = None) -> List[Child]:
+        """Los k niños de menor edad (orden ascendente), O(profundidad + k)"""
+        return self._walk(self._find_min, self._successor, k, after_id)
+    
+    def oldest(self, k: int, after_id: Optional[int] = None) -> List[Child]:
+        """Los k niños de mayor edad (orden descendente), O(profundidad + k)"""
+        return self._walk(self._find_max, self._predecessor, k, after_id)
+    
+    def _walk(
+        self,
+        first: Callable[[BSTNode], BSTNode],
+        step: Callable[[BSTNode], Optional[BSTNode]],
+        k: int,
+        after_id: Optional[int]
+    ) -> List[Child]:
+        """Recorrer k nodos desde un extremo (o desde el cursor) con la función de paso dada"""
+        if after_id is not None:
+            node = self._index.get(after_id)
+            node = step(node) if node is not None else None
+        else:
+            node = first(self.root) if self.root is not None else None
+        
+        result: List[Child] = []
+        visited = 0
+        while node is not None and len(result) < k:
+            visited += 1
+            if not node.deleted:
+                result.append(node.child)
+            node = step(node)
+        record_operation("bst", "top_k", visited)
+        return result
+    
     def inorder_traversal(self) -> List[Child]:
         """Recorrido Inorden (Izquierda -> Raíz -> Derecha)
         
@@ -187,7 +557,8 @@ class ChildrenBST:
         """Recorrido inorden recursivo"""
         if node is not None:
             self._inorder_recursive(node.left, result)
-            result.append(node.child)
+            if not node.deleted:
+                result.append(node.child)
             self._inorder_recursive(node.right, result)
     
     def preorder_traversal(self) -> List[Child]:
@@ -203,7 +574,8 @@ class ChildrenBST:
     def _preorder_recursive(self, node: Optional[BSTNode], result: List[Child]):
         """Recorrido preorden recursivo"""
         if node is not None:
-            result.append(node.child)
+            if not node.deleted:
+                result.append(node.child)
             self._preorder_recursive(node.left, result)
             self._preorder_recursive(node.right, result)
     
@@ -222,8 +594,157 @@ class ChildrenBST:
         if node is not None:
             self._postorder_recursive(node.left, result)
             self._postorder_recursive(node.right, result)
-            result.append(node.child)
+            if not node.deleted:
+                result.append(node.child)
+        
+    # ==================== RECORRIDOS ITERATIVOS (GENERADORES) ====================
+    
+    def iter_inorder(self) -> Iterator[Child]:
+        """Recorrido inorden perezoso e iterativo (no depende del límite de recursión)"""
+        stack: List[BSTNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            if not node.deleted:
+                yield node.child
+            node = node.right
+    
+    def iter_preorder(self) -> Iterator[Child]:
+        """Recorrido preorden perezoso e iterativo"""
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            if not node.deleted:
+                yield node.child
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+    
+    def iter_postorder(self) -> Iterator[Child]:
+        """Recorrido postorden perezoso e iterativo"""
+        stack: List[BSTNode] = []
+        last_visited: Optional[BSTNode] = None
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+                continue
+            peek = stack[-1]
+            if peek.right is not None and last_visited is not peek.right:
+                node = peek.right
+            else:
+                if not peek.deleted:
+                    yield peek.child
+                last_visited = stack.pop()
+    
+    # ==================== VISTA COLUMNAR ====================
+    
+    def columnar_snapshot(self) -> ColumnarSnapshot:
+        """Columnas NumPy (id, age, gender) en orden de edad, en caché mientras no cambie la versión"""
+        return self._columnar.get(self)
+    
+    # ==================== MÉTODOS DE DIAGNÓSTICO ====================
+    
+    def height(self) -> int:
+        """Obtener la altura total del árbol, en caché mientras no cambie su forma
+        
+        Medirla recorre todo el árbol; /metrics y /stats/tree la consultan en
+        cada lectura, así que se guarda junto con la versión y la cantidad de
+        reconstrucciones (la compactación cambia la forma sin cambiar la versión).
+        """
+        key = (self.version, self.rebuild_count)
+        cached_key, height = self._height
+        if cached_key != key:
+            height = self._measure_height()
+            self._height = (key, height)
+        return height
+    
+    def _measure_height(self) -> int:
+        """Recorrer el árbol para medir su altura (iterativo, soporta árboles degenerados)"""
+        height = 0
+        stack = [(self.root, 1)] if self.root is not None else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth)
+            if node.left is not None:
+                stack.append((node.left, depth + 1))
+            if node.right is not None:
+                stack.append((node.right, depth + 1))
+        return height
+    
+    def count_nodes(self) -> int:
+        """Contar la cantidad de niños en el árbol (sin lápidas)"""
+        return sum(1 for node in self._flatten(self.root) if not node.deleted)
+    
+    def memory_parts(self, sample_size: int, rng: random.Random) -> dict:
+        """Datos para estimar la memoria (ver memory.estimate_memory): nodos, muestra, índices y cachés
+        
+        La muestra es sistemática sobre el índice por id (uno de cada n/k desde
+        un inicio al azar): el salto sigue siendo O(n), pero lo hace islice en
+        C, sin tocar los nodos intermedios desde Python. Los nodos con lápida siguen ocupando memoria.
+        """
+        step = max(1, len(self._index) // sample_size) if sample_size else 0
+        nodes = list(islice(self._index.values(), rng.randrange(step), None, step))[:sample_size] if step else []
+        return {
+            "nodes": self.size + self.tombstones,
+            "node_bytes": instance_bytes(BSTNode),
+            "sample": nodes,
+            "indexes": {"id_index": sys.getsizeof(self._index)},
+            "caches": {"columnar": self._columnar.nbytes},
+        }
+    
+    def is_valid(self) -> bool:
+        """Verificar las invariantes del árbol
+        
+        - El inorden está ordenado por edad (propiedad de ABB)
+        - Los punteros al padre son consistentes
+        - El índice por id, el tamaño y las lápidas coinciden con los nodos del árbol
+        """
+        if self.root is not None and self.root.parent is not None:
+            return False
+        
+        nodes = self._flatten(self.root)
+        if len(nodes) != self.size + self.tombstones or len(self._index) != self.size:
+            return False
+        if sum(1 for node in nodes if node.deleted) != self.tombstones:
+            return False
+        
+        previous_age = None
+        for node in nodes:
+            if previous_age is not None and node.child.age < previous_age:
+                return False
+            previous_age = node.child.age
+            if not node.deleted and self._index.get(node.child.id) is not node:
+                return False
+            for child_node in (node.left, node.right):
+                if child_node is not None and child_node.parent is not node:
+                    return False
+        return True
 
 
 # Instancia global del árbol (almacenamiento en memoria)
-children_bst = ChildrenBST()
\ No newline at end of file
+children_bst = ChildrenBST(
+    self_rebuilding=settings.bst_self_rebuilding,
+    alpha=settings.bst_alpha,
+    adaptive=settings.bst_adaptive,
+    promote_ratio=settings.bst_promote_ratio,
+    promote_min_size=settings.bst_promote_min_size,
+    lazy_delete=settings.bst_lazy_delete,
+    compaction_threshold=settings.bst_compaction_threshold
+)
+
+
+def _collect_gauges():
+    """Métricas de estado del árbol global (la altura se recorre solo si cambió el árbol)"""
+    labels = (("engine", "bst"),)
+    yield "children_engine_height", labels, children_bst.height()
+    yield "children_engine_size", labels, children_bst.size
+    yield "children_engine_rebuilds", labels, children_bst.rebuild_count
+
+
+registry.register_gauge_callback(_collect_gauges)
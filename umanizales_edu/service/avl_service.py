@@ -1,14 +1,35 @@
-from typing import Optional, List
+import asyncio
+import heapq
+import random
+import sys
+import threading
+from collections import OrderedDict
+from itertools import chain, repeat
+from operator import attrgetter, itemgetter
+from typing import Iterator, Optional, List, Set, Tuple, Union
+from ..config import settings
+from ..metrics import record_operation, record_search, registry
 from ..model.schemas import Child, ChildUpdate
+from .columnar import ColumnarCache, ColumnarSnapshot
+from .memory import instance_bytes
+from .segments import Record, Segment
+
+# Etiquetas precalculadas para el contador de rotaciones
+ROTATION_LL = (("engine", "avl"), ("type", "LL"))
+ROTATION_RR = (("engine", "avl"), ("type", "RR"))
+ROTATION_LR = (("engine", "avl"), ("type", "LR"))
+ROTATION_RL = (("engine", "avl"), ("type", "RL"))
 
 
 class AVLNode:
     """Nodo del Árbol AVL"""
-    def __init__(self, child: Child):
+    def __init__(self, child: Child, version: int = 0):
         self.child = child
         self.left: Optional['AVLNode'] = None
         self.right: Optional['AVLNode'] = None
         self.height: int = 1  # Altura del nodo (necesaria para balanceo)
+        self.count: int = 1  # Cantidad de nodos del subárbol (tamaños en O(1) para split/join)
+        self.version = version  # Versión del árbol en la última modificación del niño
 
 
 class ChildrenAVL:
@@ -23,6 +44,11 @@ class ChildrenAVL:
     
     def __init__(self):
         self.root: Optional[AVLNode] = None
+        self.size: int = 0
+        self.version: int = 0  # Se incrementa con cada modificación exitosa
+        self._comparisons: int = 0  # Comparaciones de la operación en curso (métricas)
+        self._inserted: bool = False
+        self._columnar = ColumnarCache()
     
     # ==================== MÉTODOS AUXILIARES ====================
     
@@ -41,9 +67,16 @@ class ChildrenAVL:
             return 0
         return self._get_height(node.right) - self._get_height(node.left)
     
+    def _get_count(self, node: Optional[AVLNode]) -> int:
+        """Obtener la cantidad de nodos del subárbol"""
+        if node is None:
+            return 0
+        return node.count
+    
     def _update_height(self, node: AVLNode) -> None:
-        """Actualizar la altura de un nodo"""
+        """Actualizar la altura de un nodo (y el tamaño de su subárbol)"""
         node.height = 1 + max(self._get_height(node.left), self._get_height(node.right))
+        node.count = 1 + self._get_count(node.left) + self._get_count(node.right)
     
     # ==================== ROTACIONES ====================
     
@@ -114,19 +147,23 @@ class ChildrenAVL:
         
         # Caso Left-Left (LL)
         if balance < -1 and self._get_balance(node.left) <= 0:
+            registry.inc("children_engine_rotations_total", ROTATION_LL)
             return self._rotate_right(node)
         
         # Caso Right-Right (RR)
         if balance > 1 and self._get_balance(node.right) >= 0:
+            registry.inc("children_engine_rotations_total", ROTATION_RR)
             return self._rotate_left(node)
         
         # Caso Left-Right (LR)
         if balance < -1 and self._get_balance(node.left) > 0:
+            registry.inc("children_engine_rotations_total", ROTATION_LR)
             node.left = self._rotate_left(node.left)
             return self._rotate_right(node)
         
         # Caso Right-Left (RL)
         if balance > 1 and self._get_balance(node.right) < 0:
+            registry.inc("children_engine_rotations_total", ROTATION_RL)
             node.right = self._rotate_right(node.right)
             return self._rotate_left(node)
         
@@ -143,8 +180,14 @@ class ChildrenAVL:
         Returns:
             True si se insertó correctamente, False si el id ya existe
         """
+        self._comparisons = 0
+        self._inserted = False
         self.root = self._insert_recursive(self.root, child)
-        return True
+        record_operation("avl", "insert", self._comparisons)
+        if self._inserted:
+            self.size += 1
+            self.version += 1
+        return self._inserted
     
     def _insert_recursive(self, node: Optional[AVLNode], child: Child) -> AVLNode:
         """Inserción recursiva con balanceo automático
@@ -154,8 +197,10 @@ class ChildrenAVL:
         """
         # Caso base: insertar el nodo
         if node is None:
-            return AVLNode(child)
-            
+            self._inserted = True
+            return AVLNode(child, self.version + 1)
+        
+        self._comparisons += 1
         # Verificar duplicado
         if child.id == node.child.id:
             return node
@@ -178,21 +223,19 @@ class ChildrenAVL:
         Returns:
             Objeto Child si se encuentra, None si no existe
         """
-        return self._search_recursive(self.root, id)
+        node = self._find_node(self.root, id)
+        record_search("avl", self._comparisons)
+        return node.child if node is not None else None
     
-    def _search_recursive(self, node: Optional[AVLNode], id: int) -> Optional[Child]:
-        """Búsqueda recursiva por ID (recorre todo el árbol si es necesario)"""
-        if node is None:
-            return None
-        
-        if id == node.child.id:
-            return node.child
+    def search_with_version(self, id: int) -> Optional[Tuple[Child, int]]:
+        """Buscar un niño por ID junto con la versión de su última modificación
         
-        # Buscar en ambos subárboles ya que el árbol está ordenado por id
-        if id < node.child.id:
-            return self._search_recursive(node.left, id)
-        else:
-            return self._search_recursive(node.right, id)
+        Returns:
+            Tupla (Child, versión) si se encuentra, None si no existe
+        """
+        node = self._find_node(self.root, id)
+        record_search("avl", self._comparisons)
+        return (node.child, node.version) if node is not None else None
     
     def update(self, id: int, update_data: ChildUpdate) -> Optional[Child]:
         """Actualizar un niño existente
@@ -205,32 +248,32 @@ class ChildrenAVL:
             Objeto Child actualizado si existe, None si no se encuentra
         """
         node = self._find_node(self.root, id)
+        record_operation("avl", "update", self._comparisons)
         if node is None:
             return None
         
-        # Actualizar solo los campos proporcionados
-        if update_data.name is not None:
-            node.child.name = update_data.name
-        if update_data.age is not None:
-            node.child.age = update_data.age
-        if update_data.gender is not None:
-            node.child.gender = update_data.gender
+        # Actualizar solo los campos proporcionados, en una copia: quien ya
+        # recorrió el árbol (p. ej. un listado que soltó el candado de su
+        # fragmento) conserva el niño como estaba
+        node.child = node.child.model_copy(update=update_data.model_dump(exclude_none=True))
         
+        self.version += 1
+        node.version = self.version
         return node.child
     
     def _find_node(self, node: Optional[AVLNode], id: int) -> Optional[AVLNode]:
-        """Encontrar un nodo por ID (recorre todo el árbol si es necesario)"""
-        if node is None:
-            return None
-        
-        if id == node.child.id:
-            return node
+        """Encontrar un nodo por ID descendiendo según el orden por id
         
-        # Buscar en ambos subárboles ya que el árbol está ordenado por id
-        if id < node.child.id:
-            return self._find_node(node.left, id)
-        else:
-            return self._find_node(node.right, id)
+        Deja en self._comparisons la cantidad de nodos visitados.
+        """
+        visited = 0
+        while node is not None:
+            visited += 1
+            if id == node.child.id:
+                break
+            node = node.left if id < node.child.id else node.right
+        self._comparisons = visited
+        return node
     
     def delete(self, id: int) -> bool:
         """Eliminar un niño por ID con auto-balanceo
@@ -241,7 +284,12 @@ class ChildrenAVL:
         Returns:
             True si se eliminó correctamente, False si no existe
         """
+        self._comparisons = 0
         self.root, deleted = self._delete_recursive(self.root, id)
+        record_operation("avl", "delete", self._comparisons)
+        if deleted:
+            self.size -= 1
+            self.version += 1
         return deleted
     
     def _delete_recursive(self, node: Optional[AVLNode], id: int) -> tuple[Optional[AVLNode], bool]:
@@ -253,6 +301,7 @@ class ChildrenAVL:
         if node is None:
             return None, False
         
+        self._comparisons += 1
         # Buscar el nodo por ID (no por age)
         if id == node.child.id:
             # Nodo encontrado - 3 casos de eliminación
@@ -271,19 +320,19 @@ class ChildrenAVL:
             # Encontrar el sucesor inorden (mínimo del subárbol derecho)
             successor = self._find_min(node.right)
             node.child = successor.child
+            node.version = successor.version
             node.right, _ = self._delete_recursive(node.right, successor.child.id)
             
             # Balancear el nodo después de la eliminación
             return self._balance(node), True
-        else:
-            # Buscar en ambos subárboles
+        elif id < node.child.id:
+            # Descender solo por el subárbol que puede contener el id
             node.left, deleted = self._delete_recursive(node.left, id)
-            if deleted:
-                return self._balance(node), True
+        else:
             node.right, deleted = self._delete_recursive(node.right, id)
-            if deleted:
-                return self._balance(node), True
-            return node, False
+        if deleted:
+            return self._balance(node), True
+        return node, False
     
     def _find_min(self, node: AVLNode) -> AVLNode:
         """Encontrar el nodo con el valor mínimo"""
@@ -292,6 +341,222 @@ class ChildrenAVL:
             current = current.left
         return current
     
+    # ==================== CARGA MASIVA ====================
+    
+    def load_sorted(self, children: List[Child], version: Optional[int] = None) -> None:
+        """Reemplazar el contenido del árbol con una lista ya ordenada por id
+        
+        Construye un árbol perfectamente balanceado en O(n) sin rotaciones.
+        
+        Args:
+            children: Niños ordenados por id ascendente y sin ids repetidos
+            version: Versión del árbol (y de cada nodo) tras la carga; por defecto la siguiente
+        """
+        self.version = self.version + 1 if version is None else version
+        self.root = self._build_balanced(children, 0, len(children) - 1)
+        self.size = len(children)
+        self._columnar.clear()
+    
+    def swap(self, other: 'ChildrenAVL') -> None:
+        """Adoptar el contenido de otro árbol (los recorridos en curso conservan la raíz anterior)"""
+        self.root, self.size = other.root, other.size
+        self._columnar.clear()
+    
+    def _build_balanced(self, children: List[Child], lo: int, hi: int) -> Optional[AVLNode]:
+        """Construir recursivamente el subárbol con children[lo..hi] (la mediana es la raíz)"""
+        if lo > hi:
+            return None
+        mid = (lo + hi) // 2
+        node = AVLNode(children[mid], self.version)
+        node.left = self._build_balanced(children, lo, mid - 1)
+        node.right = self._build_balanced(children, mid + 1, hi)
+        self._update_height(node)
+        return node
+    
+    # ==================== OPERACIONES DE CONJUNTOS (SPLIT / JOIN) ====================
+    #
+    # Algoritmos de Blelloch, Ferizovic y Sun ("Just Join for Parallel Ordered
+    # Sets"): todo se construye sobre join(L, k, R), que une dos árboles AVL
+    # con todas las claves de L < k < todas las de R en O(|h(L) - h(R)|).
+    # union, intersection y difference cuestan O(m log(n/m + 1)) con m <= n.
+    #
+    # Las operaciones son persistentes: nunca modifican los nodos existentes
+    # (join crea nodos nuevos) y el resultado comparte con los operandos los
+    # subárboles que no cambiaron. Por eso el resultado es una vista de solo
+    # lectura, válida mientras no se modifique ninguno de los operandos.
+    
+    def _new_node(self, template: AVLNode, left: Optional[AVLNode], right: Optional[AVLNode]) -> AVLNode:
+        """Nodo nuevo con el contenido de `template` y los hijos dados"""
+        node = AVLNode(template.child, template.version)
+        node.left = left
+        node.right = right
+        self._update_height(node)
+        return node
+    
+    def _join(self, left: Optional[AVLNode], middle: AVLNode, right: Optional[AVLNode]) -> AVLNode:
+        """Unir left < middle < right en un árbol AVL"""
+        if self._get_height(left) > self._get_height(right) + 1:
+            return self._join_right(left, middle, right)
+        if self._get_height(right) > self._get_height(left) + 1:
+            return self._join_left(left, middle, right)
+        return self._new_node(middle, left, right)
+    
+    def _join_right(self, left: AVLNode, middle: AVLNode, right: Optional[AVLNode]) -> AVLNode:
+        """join cuando left es más alto: descender por su borde derecho"""
+        inner = left.right
+        if self._get_height(inner) <= self._get_height(right) + 1:
+            joined = self._new_node(middle, inner, right)
+            if self._get_height(joined) <= self._get_height(left.left) + 1:
+                return self._new_node(left, left.left, joined)
+            # Rotación doble: `inner` sube, así que se copia en lugar de modificarlo
+            joined = self._new_node(inner, inner.left, self._new_node(middle, inner.right, right))
+            return self._rotate_left(self._new_node(left, left.left, joined))
+        joined = self._join_right(inner, middle, right)
+        node = self._new_node(left, left.left, joined)
+        if self._get_height(joined) <= self._get_height(left.left) + 1:
+            return node
+        return self._rotate_left(node)
+    
+    def _join_left(self, left: Optional[AVLNode], middle: AVLNode, right: AVLNode) -> AVLNode:
+        """join cuando right es más alto: descender por su borde izquierdo (simétrico)"""
+        inner = right.left
+        if self._get_height(inner) <= self._get_height(left) + 1:
+            joined = self._new_node(middle, left, inner)
+            if self._get_height(joined) <= self._get_height(right.right) + 1:
+                return self._new_node(right, joined, right.right)
+            joined = self._new_node(inner, self._new_node(middle, left, inner.left), inner.right)
+            return self._rotate_right(self._new_node(right, joined, right.right))
+        joined = self._join_left(left, middle, inner)
+        node = self._new_node(right, joined, right.right)
+        if self._get_height(joined) <= self._get_height(right.right) + 1:
+            return node
+        return self._rotate_right(node)
+    
+    def _split(self, node: Optional[AVLNode], id: int) -> Tuple[Optional[AVLNode], Optional[AVLNode], Optional[AVLNode]]:
+        """Dividir en (ids < id, nodo con el id o None, ids > id)"""
+        if node is None:
+            return None, None, None
+        if id == node.child.id:
+            return node.left, node, node.right
+        if id < node.child.id:
+            left, found, right = self._split(node.left, id)
+            return left, found, self._join(right, node, node.right)
+        left, found, right = self._split(node.right, id)
+        return self._join(node.left, node, left), found, right
+    
+    def _split_last(self, node: AVLNode) -> Tuple[Optional[AVLNode], AVLNode]:
+        """Separar el nodo de mayor id: (resto, último)"""
+        if node.right is None:
+            return node.left, node
+        rest, last = self._split_last(node.right)
+        return self._join(node.left, node, rest), last
+    
+    def _join2(self, left: Optional[AVLNode], right: Optional[AVLNode]) -> Optional[AVLNode]:
+        """Unir left < right sin nodo intermedio"""
+        if left is None:
+            return right
+        rest, last = self._split_last(left)
+        return self._join(rest, last, right)
+    
+    def _union(self, a: Optional[AVLNode], b: Optional[AVLNode]) -> Optional[AVLNode]:
+        if a is None:
+            return b
+        if b is None:
+            return a
+        left, _, right = self._split(b, a.child.id)
+        return self._join(self._union(a.left, left), a, self._union(a.right, right))
+    
+    def _intersection(self, a: Optional[AVLNode], b: Optional[AVLNode]) -> Optional[AVLNode]:
+        if a is None or b is None:
+            return None
+        left, found, right = self._split(b, a.child.id)
+        inner_left = self._intersection(a.left, left)
+        inner_right = self._intersection(a.right, right)
+        if found is not None:
+            return self._join(inner_left, a, inner_right)
+        return self._join2(inner_left, inner_right)
+    
+    def _difference(self, a: Optional[AVLNode], b: Optional[AVLNode]) -> Optional[AVLNode]:
+        if a is None or b is None:
+            return a
+        left, found, right = self._split(b, a.child.id)
+        inner_left = self._difference(a.left, left)
+        inner_right = self._difference(a.right, right)
+        if found is not None:
+            return self._join2(inner_left, inner_right)
+        return self._join(inner_left, a, inner_right)
+    
+    def _from_root(self, root: Optional[AVLNode]) -> 'ChildrenAVL':
+        tree = ChildrenAVL()
+        tree.root = root
+        tree.size = self._get_count(root)
+        return tree
+    
+    def split(self, id: int) -> Tuple['ChildrenAVL', Optional[Child], 'ChildrenAVL']:
+        """Dividir por id en O(log n)
+        
+        Returns:
+            Tupla (árbol con ids < id, niño con ese id o None, árbol con ids > id)
+        """
+        left, found, right = self._split(self.root, id)
+        return self._from_root(left), found.child if found is not None else None, self._from_root(right)
+    
+    def union(self, other: 'ChildrenAVL') -> 'ChildrenAVL':
+        """Niños de ambos árboles; si un id está en los dos, se conserva el de self"""
+        return self._from_root(self._union(self.root, other.root))
+    
+    def intersection(self, other: 'ChildrenAVL') -> 'ChildrenAVL':
+        """Niños de self cuyo id también está en other"""
+        return self._from_root(self._intersection(self.root, other.root))
+    
+    def difference(self, other: 'ChildrenAVL') -> 'ChildrenAVL':
+        """Niños de self cuyo id no está en other"""
+        return self._from_root(self._difference(self.root, other.root))
+    
+    def reconcile(self, roster: List[Child]) -> Tuple[List[int], List[int], List[int]]:
+        """Comparar el árbol con un listado externo
+        
+        Args:
+            roster: Niños del listado externo, ordenados por id y sin ids repetidos
+            
+        Returns:
+            Tupla (ids solo en el listado, ids solo en el árbol, ids en ambos con datos distintos)
+        """
+        other = ChildrenAVL()
+        other.load_sorted(roster)
+        added = [child.id for child in other.difference(self).iter_inorder()]
+        removed = [child.id for child in self.difference(other).iter_inorder()]
+        changed = [
+            child.id for child in other.intersection(self).iter_inorder()
+            if child != self._find_node(self.root, child.id).child
+        ]
+        return added, removed, changed
+    
+    def bulk_insert(self, children: List[Child]) -> List[Child]:
+        """Insertar en bloque los niños cuyo id no esté en el árbol
+        
+        El lote se construye balanceado en O(m) y se une al árbol con
+        difference + union en O(m log(n/m + 1)), en lugar de m inserciones
+        con sus rotaciones. El árbol adopta el resultado de la unión; los
+        operandos (la raíz anterior y el lote) se descartan, así que nadie más
+        ve los nodos compartidos que después se modifiquen en el lugar.
+        
+        Args:
+            children: Niños ordenados por id ascendente y sin ids repetidos
+        
+        Returns:
+            Niños insertados, ordenados por id (los ids ya presentes se omiten)
+        """
+        batch = ChildrenAVL()
+        batch.load_sorted(children, self.version + 1)
+        new = self._difference(batch.root, self.root)
+        if new is None:
+            return []
+        self.version += 1
+        self.root = self._union(self.root, new)
+        self.size = self._get_count(self.root)
+        return list(self._from_root(new).iter_inorder())
+    
     # ==================== RECORRIDOS ====================
     
     def inorder_traversal(self) -> List[Child]:
@@ -344,6 +609,58 @@ class ChildrenAVL:
             self._postorder_recursive(node.left, result)
             self._postorder_recursive(node.right, result)
             result.append(node.child)
+        
+    # ==================== RECORRIDOS ITERATIVOS (GENERADORES) ====================
+    
+    def partitions(self) -> List['ChildrenAVL']:
+        """Partes que se recorren por separado (un solo árbol)"""
+        return [self]
+    
+    def iter_inorder(self) -> Iterator[Child]:
+        """Recorrido inorden perezoso e iterativo (no depende del límite de recursión)"""
+        stack: List[AVLNode] = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.child
+            node = node.right
+    
+    def iter_preorder(self) -> Iterator[Child]:
+        """Recorrido preorden perezoso e iterativo"""
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node.child
+            if node.right is not None:
+                stack.append(node.right)
+            if node.left is not None:
+                stack.append(node.left)
+    
+    def iter_postorder(self) -> Iterator[Child]:
+        """Recorrido postorden perezoso e iterativo"""
+        stack: List[AVLNode] = []
+        last_visited: Optional[AVLNode] = None
+        node = self.root
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+                continue
+            peek = stack[-1]
+            if peek.right is not None and last_visited is not peek.right:
+                node = peek.right
+            else:
+                yield peek.child
+                last_visited = stack.pop()
+    
+    # ==================== VISTA COLUMNAR ====================
+    
+    def columnar_snapshot(self) -> ColumnarSnapshot:
+        """Columnas NumPy (id, age, gender) del árbol, en caché mientras no cambie la versión"""
+        return self._columnar.get(self)
     
     # ==================== MÉTODOS DE DIAGNÓSTICO ====================
     
@@ -374,7 +691,609 @@ class ChildrenAVL:
             
         return (self._is_balanced_recursive(node.left) and 
                 self._is_balanced_recursive(node.right))
+    
+    def sample_nodes(self, k: int, rng: random.Random) -> List[AVLNode]:
+        """k nodos al azar (con reemplazo): cada uno se elige por rango con `count`, O(log n)"""
+        nodes: List[AVLNode] = []
+        for _ in range(k if self.root is not None else 0):
+            node, rank = self.root, rng.randrange(self.root.count)
+            while True:
+                left = self._get_count(node.left)
+                if rank < left:
+                    node = node.left
+                elif rank > left:
+                    node, rank = node.right, rank - left - 1
+                else:
+                    break
+            nodes.append(node)
+        return nodes
+    
+    def memory_parts(self, sample_size: int, rng: random.Random) -> dict:
+        """Datos para estimar la memoria (ver memory.estimate_memory): nodos, muestra, índices y cachés"""
+        return {
+            "nodes": self.size,
+            "node_bytes": instance_bytes(AVLNode),
+            "sample": self.sample_nodes(sample_size, rng),
+            "indexes": {},
+            "caches": {"columnar": self._columnar.nbytes},
+        }
+
+
+
+class ShardedChildrenAVL:
+    """Almacén particionado por id en N árboles AVL independientes
+    
+    Cada id pertenece al fragmento `id % N`. Las operaciones puntuales tocan un
+    solo fragmento y toman solo su candado, así que escritores concurrentes
+    sobre fragmentos distintos no se bloquean entre sí. El recorrido inorden
+    global mezcla (k-way merge) los recorridos de los fragmentos; preorden y
+    postorden recorren un fragmento tras otro, porque no existe un único árbol
+    global cuya forma describir.
+    
+    Expone la misma interfaz que ChildrenAVL para que los controladores y la
+    replicación no distingan entre ambos.
+    """
+    
+    def __init__(self, shards: int):
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        self.shards: List[ChildrenAVL] = [ChildrenAVL() for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._version_offset = 0
+        self._columnar: Optional[ColumnarSnapshot] = None
+    
+    def _shard_index(self, id: int) -> int:
+        return id % len(self.shards)
+    
+    @property
+    def size(self) -> int:
+        return sum(shard.size for shard in self.shards)
+    
+    @property
+    def version(self) -> int:
+        """Suma de las versiones de los fragmentos (crece con cada modificación)"""
+        return self._version_offset + sum(shard.version for shard in self.shards)
+    
+    @version.setter
+    def version(self, value: int) -> None:
+        self._version_offset = value - sum(shard.version for shard in self.shards)
+    
+    # ==================== OPERACIONES CRUD ====================
+    
+    def insert(self, child: Child) -> bool:
+        index = self._shard_index(child.id)
+        with self._locks[index]:
+            return self.shards[index].insert(child)
+    
+    def search(self, id: int) -> Optional[Child]:
+        return self.shards[self._shard_index(id)].search(id)
+    
+    def search_with_version(self, id: int) -> Optional[Tuple[Child, int]]:
+        return self.shards[self._shard_index(id)].search_with_version(id)
+    
+    def update(self, id: int, update_data: ChildUpdate) -> Optional[Child]:
+        index = self._shard_index(id)
+        with self._locks[index]:
+            return self.shards[index].update(id, update_data)
+    
+    def delete(self, id: int) -> bool:
+        index = self._shard_index(id)
+        with self._locks[index]:
+            return self.shards[index].delete(id)
+    
+    # ==================== CARGA MASIVA ====================
+    
+    def load_sorted(self, children: List[Child], version: Optional[int] = None) -> None:
+        """Repartir una lista ordenada por id entre los fragmentos (cada parte sigue ordenada)"""
+        parts: List[List[Child]] = [[] for _ in self.shards]
+        for child in children:
+            parts[self._shard_index(child.id)].append(child)
+        for index, part in enumerate(parts):
+            with self._locks[index]:
+                self.shards[index].load_sorted(part, version)
+        if version is not None:
+            # Cada fragmento quedó en `version`; la suma sería N * version
+            self.version = version
+    
+    def swap(self, other: 'ShardedChildrenAVL') -> None:
+        self.shards, self._locks = other.shards, other._locks
+        self._version_offset = other._version_offset
+        self._columnar = None
+    
+    def reconcile(self, roster: List[Child]) -> Tuple[List[int], List[int], List[int]]:
+        """Comparar cada fragmento con su parte del listado y mezclar los resultados"""
+        parts: List[List[Child]] = [[] for _ in self.shards]
+        for child in roster:
+            parts[self._shard_index(child.id)].append(child)
+        results = [shard.reconcile(part) for shard, part in zip(self.shards, parts)]
+        added, removed, changed = (list(heapq.merge(*ids)) for ids in zip(*results))
+        return added, removed, changed
+    
+    def bulk_insert(self, children: List[Child]) -> List[Child]:
+        """Insertar en bloque en cada fragmento su parte del lote (ordenada por id)"""
+        parts: List[List[Child]] = [[] for _ in self.shards]
+        for child in children:
+            parts[self._shard_index(child.id)].append(child)
+        inserted = []
+        for index, part in enumerate(parts):
+            if part:
+                with self._locks[index]:
+                    inserted.append(self.shards[index].bulk_insert(part))
+        return list(heapq.merge(*inserted, key=attrgetter("id")))
+    
+    # ==================== RECORRIDOS ====================
+    
+    def partitions(self) -> List[ChildrenAVL]:
+        """Los fragmentos, en el orden de índice de `id % N`"""
+        return self.shards
+    
+    def iter_inorder(self) -> Iterator[Child]:
+        """Recorrido global ordenado por id: k-way merge de los inorden de cada fragmento"""
+        return heapq.merge(*(shard.iter_inorder() for shard in self.shards), key=attrgetter("id"))
+    
+    def iter_preorder(self) -> Iterator[Child]:
+        for shard in self.shards:
+            yield from shard.iter_preorder()
+    
+    def iter_postorder(self) -> Iterator[Child]:
+        for shard in self.shards:
+            yield from shard.iter_postorder()
+    
+    def inorder_traversal(self) -> List[Child]:
+        return list(self.iter_inorder())
+    
+    def preorder_traversal(self) -> List[Child]:
+        return list(self.iter_preorder())
+    
+    def postorder_traversal(self) -> List[Child]:
+        return list(self.iter_postorder())
+    
+    # ==================== VISTA COLUMNAR ====================
+    
+    def columnar_snapshot(self) -> ColumnarSnapshot:
+        """Concatenación de las vistas de los fragmentos
+        
+        Cada fragmento guarda su propia vista, así que tras una escritura solo
+        se vuelve a recorrer el fragmento modificado.
+        """
+        snapshot = self._columnar
+        if snapshot is None or snapshot.version != self.version:
+            parts = [shard.columnar_snapshot() for shard in self.shards]
+            snapshot = self._columnar = ColumnarSnapshot.concatenate(parts, self.version)
+        return snapshot
+    
+    # ==================== MÉTODOS DE DIAGNÓSTICO ====================
+    
+    def height(self) -> int:
+        """Altura del fragmento más alto"""
+        return max(shard.height() for shard in self.shards)
+    
+    def count_nodes(self) -> int:
+        return sum(shard.count_nodes() for shard in self.shards)
+    
+    def is_balanced(self) -> bool:
+        return all(shard.is_balanced() for shard in self.shards)
+    
+    def memory_parts(self, sample_size: int, rng: random.Random) -> dict:
+        """Suma de los fragmentos; la muestra se reparte según el tamaño de cada uno"""
+        size = self.size
+        parts = [shard.memory_parts(round(sample_size * shard.size / size) if size else 0, rng)
+                 for shard in self.shards]
+        columnar = self._columnar.nbytes if self._columnar is not None else 0
+        return {
+            "nodes": size,
+            "node_bytes": instance_bytes(AVLNode),
+            "sample": [node for part in parts for node in part["sample"]],
+            "indexes": {},
+            "caches": {"columnar": columnar + sum(part["caches"]["columnar"] for part in parts)},
+        }
+
+
+def _ranked(records: Iterator[Record], rank: int) -> Iterator[Tuple[int, int, Record]]:
+    for record in records:
+        yield record[0].id, rank, record
+
+
+def _newest(sources: List[Iterator[Record]], tombstones: Set[int]) -> Iterator[Tuple[int, Record]]:
+    """Mezclar fuentes ordenadas por id (la de menor índice es la más nueva)
+    
+    Por cada id devuelve (índice de la fuente, registro) de la copia más nueva,
+    salvo que el id esté eliminado.
+    """
+    last = None
+    for id, rank, record in heapq.merge(*(_ranked(source, rank) for rank, source in enumerate(sources))):
+        if id != last:
+            last = id
+            if id not in tombstones:
+                yield rank, record
+
+
+class TieredChildrenAVL:
+    """Almacén AVL en dos niveles: los niños usados recientemente en memoria, el resto en disco
+    
+    El nivel caliente es un ChildrenAVL con a lo sumo `hot_capacity` niños; el
+    orden de uso (LRU) se lleva en un OrderedDict. Al superar la capacidad, la
+    fracción menos usada se escribe como un segmento ordenado por id (ver
+    segments.Segment). Buscar un id ausente del nivel caliente consulta los
+    segmentos del más nuevo al más viejo: el rango y el filtro de Bloom
+    descartan sin leer el disco casi todos los que no lo contienen, y un
+    acierto vuelve a subir el niño a memoria.
+    
+    Un id puede tener copias viejas en segmentos anteriores: manda el nivel
+    caliente y después el segmento más nuevo. Eliminar un niño que puede tener
+    copia en disco deja su id en `_tombstones`. Cuando hay más de
+    `max_segments` segmentos, un hilo los fusiona en uno solo descartando las
+    copias viejas y los eliminados.
+    
+    Subir niños a memoria también ocurre en las lecturas (fuera del candado
+    de escritura), así que se hace con las operaciones persistentes del AVL
+    (union / difference): los recorridos en curso conservan la raíz y los
+    segmentos que tomaron al empezar. Una lectura nunca desaloja: deja
+    `eviction_pending` y el desalojo corre después con `evict()`, que escribe
+    el segmento en un hilo. Las escrituras modifican el nivel caliente en el
+    lugar, como en ChildrenAVL, y desalojan al terminar.
+    
+    Expone la misma interfaz que ChildrenAVL; la altura y el balance son los
+    del nivel caliente.
+    """
+    
+    def __init__(self, hot_capacity: int, directory: str = settings.tiered_dir,
+                 evict_fraction: float = settings.tiered_evict_fraction,
+                 fp_rate: float = settings.tiered_bloom_fp_rate,
+                 index_interval: int = settings.tiered_index_interval,
+                 max_segments: int = settings.tiered_max_segments):
+        if hot_capacity < 1:
+            raise ValueError("hot_capacity must be >= 1")
+        self.hot = ChildrenAVL()
+        self.hot_capacity = hot_capacity
+        self.directory = directory
+        self.fp_rate = fp_rate
+        self.index_interval = index_interval
+        self.max_segments = max_segments
+        # Tras desalojar quedan `_keep` niños (siempre al menos el recién usado)
+        self._keep = max(1, hot_capacity - max(1, int(hot_capacity * evict_fraction)))
+        self._recency: OrderedDict[int, None] = OrderedDict()
+        self._segments: List[Segment] = []  # Del más nuevo al más viejo
+        self._tombstones: Set[int] = set()
+        self._lock = threading.Lock()  # Protege la lista de segmentos y las lápidas frente a la compactación
+        self._generation = 0  # Cambia al reemplazar el contenido: invalida la compactación en curso
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.size = 0
+        self.version = 0
+        self.faults = 0
+        self.evictions = 0
+        self.bloom_skips = 0
+        self.disk_reads = 0
+        self.compaction_count = 0
+        self._columnar = ColumnarCache()
+    
+    # ==================== NIVELES ====================
+    
+    def _find_cold(self, id: int) -> Optional[Record]:
+        """Buscar un id en los segmentos, del más nuevo al más viejo"""
+        if id in self._tombstones:
+            return None
+        for segment in self._segments:
+            if not segment.may_contain(id):
+                self.bloom_skips += 1
+                continue
+            self.disk_reads += 1
+            record = segment.get(id)
+            if record is not None:
+                return record
+        return None
+    
+    def _stamp(self, id: int) -> None:
+        """Registrar en el nodo caliente la versión del almacén (no la del árbol caliente)"""
+        self.hot._find_node(self.hot.root, id).version = self.version
+    
+    def _fault_in(self, child: Child, version: int) -> None:
+        """Subir un niño del disco al nivel caliente sin modificar nodos existentes"""
+        self.hot.root = self.hot._union(self.hot.root, AVLNode(child, version))
+        self.hot.size += 1
+        self._recency[child.id] = None
+        self.faults += 1
+    
+    @property
+    def eviction_pending(self) -> bool:
+        """El nivel caliente superó su capacidad (p. ej. por subidas en lecturas)"""
+        return self.hot.size > self.hot_capacity
+    
+    def _take_victims(self) -> List[AVLNode]:
+        """Sacar del orden de uso los niños menos usados, ordenados por id"""
+        victims = sorted(self._recency.popitem(last=False)[0] for _ in range(self.hot.size - self._keep))
+        return [self.hot._find_node(self.hot.root, id) for id in victims]
+    
+    def _write_segment(self, nodes: List[AVLNode]) -> Segment:
+        return Segment.write(self.directory, ((node.child, node.version) for node in nodes),
+                             self.fp_rate, self.index_interval)
+    
+    def _spill(self, nodes: List[AVLNode], segment: Segment) -> None:
+        """Publicar el segmento con los desalojados y quitarlos del nivel caliente"""
+        batch = ChildrenAVL()
+        batch.load_sorted([node.child for node in nodes])
+        with self._lock:
+            self._segments = [segment] + self._segments
+        self.hot.root = self.hot._difference(self.hot.root, batch.root)
+        self.hot.size -= len(nodes)
+        self.evictions += len(nodes)
+        self._maybe_compact()
+    
+    def _maybe_evict(self) -> None:
+        """Bajar a un segmento nuevo los niños menos usados si el nivel caliente se llenó"""
+        if self.eviction_pending:
+            nodes = self._take_victims()
+            self._spill(nodes, self._write_segment(nodes))
+    
+    async def evict(self) -> None:
+        """Desalojo diferido de las lecturas: el segmento se escribe en un hilo
+        
+        Quien llama excluye las escrituras (candado de escritura del motor):
+        un niño desalojado no puede cambiar mientras se escribe su segmento.
+        Las lecturas siguen; las que suben niños a memoria solo agrandan el
+        nivel caliente.
+        """
+        if self.eviction_pending:
+            nodes = self._take_victims()
+            self._spill(nodes, await asyncio.to_thread(self._write_segment, nodes))
+    
+    def compact(self) -> None:
+        """Fusionar los segmentos actuales en uno (sin copias viejas ni eliminados)"""
+        with self._lock:
+            generation, segments, tombstones = self._generation, self._segments, set(self._tombstones)
+            sources = [segment.records() for segment in segments]
+        merged = Segment.write(self.directory, map(itemgetter(1), _newest(sources, tombstones)),
+                               self.fp_rate, self.index_interval)
+        with self._lock:
+            if generation != self._generation:
+                return
+            # Solo se agregan segmentos al principio: los fusionados son el final de la lista
+            newer = self._segments[:len(self._segments) - len(segments)]
+            self._segments = newer + [merged] if merged.count else newer
+            self._tombstones = {id for id in self._tombstones if any(s.may_contain(id) for s in self._segments)}
+            self.compaction_count += 1
+    
+    def _compact_while_needed(self) -> None:
+        """Repetir mientras sobren segmentos (los desalojos siguen durante la compactación)"""
+        while len(self._segments) > self.max_segments:
+            self.compact()
+    
+    def _maybe_compact(self) -> None:
+        """Lanzar la compactación en segundo plano si hay demasiados segmentos"""
+        if len(self._segments) <= self.max_segments:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self._compact_while_needed, name="avl-compaction", daemon=True)
+        self._compaction_thread.start()
+    
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Esperar a que termine la compactación en segundo plano (si hay una en curso)"""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join(timeout)
+    
+    def tier_stats(self) -> dict:
+        """Ocupación de cada nivel y contadores de subidas, desalojos y lecturas de disco"""
+        segments = self._segments
+        return {
+            "hot_size": self.hot.size,
+            "hot_capacity": self.hot_capacity,
+            "segments": len(segments),
+            "segment_records": sum(segment.count for segment in segments),
+            "disk_bytes": sum(segment.nbytes for segment in segments),
+            "index_bytes": sum(segment.memory_bytes for segment in segments),
+            "tombstones": len(self._tombstones),
+            "faults": self.faults,
+            "evictions": self.evictions,
+            "bloom_skips": self.bloom_skips,
+            "disk_reads": self.disk_reads,
+            "compactions": self.compaction_count,
+        }
+    
+    # ==================== OPERACIONES CRUD ====================
+    
+    def insert(self, child: Child) -> bool:
+        if self.hot._find_node(self.hot.root, child.id) is None and self._find_cold(child.id) is not None:
+            return False
+        if not self.hot.insert(child):
+            return False
+        self.version += 1
+        self._stamp(child.id)
+        with self._lock:
+            self._tombstones.discard(child.id)
+        self._recency[child.id] = None
+        self.size += 1
+        self._maybe_evict()
+        return True
+    
+    def search(self, id: int) -> Optional[Child]:
+        found = self.search_with_version(id)
+        return found[0] if found is not None else None
+    
+    def search_with_version(self, id: int) -> Optional[Tuple[Child, int]]:
+        """Buscar en memoria y, si no está, en disco (un acierto en disco sube el niño a memoria)"""
+        node = self.hot._find_node(self.hot.root, id)
+        record_search("avl", self.hot._comparisons)
+        if node is not None:
+            # Un niño ya elegido para desalojar no vuelve al orden de uso
+            if id in self._recency:
+                self._recency.move_to_end(id)
+            return node.child, node.version
+        record = self._find_cold(id)
+        if record is not None:
+            self._fault_in(*record)
+        return record
+    
+    def update(self, id: int, update_data: ChildUpdate) -> Optional[Child]:
+        if self.search_with_version(id) is None:
+            return None
+        child = self.hot.update(id, update_data)
+        self.version += 1
+        self._stamp(id)
+        self._maybe_evict()
+        return child
+    
+    def delete(self, id: int) -> bool:
+        if self.hot.delete(id):
+            del self._recency[id]
+        elif self._find_cold(id) is None:
+            return False
+        # Las copias en disco seguirían visibles sin la lápida
+        if any(segment.may_contain(id) for segment in self._segments):
+            with self._lock:
+                self._tombstones.add(id)
+        self.size -= 1
+        self.version += 1
+        return True
+    
+    # ==================== CARGA MASIVA ====================
+    
+    def load_sorted(self, children: List[Child], version: Optional[int] = None) -> None:
+        """Reemplazar el contenido: todos los niños van a un segmento y el nivel caliente queda vacío
+        
+        Los niños suben a memoria a medida que se consultan.
+        """
+        self.version = self.version + 1 if version is None else version
+        segment = Segment.write(self.directory, zip(children, repeat(self.version)),
+                                self.fp_rate, self.index_interval) if children else None
+        with self._lock:
+            self._generation += 1
+            self._segments = [segment] if segment is not None else []
+            self._tombstones = set()
+        self.hot = ChildrenAVL()
+        self._recency = OrderedDict()
+        self.size = len(children)
+        self._columnar.clear()
+    
+    def swap(self, other: 'TieredChildrenAVL') -> None:
+        with self._lock:
+            self._generation += 1
+            self._segments, self._tombstones = other._segments, other._tombstones
+        self.hot, self._recency, self.size = other.hot, other._recency, other.size
+        self._columnar.clear()
+    
+    def reconcile(self, roster: List[Child]) -> Tuple[List[int], List[int], List[int]]:
+        """Comparar con un listado ordenado recorriendo ambos a la vez (sin subir niños a memoria)"""
+        added, removed, changed = [], [], []
+        stored = self.iter_inorder()
+        current = next(stored, None)
+        for child in roster:
+            while current is not None and current.id < child.id:
+                removed.append(current.id)
+                current = next(stored, None)
+            if current is not None and current.id == child.id:
+                if current != child:
+                    changed.append(child.id)
+                current = next(stored, None)
+            else:
+                added.append(child.id)
+        while current is not None:
+            removed.append(current.id)
+            current = next(stored, None)
+        return added, removed, changed
+    
+    def bulk_insert(self, children: List[Child]) -> List[Child]:
+        """Insertar uno a uno (cada id se busca en disco solo si los filtros no lo descartan)"""
+        return [child for child in children if self.insert(child)]
+    
+    # ==================== RECORRIDOS ====================
+    
+    def _merged(self) -> Iterator[Tuple[int, Record]]:
+        """Todos los niveles mezclados por id; el índice 0 indica el nivel caliente
+        
+        La raíz caliente, los segmentos y sus archivos se toman al llamar, no
+        al empezar a iterar.
+        """
+        with self._lock:
+            segments, tombstones = self._segments, self._tombstones
+            sources = [segment.records() for segment in segments]
+        hot = self.hot._from_root(self.hot.root).iter_inorder()
+        return _newest([zip(hot, repeat(None))] + sources, tombstones)
+    
+    def partitions(self) -> List['TieredChildrenAVL']:
+        """Partes que se recorren por separado (los niveles se mezclan en un solo recorrido)"""
+        return [self]
+    
+    def iter_inorder(self) -> Iterator[Child]:
+        return (record[0] for _, record in self._merged())
+    
+    def iter_preorder(self) -> Iterator[Child]:
+        """Preorden del nivel caliente y después, por id, los niños que solo están en disco"""
+        cold = (record[0] for rank, record in self._merged() if rank)
+        return chain(self.hot._from_root(self.hot.root).iter_preorder(), cold)
+    
+    def iter_postorder(self) -> Iterator[Child]:
+        """Postorden del nivel caliente y después, por id, los niños que solo están en disco"""
+        cold = (record[0] for rank, record in self._merged() if rank)
+        return chain(self.hot._from_root(self.hot.root).iter_postorder(), cold)
+    
+    def inorder_traversal(self) -> List[Child]:
+        return list(self.iter_inorder())
+    
+    def preorder_traversal(self) -> List[Child]:
+        return list(self.iter_preorder())
+    
+    def postorder_traversal(self) -> List[Child]:
+        return list(self.iter_postorder())
+    
+    # ==================== VISTA COLUMNAR ====================
+    
+    def columnar_snapshot(self) -> ColumnarSnapshot:
+        return self._columnar.get(self)
+    
+    # ==================== MÉTODOS DE DIAGNÓSTICO ====================
+    
+    def height(self) -> int:
+        """Altura del nivel caliente"""
+        return self.hot.height()
+    
+    def count_nodes(self) -> int:
+        """Niños en total, en memoria y en disco"""
+        return self.size
+    
+    def is_balanced(self) -> bool:
+        return self.hot.is_balanced()
+    
+    def memory_parts(self, sample_size: int, rng: random.Random) -> dict:
+        """Solo el nivel caliente ocupa nodos; de los segmentos quedan en memoria los filtros e índices"""
+        parts = self.hot.memory_parts(sample_size, rng)
+        segments = self._segments
+        parts["indexes"] = {
+            "recency": sys.getsizeof(self._recency),
+            "tombstones": sys.getsizeof(self._tombstones),
+            "segments": sum(segment.memory_bytes for segment in segments),
+        }
+        parts["caches"] = {"columnar": self._columnar.nbytes + parts["caches"]["columnar"]}
+        parts["disk"] = {"segments": len(segments), "bytes": sum(segment.nbytes for segment in segments)}
+        return parts
+
+
+def new_avl_store(shards: int = settings.avl_shards,
+                  hot_capacity: int = settings.tiered_hot_capacity) -> Union[ChildrenAVL, ShardedChildrenAVL, TieredChildrenAVL]:
+    """Crear el almacén AVL según la configuración (un solo árbol, particionado o con niveles)"""
+    if hot_capacity > 0:
+        if shards != 1:
+            raise ValueError("tiered storage does not support shards")
+        return TieredChildrenAVL(hot_capacity)
+    if shards == 1:
+        return ChildrenAVL()
+    return ShardedChildrenAVL(shards)
 
 
 # Instancia global del árbol AVL (almacenamiento en memoria)
-children_avl = ChildrenAVL()
+children_avl = new_avl_store()
+
+
+def _collect_gauges():
+    """Métricas de estado del árbol global (O(1): la altura está en la raíz)"""
+    labels = (("engine", "avl"),)
+    yield "children_engine_height", labels, children_avl.height()
+    yield "children_engine_size", labels, children_avl.size
+    if settings.tiered_hot_capacity:
+        stats = children_avl.tier_stats()
+        for name in ("hot_size", "segments", "disk_bytes"):
+            yield f"children_tier_{name}", labels, stats[name]
+
+
+registry.register_gauge_callback(_collect_gauges)
@@ -0,0 +1,184 @@
+import asyncio
+import csv
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import AsyncIterator, Deque, List, Literal, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..config import settings
+from ..model.schemas import Child
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# (número de línea, contenido crudo)
+Line = Tuple[int, bytes]
+# Niño ya validado como tupla (id, age, name, gender): se envía entre procesos
+# mucho más barato que un modelo de pydantic
+Row = Tuple[int, int, str, str]
+# (número de línea, mensaje)
+RowError = Tuple[int, str]
+
+CSV_COLUMNS = ("id", "age", "name", "gender")
+
+
+class ImportResult:
+    """Resultado de validar un archivo completo
+
+    `children` queda ordenado por id y sin repetidos (se conserva la primera
+    aparición); `errors` guarda como máximo `max_errors` filas, pero `failed`
+    cuenta todas.
+    """
+
+    def __init__(self, max_errors: int):
+        self.rows = 0
+        self.children: List[Child] = []
+        self.duplicates = 0
+        self.failed = 0
+        self.errors: List[RowError] = []
+        self._max_errors = max_errors
+
+    def add_chunk(self, valid: List[Row], errors: List[RowError]) -> None:
+        self.rows += len(valid) + len(errors)
+        self.children.extend(
+            Child.model_construct(id=id, age=age, name=name, gender=gender) for id, age, name, gender in valid
+        )
+        self.failed += len(errors)
+        self.errors.extend(errors[:self._max_errors - len(self.errors)])
+
+    def finish(self) -> None:
+        """Ordenar por id (estable: ante ids repetidos gana la primera fila) y descartar repetidos"""
+        self.children.sort(key=lambda child: child.id)
+        unique: List[Child] = []
+        for child in self.children:
+            if unique and unique[-1].id == child.id:
+                self.duplicates += 1
+            else:
+                unique.append(child)
+        self.children = unique
+
+
+# ==================== VALIDACIÓN (PROCESOS DEL POOL) ====================
+
+def describe_error(error: Exception, subject: str = "row") -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc']) or subject}: {item['msg']}"
+            for item in error.errors(include_url=False)
+        )
+    return str(error)
+
+
+def parse_header(line: bytes) -> List[str]:
+    """Columnas de la cabecera CSV (deben ser exactamente las de Child, en cualquier orden)"""
+    header = [column.strip() for column in next(csv.reader([line.decode("utf-8-sig")]))]
+    if sorted(header) != sorted(CSV_COLUMNS):
+        raise ValueError(f"CSV header must contain the columns {', '.join(CSV_COLUMNS)}; got {', '.join(header)}")
+    return header
+
+
+def validate_chunk(format: ImportFormat, header: Optional[List[str]], lines: List[Line]) -> Tuple[List[Row], List[RowError]]:
+    """Validar un bloque de líneas contra el esquema Child
+
+    Se ejecuta en los procesos del pool, así que recibe y devuelve solo tipos
+    simples. Una fila inválida se reporta y no detiene el bloque.
+    """
+    valid: List[Row] = []
+    errors: List[RowError] = []
+    for number, line in lines:
+        try:
+            if format == "ndjson":
+                child = Child.model_validate_json(line)
+            else:
+                values = next(csv.reader([line.decode("utf-8")]))
+                if len(values) != len(header):
+                    raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+                child = Child.model_validate(dict(zip(header, values)))
+        except (ValidationError, ValueError) as e:
+            errors.append((number, describe_error(e)))
+            continue
+        valid.append((child.id, child.age, child.name, child.gender))
+    return valid, errors
+
+
+# ==================== LECTURA EN BLOQUES ====================
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Line]:
+    """Partir un flujo de bytes en líneas numeradas desde 1 (sin el salto de línea)
+
+    Solo se retiene el bloque actual y la línea incompleta del final, así que
+    una fila CSV no puede contener saltos de línea entre comillas.
+    """
+    number = 0
+    pending = b""
+    async for block in stream:
+        *lines, pending = (pending + block).split(b"\n")
+        for line in lines:
+            number += 1
+            yield number, line.rstrip(b"\r")
+    if pending:
+        yield number + 1, pending.rstrip(b"\r")
+
+
+def get_executor(workers: Optional[int] = settings.import_workers) -> Optional[Executor]:
+    """Pool de procesos para validar (None con 0 workers: se valida en el proceso actual)
+
+    Usa "spawn" y no "fork": el servidor tiene hilos y un event loop en marcha
+    que no deben copiarse a los procesos hijos.
+    """
+    if workers == 0:
+        return None
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                               mp_context=multiprocessing.get_context("spawn"))
+
+
+async def validate_stream(
+    stream: AsyncIterator[bytes],
+    format: ImportFormat,
+    executor: Optional[Executor],
+    chunk_rows: int = settings.import_chunk_rows,
+    max_errors: int = settings.import_max_errors,
+) -> ImportResult:
+    """Leer el flujo en bloques de `chunk_rows` líneas y validarlos en paralelo
+
+    Hay como máximo dos bloques por núcleo en vuelo: la lectura espera al
+    bloque más antiguo antes de seguir, así que la memoria de entrada queda
+    acotada por el tamaño de bloque y no por el del archivo. Los resultados se
+    acumulan en el orden del archivo.
+
+    Raises:
+        ValueError: Si la cabecera CSV no es válida
+    """
+    loop = asyncio.get_running_loop()
+    result = ImportResult(max_errors)
+    in_flight: Deque[asyncio.Future] = deque()
+    max_in_flight = 2 * (os.cpu_count() or 1)
+    header: Optional[List[str]] = None
+    chunk: List[Line] = []
+
+    async def submit(lines: List[Line]) -> None:
+        if executor is None:
+            result.add_chunk(*validate_chunk(format, header, lines))
+            return
+        in_flight.append(loop.run_in_executor(executor, validate_chunk, format, header, lines))
+        if len(in_flight) >= max_in_flight:
+            result.add_chunk(*await in_flight.popleft())
+
+    async for number, line in iter_lines(stream):
+        if format == "csv" and header is None:
+            header = parse_header(line)
+            continue
+        if not line.strip():
+            continue
+        chunk.append((number, line))
+        if len(chunk) >= chunk_rows:
+            await submit(chunk)
+            chunk = []
+    if chunk:
+        await submit(chunk)
+    while in_flight:
+        result.add_chunk(*await in_flight.popleft())
+    result.finish()
+    return result
@@ -0,0 +1,88 @@
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import Deque, List, Optional, Set, Tuple
+
+from pydantic import TypeAdapter
+
+from ..model.schemas import Child, ChangeEvent
+
+# (secuencia, operación, evento codificado en JSON)
+Event = Tuple[int, str, bytes]
+
+_event_adapter = TypeAdapter(ChangeEvent)
+
+
+class ChangeFeed:
+    """Registro acotado de cambios del árbol (buffer circular con números de secuencia)
+
+    Cada evento se codifica en JSON una sola vez al publicarse: guarda el
+    estado del niño en ese momento (las actualizaciones posteriores modifican
+    el objeto en el árbol) y se reutiliza para todos los consumidores.
+
+    Un consumidor pide los eventos posteriores a la secuencia `since` que ya
+    aplicó. Si esos eventos ya salieron del buffer (o `since` es mayor que la
+    última secuencia, p. ej. tras un reinicio del servidor) debe volver a
+    sincronizarse con un listado completo.
+    """
+
+    def __init__(self, capacity: int):
+        self._events: Deque[Event] = deque(maxlen=capacity)
+        self.last_seq = 0
+        self._waiters: Set[asyncio.Future] = set()
+
+    def publish(self, op: str, child_id: int, child: Optional[Child]) -> int:
+        """Registrar un cambio y despertar a los consumidores en espera"""
+        seq = self.last_seq + 1
+        # El niño ya fue validado al entrar al árbol: se construye el evento sin revalidar
+        payload = _event_adapter.dump_json(ChangeEvent.model_construct(seq=seq, op=op, id=child_id, child=child))
+        self._events.append((seq, op, payload))
+        self.last_seq = seq
+        self._wake()
+        return self.last_seq
+
+    def invalidate(self) -> int:
+        """Vaciar el buffer tras un cambio masivo (p. ej. una importación)
+
+        Avanza la secuencia sin guardar eventos, así que todo consumidor con
+        una secuencia anterior recibe "resincronizar" en lugar de miles de
+        eventos que de todos modos desbordarían el buffer.
+        """
+        self._events.clear()
+        self.last_seq += 1
+        self._wake()
+        return self.last_seq
+
+    def _wake(self) -> None:
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def since(self, seq: int) -> Optional[List[Event]]:
+        """Eventos con secuencia mayor que `seq`; None si hace falta resincronizar"""
+        if seq > self.last_seq:
+            return None
+        oldest = self._events[0][0] if self._events else self.last_seq + 1
+        if seq < oldest - 1:
+            return None
+        return list(islice(self._events, seq - oldest + 1, None))
+
+    async def wait(self, seq: int, timeout: float) -> Optional[List[Event]]:
+        """Long-poll: esperar hasta `timeout` segundos a que haya eventos posteriores a `seq`
+
+        Devuelve la lista (vacía si se agotó el tiempo) o None si hace falta
+        resincronizar.
+        """
+        events = self.since(seq)
+        if events is None or events or timeout <= 0:
+            return events
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return []
+        finally:
+            self._waiters.discard(waiter)
+        return self.since(seq)
@@ -0,0 +1,153 @@
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..model.schemas import Child
+
+# Códigos del género en las columnas (el índice es el código)
+GENDERS = ("M", "F", "Otro")
+GENDER_CODES = {gender: code for code, gender in enumerate(GENDERS)}
+
+
+class ColumnarSnapshot:
+    """Vista columnar (NumPy) del contenido de un motor en una versión dada
+
+    Tres arreglos paralelos de solo lectura: `id` (int64), `age` (int8) y
+    `gender` (int8, índice en GENDERS). Se construye con un solo recorrido y
+    los motores la guardan mientras su versión no cambie, así que las
+    consultas analíticas repetidas no vuelven a tocar objetos de Python.
+    """
+
+    def __init__(self, id: np.ndarray, age: np.ndarray, gender: np.ndarray, version: int):
+        for column in (id, age, gender):
+            column.flags.writeable = False
+        self.id = id
+        self.age = age
+        self.gender = gender
+        self.version = version
+
+    @property
+    def size(self) -> int:
+        return len(self.id)
+
+    @property
+    def nbytes(self) -> int:
+        return self.id.nbytes + self.age.nbytes + self.gender.nbytes
+
+    @classmethod
+    def from_children(cls, children: Iterable[Child], version: int) -> 'ColumnarSnapshot':
+        rows: List[Child] = list(children)
+        return cls(
+            np.fromiter(map(attrgetter("id"), rows), dtype=np.int64, count=len(rows)),
+            np.fromiter(map(attrgetter("age"), rows), dtype=np.int8, count=len(rows)),
+            np.fromiter(map(GENDER_CODES.__getitem__, map(attrgetter("gender"), rows)), dtype=np.int8, count=len(rows)),
+            version,
+        )
+
+    @classmethod
+    def concatenate(cls, parts: Sequence['ColumnarSnapshot'], version: int) -> 'ColumnarSnapshot':
+        """Unir las vistas de varios fragmentos (el orden de las filas no importa para agregar)"""
+        return cls(
+            np.concatenate([part.id for part in parts]),
+            np.concatenate([part.age for part in parts]),
+            np.concatenate([part.gender for part in parts]),
+            version,
+        )
+
+
+class ColumnarCache:
+    """Vista columnar de un motor, reconstruida solo cuando cambia su versión"""
+
+    def __init__(self):
+        self._snapshot: Optional[ColumnarSnapshot] = None
+
+    def get(self, engine) -> ColumnarSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != engine.version:
+            snapshot = self._snapshot = ColumnarSnapshot.from_children(engine.iter_inorder(), engine.version)
+        return snapshot
+
+    def clear(self) -> None:
+        self._snapshot = None
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes de las columnas guardadas (0 si no hay vista)"""
+        return self._snapshot.nbytes if self._snapshot is not None else 0
+
+
+# ==================== CONSULTAS ANALÍTICAS ====================
+
+def analyze(
+    snapshot: ColumnarSnapshot,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    genders: Optional[Sequence[str]] = None,
+    min_id: Optional[int] = None,
+    max_id: Optional[int] = None,
+    percentiles: Sequence[float] = (25, 50, 75, 90),
+    band: int = 5,
+) -> dict:
+    """Filtrar y agregar sobre la vista columnar con operaciones vectorizadas
+
+    Los filtros se combinan con AND en una máscara booleana; las agregaciones
+    (percentiles de edad, conteo por género y por banda de edad × género) se
+    calculan solo sobre las filas seleccionadas.
+
+    Raises:
+        ValueError: Si un percentil está fuera de [0, 100] o la banda no es positiva
+    """
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise ValueError("Percentiles must be between 0 and 100")
+    if band < 1:
+        raise ValueError("Age band width must be at least 1")
+
+    mask = np.ones(snapshot.size, dtype=bool)
+    if min_age is not None:
+        mask &= snapshot.age >= min_age
+    if max_age is not None:
+        mask &= snapshot.age <= max_age
+    if min_id is not None:
+        mask &= snapshot.id >= min_id
+    if max_id is not None:
+        mask &= snapshot.id <= max_id
+    if genders:
+        mask &= np.isin(snapshot.gender, [GENDER_CODES[gender] for gender in genders])
+    age = snapshot.age[mask]
+    gender = snapshot.gender[mask]
+    count = len(age)
+
+    by_gender = np.bincount(gender, minlength=len(GENDERS))
+    # Conteo conjunto banda × género en un solo bincount sobre una clave combinada
+    bands = age // band
+    n_bands = int(bands.max()) + 1 if count else 0
+    table = np.bincount(bands.astype(np.int64) * len(GENDERS) + gender,
+                        minlength=n_bands * len(GENDERS)).reshape(n_bands, len(GENDERS))
+
+    age_stats: Optional[Dict] = None
+    if count:
+        values = np.percentile(age, percentiles) if len(percentiles) else []
+        age_stats = {
+            "min": int(age.min()),
+            "max": int(age.max()),
+            "mean": float(age.mean()),
+            "percentiles": {f"p{p:g}": float(value) for p, value in zip(percentiles, values)},
+        }
+    return {
+        "version": snapshot.version,
+        "total": snapshot.size,
+        "count": count,
+        "age": age_stats,
+        "genders": dict(zip(GENDERS, by_gender.tolist())),
+        "bands": [
+            {
+                "min_age": index * band,
+                "max_age": index * band + band - 1,
+                "count": int(row.sum()),
+                "genders": dict(zip(GENDERS, row.tolist())),
+                "ratios": dict(zip(GENDERS, (row / row.sum()).round(4).tolist())),
+            }
+            for index, row in enumerate(table) if row.sum()
+        ],
+    }
@@ -0,0 +1,195 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, Hashable, Iterator, List, Optional, TypeVar
+
+from ..config import settings
+from ..metrics import registry
+
+T = TypeVar("T")
+
+
+class AsyncRWLock:
+    """Candado lectores/escritor para el event loop (prioridad a escritores)
+
+    Las operaciones puntuales sobre el árbol no ceden el control, así que son
+    atómicas dentro del event loop y no necesitan candado. Solo los recorridos
+    largos, que ceden el control cada cierto número de nodos, toman el candado
+    de lectura; las escrituras toman el de escritura para no modificar el árbol
+    mientras un recorrido está a medias.
+
+    La condición queda ligada al event loop que la usa; si el candado está
+    libre y lo toma otro loop (TestClient, asyncio.run), se crea una nueva.
+    """
+
+    def __init__(self):
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+        self._condition = asyncio.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _bound(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            if self._writer or self._readers or self._waiting_writers:
+                raise RuntimeError("AsyncRWLock en uso desde otro event loop")
+            self._loop = loop
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    async def acquire_read(self) -> None:
+        async with self._bound():
+            await self._condition.wait_for(lambda: not self._writer and self._waiting_writers == 0)
+            self._readers += 1
+
+    async def release_read(self) -> None:
+        async with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def read(self):
+        await self.acquire_read()
+        try:
+            yield
+        finally:
+            await self.release_read()
+
+    async def acquire_write(self, timeout: Optional[float] = None) -> bool:
+        """Tomar el candado de escritura; False si no se obtuvo en `timeout` segundos"""
+        async with self._bound():
+            self._waiting_writers += 1
+            try:
+                ready = self._condition.wait_for(lambda: not self._writer and self._readers == 0)
+                await (ready if timeout is None else asyncio.wait_for(ready, timeout))
+            except BaseException as e:
+                # Un escritor que desiste (tiempo agotado o cancelación) deja pasar
+                # a los lectores que estaban retenidos por él
+                self._waiting_writers -= 1
+                self._condition.notify_all()
+                if isinstance(e, asyncio.TimeoutError):
+                    return False
+                raise
+            self._waiting_writers -= 1
+            self._writer = True
+            return True
+
+    async def release_write(self) -> None:
+        async with self._condition:
+            self._writer = False
+            self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self):
+        await self.acquire_write()
+        try:
+            yield
+        finally:
+            await self.release_write()
+
+
+class ShardedRWLock:
+    """Un AsyncRWLock por fragmento del almacén particionado por id
+
+    Las escrituras puntuales toman solo el candado de su fragmento
+    (`shard(id).write()`). Las lecturas de todo el almacén y las escrituras
+    masivas toman todos, siempre en orden de índice para no bloquearse entre
+    sí. `read()` entrega una función `release(index)` para soltar un
+    fragmento que el recorrido ya terminó: la vista sigue siendo la del
+    momento en que se tuvieron todos a la vez, y las escrituras de ese
+    fragmento no esperan al resto del recorrido.
+
+    Con un solo fragmento equivale a un AsyncRWLock.
+    """
+
+    def __init__(self, shards: int):
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+        self._locks = [AsyncRWLock() for _ in range(shards)]
+
+    def shard(self, id: int) -> AsyncRWLock:
+        return self._locks[id % len(self._locks)]
+
+    @asynccontextmanager
+    async def read(self):
+        held: List[AsyncRWLock] = []
+
+        async def release(index: int) -> None:
+            lock = self._locks[index]
+            if lock in held:
+                held.remove(lock)
+                await lock.release_read()
+
+        try:
+            for lock in self._locks:
+                await lock.acquire_read()
+                held.append(lock)
+            yield release
+        finally:
+            for lock in held:
+                await lock.release_read()
+
+    @asynccontextmanager
+    async def write(self):
+        held: List[AsyncRWLock] = []
+        try:
+            for lock in self._locks:
+                await lock.acquire_write()
+                held.append(lock)
+            yield
+        finally:
+            for lock in reversed(held):
+                await lock.release_write()
+
+
+class SingleFlight:
+    """Coalescencia de lecturas idénticas concurrentes (single-flight)
+
+    La primera petición con una clave lanza el cálculo como tarea propia; las
+    que llegan con la misma clave mientras sigue en curso esperan esa tarea y
+    reciben el mismo resultado. Al terminar, la clave se libera: no es una
+    caché, solo evita repetir un cálculo que ya está en marcha. La clave debe
+    incluir la versión del árbol para no entregar datos de antes de una
+    escritura ya confirmada.
+
+    Si una petición se cancela (el cliente se desconecta) el cálculo sigue
+    para las demás.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def _release(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # marcar como recuperada aunque nadie quede esperando
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(compute())
+            task.add_done_callback(lambda done: self._release(key, done))
+            registry.inc("children_coalesced_reads_total", (("flight", self.name), ("role", "leader")))
+        else:
+            registry.inc("children_coalesced_reads_total", (("flight", self.name), ("role", "follower")))
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+async def collect(iterator: Iterator[T], chunk_size: int = settings.traversal_chunk_size) -> List[T]:
+    """Consumir un recorrido cediendo el control al event loop cada chunk_size elementos"""
+    result: List[T] = []
+    count = 0
+    for item in iterator:
+        result.append(item)
+        count += 1
+        if count == chunk_size:
+            count = 0
+            await asyncio.sleep(0)
+    return result
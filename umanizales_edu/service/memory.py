@@ -0,0 +1,187 @@
+import linecache
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, Optional
+
+from ..config import settings
+from ..model.schemas import Child
+from .changefeed import ChangeFeed
+
+# Niño de prueba para medir los nodos (los nodos solo guardan una referencia)
+_PROBE = Child.model_construct(id=1, age=1, name="x", gender="M")
+_instance_bytes: Dict[type, int] = {}
+
+# Último snapshot del modo profundo: el siguiente se compara contra él
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+_last_snapshot_at: Optional[float] = None
+
+
+def instance_bytes(node_class: Callable[[Child], object], probes: int = 256) -> int:
+    """Bytes por instancia de una clase de nodo, medidos una vez con tracemalloc
+
+    `sys.getsizeof` no incluye los atributos de la instancia, y leer
+    `__dict__` para medirlos lo materializa (el nodo pasa a ocupar más). Se
+    crean `probes` nodos de prueba y se divide la memoria asignada.
+    """
+    size = _instance_bytes.get(node_class)
+    if size is None:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            nodes = [None] * probes
+            before = tracemalloc.get_traced_memory()[0]
+            for i in range(probes):
+                nodes[i] = node_class(_PROBE)
+            allocated = tracemalloc.get_traced_memory()[0] - before
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        size = _instance_bytes[node_class] = max(sys.getsizeof(nodes[0]), round(allocated / probes))
+    return size
+
+
+def _int_bytes(value: int) -> int:
+    """Los enteros pequeños (-5..256) son compartidos por el intérprete"""
+    return 0 if -5 <= value <= 256 else sys.getsizeof(value)
+
+
+def record_bytes(child: Child) -> int:
+    """Bytes del modelo sin el nombre: objeto, atributos, campos asignados e id
+
+    El género se toma como compartido: solo hay tres valores y pydantic-core
+    reutiliza las cadenas cortas que valida.
+    """
+    return (sys.getsizeof(child) + sys.getsizeof(child.__dict__)
+            + sys.getsizeof(child.__pydantic_fields_set__) + _int_bytes(child.id))
+
+
+def shared_bytes(value: object) -> float:
+    """Bytes de un objeto repartidos entre quienes lo referencian
+
+    pydantic-core reutiliza las cadenas cortas repetidas que valida (muchos
+    niños pueden apuntar al mismo nombre) y los nodos cargados en bloque
+    comparten el entero de su versión: con r referencias cada una cuenta 1/r
+    (la caché de pydantic-core también cuenta como una). Los enteros pequeños
+    tienen miles de referencias y quedan en ~0.
+    """
+    return sys.getsizeof(value) / max(1, sys.getrefcount(value) - 2)
+
+
+def feed_bytes(feed: ChangeFeed, sample_size: int) -> int:
+    """Buffer del registro de cambios: eventos × tamaño medio de una muestra"""
+    events = feed._events
+    count = len(events)
+    total = sys.getsizeof(events)
+    if count:
+        step = max(1, count // max(1, sample_size))
+        sample = [events[i] for i in range(0, count, step)][:sample_size]
+        mean = sum(sys.getsizeof(event) + _int_bytes(event[0]) + sys.getsizeof(event[2]) for event in sample) / len(sample)
+        total += round(mean * count)
+    return total
+
+
+def estimate_memory(engine, sample_size: int = settings.memory_sample_size, feed: Optional[ChangeFeed] = None,
+                    seed: Optional[int] = None) -> dict:
+    """Memoria estimada de un motor a partir de una muestra de sus nodos
+
+    Cada motor informa con `memory_parts` la cantidad de nodos, el tamaño de
+    un nodo, una muestra de nodos y los bytes de sus índices y cachés; aquí se
+    extrapola la muestra (versión de cada nodo, registros y nombres) a todos
+    los nodos. Cuesta O(muestra), no O(n).
+    """
+    start = time.perf_counter()
+    parts = engine.memory_parts(sample_size, random.Random(seed))
+    sample = parts["sample"]
+    nodes = parts["nodes"]
+    count = len(sample) or 1
+    per_node = parts["node_bytes"] + sum(shared_bytes(node.version) for node in sample) / count
+    per_record = sum(record_bytes(node.child) for node in sample) / count
+    per_name = sum(shared_bytes(node.child.name) for node in sample) / count
+    caches = dict(parts["caches"])
+    if feed is not None:
+        caches["change_feed"] = feed_bytes(feed, sample_size)
+    breakdown = {
+        "nodes": round(nodes * per_node),
+        "records": round(nodes * per_record),
+        "names": round(nodes * per_name),
+        "indexes": sum(parts["indexes"].values()),
+        "caches": sum(caches.values()),
+    }
+    report = {
+        "engine": type(engine).__name__,
+        "nodes": nodes,
+        "sampled": len(sample),
+        "bytes_per_node": round(per_node, 1),
+        "bytes_per_record": round(per_record, 1),
+        "bytes_per_name": round(per_name, 1),
+        "estimated_bytes": sum(breakdown.values()),
+        "breakdown": breakdown,
+        "indexes": parts["indexes"],
+        "caches": caches,
+    }
+    if "disk" in parts:
+        report["disk"] = parts["disk"]
+    report["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    return report
+
+
+# ==================== MODO PROFUNDO (TRACEMALLOC) ====================
+
+def _location(frame: tracemalloc.Frame) -> str:
+    filename = frame.filename
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            filename = filename[len(prefix) + 1:]
+            break
+    return f"{filename}:{frame.lineno}"
+
+
+def traced_memory(top: int = 10) -> dict:
+    """Memoria asignada según tracemalloc, por línea y por archivo, y diferencia con el snapshot anterior
+
+    Si tracemalloc no estaba activo se activa aquí y solo cuenta lo que se
+    asigne desde ese momento: para incluir el árbol hay que arrancar el
+    proceso con PYTHONTRACEMALLOC=1 (o -X tracemalloc). Activo, cada
+    asignación cuesta más y el snapshot guardado ocupa memoria propia.
+    """
+    global _last_snapshot, _last_snapshot_at
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(settings.memory_trace_frames)
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, linecache.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    lines = snapshot.statistics("lineno")
+    report = {
+        "tracing_started": started,
+        "traced_bytes": current,
+        "peak_traced_bytes": peak,
+        "top_lines": [
+            {"location": _location(stat.traceback[0]), "bytes": stat.size, "blocks": stat.count}
+            for stat in lines[:top]
+        ],
+        "top_files": [
+            {"file": _location(stat.traceback[0]).rsplit(":", 1)[0], "bytes": stat.size, "blocks": stat.count}
+            for stat in snapshot.statistics("filename")[:top]
+        ],
+        "since_previous": None,
+    }
+    if _last_snapshot is not None:
+        report["since_previous"] = {
+            "seconds": round(time.time() - _last_snapshot_at, 3),
+            "top_lines": [
+                {"location": _location(stat.traceback[0]), "bytes_diff": stat.size_diff, "blocks_diff": stat.count_diff}
+                for stat in snapshot.compare_to(_last_snapshot, "lineno")[:top]
+            ],
+        }
+    _last_snapshot, _last_snapshot_at = snapshot, time.time()
+    return report
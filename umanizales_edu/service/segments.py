@@ -0,0 +1,167 @@
+import math
+import os
+import tempfile
+import weakref
+from array import array
+from bisect import bisect_right
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from ..model.schemas import Child
+
+# Registro de un segmento: el niño y la versión de su última modificación
+Record = Tuple[Child, int]
+
+_record_adapter = TypeAdapter(Record)
+_records_adapter = TypeAdapter(List[Record])
+_MASK = (1 << 64) - 1
+_MIX_1 = 0x9E3779B97F4A7C15
+_MIX_2 = 0xBF58476D1CE4E5B9
+
+
+class BloomFilter:
+    """Filtro de Bloom sobre ids enteros
+
+    Se dimensiona para `expected` ids con la tasa de falsos positivos pedida
+    (m = -n ln p / ln² 2 bits, k = m/n ln 2 funciones). Las k posiciones salen
+    de dos mezclas multiplicativas del id (doble hashing de Kirsch y
+    Mitzenmacher). La carga usa NumPy sobre todos los ids a la vez y la
+    consulta, de un solo id, Python puro; ambas calculan lo mismo.
+    """
+
+    def __init__(self, expected: int, fp_rate: float):
+        if not 0 < fp_rate < 1:
+            raise ValueError("fp_rate must be between 0 and 1")
+        expected = max(1, expected)
+        self.bits_count = max(64, math.ceil(-expected * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits_count / expected * math.log(2)))
+        self._bits = bytes((self.bits_count + 7) // 8)
+
+    def add_many(self, ids: np.ndarray) -> None:
+        keys = ids.astype(np.uint64)
+        h1 = keys * np.uint64(_MIX_1)
+        h2 = (((h1 >> np.uint64(29)) ^ keys) * np.uint64(_MIX_2)) | np.uint64(1)
+        a = h1 % np.uint64(self.bits_count)
+        b = h2 % np.uint64(self.bits_count)
+        bits = np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8), count=self.bits_count, bitorder="little")
+        for i in range(self.hashes):
+            bits[(a + np.uint64(i) * b) % np.uint64(self.bits_count)] = 1
+        self._bits = np.packbits(bits, bitorder="little").tobytes()
+
+    def __contains__(self, id: int) -> bool:
+        h1 = (id * _MIX_1) & _MASK
+        h2 = ((((h1 >> 29) ^ id) * _MIX_2) & _MASK) | 1
+        a, b = h1 % self.bits_count, h2 % self.bits_count
+        bits = self._bits
+        for i in range(self.hashes):
+            position = (a + i * b) % self.bits_count
+            if not bits[position >> 3] >> (position & 7) & 1:
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._bits)
+
+
+def _release(fd: int, path: str) -> None:
+    os.close(fd)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class Segment:
+    """Archivo inmutable de registros ordenados por id (una línea JSON por registro)
+
+    En memoria solo quedan el rango de ids, el filtro de Bloom y un índice
+    disperso con el id y la posición de uno de cada `index_interval`
+    registros. Buscar un id lee del disco un único bloque de ese tamaño, y
+    solo si el rango y el filtro no lo descartan antes.
+
+    El archivo es espacio temporal del proceso: se borra cuando el segmento
+    deja de estar referenciado. Los recorridos abren su propio descriptor, así
+    que pueden terminar de leer un segmento aunque ya se haya descartado.
+    """
+
+    def __init__(self, path: str, fd: int, ids: array, index_ids: array, index_offsets: array, fp_rate: float):
+        self.path = path
+        self.count = len(ids)
+        self.min_id = ids[0] if ids else 0
+        self.max_id = ids[-1] if ids else -1
+        self.bloom = BloomFilter(self.count, fp_rate)
+        self.bloom.add_many(np.frombuffer(ids, dtype=np.int64))
+        self._index_ids = index_ids
+        self._index_offsets = index_offsets  # una posición más: el tamaño del archivo
+        self._fd = fd
+        weakref.finalize(self, _release, fd, path)
+
+    @classmethod
+    def write(cls, directory: str, records: Iterable[Record], fp_rate: float,
+              index_interval: int, chunk_size: int = 1000) -> 'Segment':
+        """Escribir un segmento nuevo con `records`, ya ordenados por id y sin repetidos
+
+        Cada bloque se serializa como arreglo JSON en pydantic-core y se parte
+        en líneas (la secuencia `],[{"id":` solo aparece entre registros).
+        """
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(suffix=".seg", dir=directory)
+        ids, index_ids, index_offsets = array("q"), array("q"), array("q")
+        offset = 0
+        iterator = iter(records)
+        with open(fd, "wb", closefd=False) as file:
+            while chunk := list(islice(iterator, chunk_size)):
+                lines = _records_adapter.dump_json(chunk)[1:-1].replace(b'],[{"id":', b']\n[{"id":').split(b"\n")
+                for (child, _), line in zip(chunk, lines):
+                    if len(ids) % index_interval == 0:
+                        index_ids.append(child.id)
+                        index_offsets.append(offset)
+                    ids.append(child.id)
+                    offset += len(line) + 1
+                file.write(b"\n".join(lines) + b"\n")
+        index_offsets.append(offset)
+        return cls(path, fd, ids, index_ids, index_offsets, fp_rate)
+
+    def may_contain(self, id: int) -> bool:
+        """False si el id seguro no está (sin tocar el disco)"""
+        return self.min_id <= id <= self.max_id and id in self.bloom
+
+    def get(self, id: int) -> Optional[Record]:
+        """Leer el registro del id (un bloque del índice disperso), o None si no está"""
+        block = bisect_right(self._index_ids, id) - 1
+        if block < 0:
+            return None
+        start, end = self._index_offsets[block], self._index_offsets[block + 1]
+        prefix = b'[{"id":%d,' % id
+        for line in os.pread(self._fd, end - start, start).split(b"\n"):
+            if line.startswith(prefix):
+                return _record_adapter.validate_json(line)
+        return None
+
+    def records(self, chunk_size: int = 1000) -> Iterator[Record]:
+        """Recorrer los registros en orden de id
+
+        El archivo se abre al llamar (no al empezar a iterar), así que el
+        recorrido corresponde al segmento aunque después se descarte.
+        """
+        return self._read(open(self.path, "rb"), chunk_size)
+
+    @staticmethod
+    def _read(file: IO[bytes], chunk_size: int) -> Iterator[Record]:
+        with file:
+            while lines := list(islice(file, chunk_size)):
+                yield from _records_adapter.validate_json(b"[" + b",".join(line.rstrip(b"\n") for line in lines) + b"]")
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes en disco"""
+        return self._index_offsets[-1]
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes en memoria (filtro de Bloom e índice disperso)"""
+        return self.bloom.nbytes + (len(self._index_ids) + len(self._index_offsets)) * 8
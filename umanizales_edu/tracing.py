@@ -0,0 +1,158 @@
+import atexit
+import json
+import os
+import re
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs
+
+from .config import settings
+
+# Operaciones registradas (el índice es el código en el archivo)
+OPERATIONS = ("insert", "search", "update", "delete", "list_in", "list_pre", "list_post")
+OPERATION_CODES = {operation: code for code, operation in enumerate(OPERATIONS)}
+
+MAGIC = b"CHILDREN-TRACE 1\n"
+# t (s desde el inicio), operación, id, edad (255 = sin edad), bytes del cuerpo
+RECORD = struct.Struct("<dBqBI")
+NO_AGE = 255
+
+_ID = re.compile(rb'"id"\s*:\s*(\d+)')
+_AGE = re.compile(rb'"age"\s*:\s*(\d+)')
+
+
+class TraceRecord(NamedTuple):
+    """Una operación enviada al árbol"""
+    t: float
+    operation: str
+    id: int
+    age: Optional[int]
+    size: int
+
+
+class TraceWriter:
+    """Archivo de traza: una cabecera JSON y registros binarios de tamaño fijo (22 bytes)
+
+    Se escribe con un búfer de 64 KiB y se vacía al terminar el proceso.
+    """
+
+    def __init__(self, path: Path, engine: str):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file = open(path, "wb", buffering=1 << 16)
+        self._file.write(MAGIC + json.dumps({"engine": engine, "started_at": time.time()}).encode() + b"\n")
+        self._start = time.perf_counter()
+        atexit.register(self.close)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def record(self, t: float, operation: str, id: int, age: Optional[int], size: int) -> None:
+        self._file.write(RECORD.pack(t, OPERATION_CODES[operation], id, NO_AGE if age is None else age, size))
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_trace(file: BinaryIO) -> Tuple[dict, Iterator[TraceRecord]]:
+    """Leer la cabecera y devolver los registros de una traza en el orden en que se escribieron
+
+    Raises:
+        ValueError: Si el archivo no es una traza
+    """
+    if file.readline() != MAGIC:
+        raise ValueError("Not a children trace file")
+    header = json.loads(file.readline())
+
+    def records() -> Iterator[TraceRecord]:
+        while block := file.read(RECORD.size * 4096):
+            for t, code, id, age, size in RECORD.iter_unpack(block[:len(block) - len(block) % RECORD.size]):
+                yield TraceRecord(t, OPERATIONS[code], id, None if age == NO_AGE else age, size)
+
+    return header, records()
+
+
+def _operation(method: str, route: str, query: bytes) -> Optional[str]:
+    """Operación sobre el árbol según el método y la plantilla de la ruta (None si no es una)"""
+    if route.endswith("/{id}"):
+        return {"GET": "search", "PUT": "update", "DELETE": "delete"}.get(method)
+    if route.endswith("/"):
+        if method == "POST":
+            return "insert"
+        if method == "GET":
+            order = parse_qs(query.decode("latin-1")).get("order", ["in"])[0]
+            return f"list_{order}" if f"list_{order}" in OPERATION_CODES else None
+    return None
+
+
+def _reached_engine(operation: str, status: int) -> bool:
+    """Si la petición llegó al árbol: las rechazadas por validación (422) no llegan"""
+    return status < 300 or status in (400, 404) or (status == 304 and operation == "search")
+
+
+class TraceMiddleware:
+    """Middleware ASGI que registra cada operación CRUD o listado enviada al árbol
+
+    De cada petición guarda el momento de llegada, la operación, el id, la
+    edad (si viene en el cuerpo; ordena el ABB) y el tamaño del cuerpo, no
+    los datos del niño. La traza se reproduce contra cualquier motor con
+    `python -m umanizales_edu.replay`. Solo se registra en la app cuando
+    `trace_enabled` es verdadero.
+    """
+
+    def __init__(self, app, engine: str):
+        self.app = app
+        self.engine = engine
+        self.writer: Optional[TraceWriter] = None
+
+    def _writer(self) -> TraceWriter:
+        if self.writer is None:
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = Path(settings.trace_dir) / f"{self.engine}-{timestamp}-{os.getpid()}.trace"
+            self.writer = TraceWriter(path, self.engine)
+        return self.writer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith("/children/"):
+            await self.app(scope, receive, send)
+            return
+
+        writer = self._writer()
+        arrival = writer.elapsed()
+        body = []
+        status_code = 500
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.append(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive_wrapper, send_wrapper)
+
+        route = getattr(scope.get("route"), "path", None)
+        operation = route and _operation(scope["method"], route, scope["query_string"])
+        if operation is None or not _reached_engine(operation, status_code):
+            return
+        payload = b"".join(body)
+        if operation.startswith("list_"):
+            id = 0
+        elif operation == "insert":
+            match = _ID.search(payload)
+            if match is None:
+                return
+            id = int(match.group(1))
+        else:
+            id = int(scope["path_params"]["id"])
+        age = _AGE.search(payload) if operation in ("insert", "update") else None
+        writer.record(arrival, operation, id, int(age.group(1)) if age else None, len(payload))